@@ -0,0 +1,168 @@
+# app/admission.py
+"""
+Admission control for the processing pipeline.
+
+- AdmissionController: at most `max_concurrency` claims run at once; others
+  wait in a bounded FIFO per priority lane ("interactive" before "batch").
+  A full lane, or a wait longer than `max_wait`, raises Saturated so the
+  route can answer 429 with a Retry-After estimate instead of piling up
+  threads.
+- StageLimiter: per-stage concurrency caps (textract, local, llm) so one
+  stage can't exhaust its AWS quota while the others sit idle.
+
+Queue depth, wait time, rejections and stage waits are reported to app.metrics.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from app.metrics import metrics
+
+LANES = ("interactive", "batch")   # highest priority first
+
+ADMISSION_MAX_CONCURRENCY = int(os.environ.get("ADMISSION_MAX_CONCURRENCY", "8"))
+ADMISSION_MAX_WAIT = float(os.environ.get("ADMISSION_MAX_WAIT", "30"))
+ADMISSION_QUEUE_LIMITS = {
+    "interactive": int(os.environ.get("ADMISSION_QUEUE_INTERACTIVE", "16")),
+    "batch": int(os.environ.get("ADMISSION_QUEUE_BATCH", "64")),
+}
+# server threads left for /metrics, /tasks, /readyz etc. while /process is saturated
+ADMISSION_HEADROOM_THREADS = int(os.environ.get("ADMISSION_HEADROOM_THREADS", "4"))
+# "textract=8,local=4,llm=4"
+STAGE_CONCURRENCY = os.environ.get("STAGE_CONCURRENCY", "textract=8,local=4,llm=4")
+
+
+def request_threads() -> int:
+    """Server threads per process needed for admission control to see (and shed) a burst:
+    every running claim, every queued one and some headroom for the other routes."""
+    return ADMISSION_MAX_CONCURRENCY + sum(ADMISSION_QUEUE_LIMITS.values()) + ADMISSION_HEADROOM_THREADS
+
+
+class Saturated(Exception):
+    def __init__(self, lane: str, retry_after: int, reason: str):
+        super().__init__(f"{lane} lane saturated: {reason}")
+        self.lane = lane
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionController:
+    def __init__(self, max_concurrency: int = ADMISSION_MAX_CONCURRENCY, queue_limits: dict = None,
+                 max_wait: float = ADMISSION_MAX_WAIT):
+        self.max_concurrency = max_concurrency
+        self.queue_limits = dict(queue_limits or ADMISSION_QUEUE_LIMITS)
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = {lane: deque() for lane in LANES}
+
+        metrics.gauge("admission.active", lambda: self._active)
+        for lane in LANES:
+            metrics.gauge(f"admission.queue_depth.{lane}", lambda lane=lane: len(self._waiting[lane]))
+
+    @staticmethod
+    def lane_for(value) -> str:
+        return value if value in LANES else LANES[0]
+
+    def _head(self):
+        for lane in LANES:
+            if self._waiting[lane]:
+                return self._waiting[lane][0]
+        return None
+
+    def _ahead_of(self, lane: str) -> bool:
+        """True if anyone in this lane or a higher-priority one is already waiting."""
+        for other in LANES:
+            if self._waiting[other]:
+                return True
+            if other == lane:
+                return False
+        return False
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free: mean service time x queued work per slot."""
+        queued = sum(len(q) for q in self._waiting.values())
+        service = metrics.mean("admission.service_seconds", default=5.0)
+        return max(1, min(300, math.ceil(service * (queued + 1) / max(1, self.max_concurrency))))
+
+    def acquire(self, lane: str):
+        lane = self.lane_for(lane)
+        start = time.monotonic()
+        with self._cond:
+            if self._active < self.max_concurrency and not self._ahead_of(lane):
+                self._active += 1
+                metrics.incr(f"admission.admitted.{lane}")
+                metrics.observe(f"admission.wait_seconds.{lane}", 0.0)
+                return
+            if len(self._waiting[lane]) >= self.queue_limits.get(lane, 0):
+                metrics.incr(f"admission.rejected.{lane}")
+                raise Saturated(lane, self.retry_after(), "queue full")
+
+            ticket = object()
+            self._waiting[lane].append(ticket)
+            deadline = start + self.max_wait
+            while not (self._active < self.max_concurrency and self._head() is ticket):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiting[lane].remove(ticket)
+                    self._cond.notify_all()
+                    metrics.incr(f"admission.rejected.{lane}")
+                    raise Saturated(lane, self.retry_after(), "wait timeout")
+                self._cond.wait(remaining)
+            self._waiting[lane].popleft()
+            self._active += 1
+            # the next head may also fit if more than one slot is free
+            self._cond.notify_all()
+        metrics.incr(f"admission.admitted.{lane}")
+        metrics.observe(f"admission.wait_seconds.{lane}", time.monotonic() - start)
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def admit(self, lane: str):
+        """Hold a processing slot for the duration of the block (raises Saturated)."""
+        self.acquire(lane)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            metrics.observe("admission.service_seconds", time.perf_counter() - start)
+            self.release()
+
+
+def parse_stage_limits(spec: str) -> dict:
+    limits = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            limits[name.strip()] = int(value)
+    return limits
+
+
+class StageLimiter:
+    def __init__(self, limits: dict = None):
+        self.limits = limits if limits is not None else parse_stage_limits(STAGE_CONCURRENCY)
+        self._sems = {name: threading.BoundedSemaphore(n) for name, n in self.limits.items() if n > 0}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Run a block under the stage's concurrency cap (uncapped if the stage isn't configured)."""
+        sem = self._sems.get(name)
+        start = time.perf_counter()
+        if sem is not None:
+            sem.acquire()
+        metrics.observe(f"stage.{name}.wait_seconds", time.perf_counter() - start)
+        run_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            metrics.observe(f"stage.{name}.seconds", time.perf_counter() - run_start)
+            if sem is not None:
+                sem.release()
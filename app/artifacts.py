@@ -0,0 +1,157 @@
+# app/artifacts.py
+"""
+Layout and encoding of the processed artifacts in S3.
+
+Layout v2 stores the document text once, in processed/<name>.txt:
+
+- .extraction.json  {"v": 2, "digest": ..., "fields": {...}, "spans": {"raw_claim_description": [start, end]}}
+                    long field values that are verbatim slices of the text are stored as offsets
+- .emb.json         {"v": 2, "digest": ..., "chunks": [{"page", "start", "end", "vector"}, ...]}
+                    chunk text is text[start:end] (offsets from app.chunker)
+
+JSON is written compact. The JSON artifacts may be compressed (ARTIFACT_COMPRESSION:
+none, gzip or zstd); the S3 object's ContentEncoding says which, and readers also
+sniff the magic bytes. The .txt stays plain so `aws s3 cp` and the scripts/ tools
+can read it as is. Readers accept both v2 and the original layout (plain text,
+pretty-printed field dict with the full description, chunk list with text).
+"""
+
+import gzip
+import json
+import os
+from typing import Optional
+
+try:
+    import zstandard
+    _HAS_ZSTD = True
+except Exception:
+    _HAS_ZSTD = False
+
+ARTIFACT_COMPRESSION = os.environ.get("ARTIFACT_COMPRESSION", "none").lower()
+# field values at least this long are stored as spans when they occur verbatim in the text
+SPAN_MIN_CHARS = int(os.environ.get("ARTIFACT_SPAN_MIN_CHARS", "64"))
+
+LAYOUT_VERSION = 2
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def extraction_key_for(processed_key: str) -> str:
+    return processed_key.replace(".txt", ".extraction.json")
+
+
+def embeddings_key_for(processed_key: str) -> str:
+    return processed_key.replace(".txt", ".emb.json")
+
+
+# ---------- encoding ----------
+
+def encode(data: bytes, encoding: Optional[str] = None) -> tuple:
+    """Returns (body, content_encoding or None). encoding defaults to ARTIFACT_COMPRESSION;
+    zstd falls back to gzip if zstandard is missing."""
+    encoding = encoding or ARTIFACT_COMPRESSION
+    if encoding == "zstd" and _HAS_ZSTD:
+        return zstandard.ZstdCompressor(level=10).compress(data), "zstd"
+    if encoding in ("gzip", "zstd"):
+        return gzip.compress(data, compresslevel=6, mtime=0), "gzip"
+    return data, None
+
+
+def decode(body: bytes, content_encoding: Optional[str] = None) -> bytes:
+    if content_encoding == "zstd" or body[:4] == _ZSTD_MAGIC:
+        if not _HAS_ZSTD:
+            raise RuntimeError("artifact is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    if content_encoding == "gzip" or body[:2] == _GZIP_MAGIC:
+        return gzip.decompress(body)
+    return body
+
+
+def put_kwargs(key: str, data: bytes, content_type: str, encoding: Optional[str] = None) -> dict:
+    """put_object keyword arguments (minus Bucket) for an encoded artifact."""
+    body, content_encoding = encode(data, encoding)
+    kwargs = {"Key": key, "Body": body, "ContentType": content_type}
+    if content_encoding:
+        kwargs["ContentEncoding"] = content_encoding
+    return kwargs
+
+
+def read_object(response: dict) -> bytes:
+    """Decoded body of a get_object response."""
+    return decode(response["Body"].read(), response.get("ContentEncoding"))
+
+
+def get_artifact(client, bucket: str, key: str) -> bytes:
+    return read_object(client.get_object(Bucket=bucket, Key=key))
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# ---------- v2 documents ----------
+
+def text_put_kwargs(processed_key: str, text: str) -> dict:
+    # never compressed: S3 clients (aws s3 cp) do not decode ContentEncoding
+    return put_kwargs(processed_key, text.encode("utf-8"), "text/plain; charset=utf-8", encoding="none")
+
+
+def extraction_put_kwargs(processed_key: str, fields: dict, text: str, digest: Optional[str] = None) -> dict:
+    """Fields whose long values are verbatim slices of `text` are stored as [start, end] spans."""
+    compact, spans = {}, {}
+    for name, value in fields.items():
+        start = text.find(value) if isinstance(value, str) and len(value) >= SPAN_MIN_CHARS else -1
+        if start >= 0:
+            spans[name] = [start, start + len(value)]
+        else:
+            compact[name] = value
+    doc = {"v": LAYOUT_VERSION, "digest": digest, "fields": compact, "spans": spans}
+    return put_kwargs(extraction_key_for(processed_key), _dumps(doc), "application/json")
+
+
+def embeddings_put_kwargs(processed_key: str, embeddings: list, text: str, digest: Optional[str] = None) -> dict:
+    """Chunk text is dropped when it equals text[start:end] (kept inline otherwise)."""
+    chunks = []
+    for e in embeddings:
+        entry = {"page": e.get("page"), "start": e["start"], "end": e["end"], "vector": e.get("vector")}
+        if text[e["start"]:e["end"]] != e.get("chunk"):
+            entry["chunk"] = e.get("chunk")
+        chunks.append(entry)
+    doc = {"v": LAYOUT_VERSION, "digest": digest, "chunks": chunks}
+    return put_kwargs(embeddings_key_for(processed_key), _dumps(doc), "application/json")
+
+
+def load_extraction(doc, text: Optional[str] = None) -> dict:
+    """Flat field dict from either layout; spans resolve to None if `text` is not given."""
+    if not (isinstance(doc, dict) and doc.get("v", 1) >= 2):
+        return doc
+    fields = dict(doc.get("fields") or {})
+    for name, (start, end) in (doc.get("spans") or {}).items():
+        fields[name] = text[start:end] if text is not None else None
+    return fields
+
+
+def load_embeddings(doc, text: Optional[str] = None) -> list:
+    """[{"chunk", "vector", "page", "start", "end"}, ...] from either layout."""
+    if not (isinstance(doc, dict) and doc.get("v", 1) >= 2):
+        return doc
+    out = []
+    for c in doc.get("chunks") or []:
+        chunk = c.get("chunk")
+        if chunk is None and text is not None:
+            chunk = text[c["start"]:c["end"]]
+        out.append({"chunk": chunk, "vector": c.get("vector"), "page": c.get("page"),
+                    "start": c["start"], "end": c["end"]})
+    return out
+
+
+def load_artifacts(client, bucket: str, processed_key: str, embeddings: bool = False) -> dict:
+    """Read text + extraction (and optionally embeddings) for a processed key, old or new layout."""
+    text = get_artifact(client, bucket, processed_key).decode("utf-8")
+    out = {"text": text,
+           "extraction": load_extraction(json.loads(get_artifact(client, bucket, extraction_key_for(processed_key))),
+                                         text)}
+    if embeddings:
+        out["embeddings"] = load_embeddings(
+            json.loads(get_artifact(client, bucket, embeddings_key_for(processed_key))), text)
+    return out
@@ -0,0 +1,108 @@
+# app/asgi.py
+"""
+ASGI entry point for the asyncio pipeline, served next to the Flask app.
+
+    uvicorn app.asgi:application --port 8001
+
+Routes:
+- POST /process  {"s3_key": "..."}  -> same response shape as the Flask /process
+- POST /bundles  {"s3_keys": [...]}  -> same response shape as the Flask /bundles
+- GET  /healthz                      -> {"ok": true, "in_flight": <n>}
+"""
+
+import asyncio
+import json
+import time
+
+from app.bundle import build_bundle_response, normalize_documents
+from app.async_pipeline import AsyncClaimPipeline
+from app.singleflight import AsyncSingleFlight
+
+_pipeline = None
+_inflight = AsyncSingleFlight()
+
+
+def get_pipeline() -> AsyncClaimPipeline:
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = AsyncClaimPipeline()
+    return _pipeline
+
+
+async def _bundle_document(pipeline: AsyncClaimPipeline, s3_key: str):
+    try:
+        resp, _ = await _inflight.do(await pipeline.coalesce_key(s3_key), pipeline.process, s3_key)
+    except Exception as e:
+        return "error", str(e)
+    return "ok", resp
+
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    more = True
+    while more:
+        message = await receive()
+        body += message.get("body", b"")
+        more = message.get("more_body", False)
+    return body
+
+
+async def _send_json(send, status: int, payload: dict):
+    data = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(data)).encode())],
+    })
+    await send({"type": "http.response.body", "body": data})
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if _pipeline is not None:
+                    _pipeline.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] != "http":
+        return
+
+    path, method = scope["path"], scope["method"]
+    if path == "/healthz" and method == "GET":
+        in_flight = _pipeline.in_flight if _pipeline is not None else 0
+        return await _send_json(send, 200, {"ok": True, "in_flight": in_flight})
+
+    if path == "/process" and method == "POST":
+        try:
+            body = json.loads(await _read_body(receive) or b"{}")
+        except Exception:
+            body = {}
+        s3_key = body.get("s3_key") if isinstance(body, dict) else None
+        if not s3_key:
+            return await _send_json(send, 400, {"error": "s3_key required"})
+        pipeline = get_pipeline()
+        try:
+            # concurrent calls for the same document attach to the running job
+            resp, _ = await _inflight.do(await pipeline.coalesce_key(s3_key), pipeline.process, s3_key)
+        except Exception as e:
+            return await _send_json(send, 500, {"error": f"textract worker failed: {str(e)}"})
+        return await _send_json(send, 200, resp)
+
+    if path == "/bundles" and method == "POST":
+        try:
+            body = json.loads(await _read_body(receive) or b"{}")
+            documents = normalize_documents(body if isinstance(body, dict) else {})
+        except ValueError as e:
+            return await _send_json(send, 400, {"error": str(e)})
+        pipeline = get_pipeline()
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*(_bundle_document(pipeline, d["s3_key"]) for d in documents))
+        resp = build_bundle_response(documents, outcomes, time.perf_counter() - start)
+        return await _send_json(send, 200 if resp["bundle"]["processed"] else 502, resp)
+
+    return await _send_json(send, 404, {"error": "not found"})
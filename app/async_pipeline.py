@@ -0,0 +1,280 @@
+# app/async_pipeline.py
+"""
+Asyncio variant of the /process pipeline.
+
+Every stage that blocks in the Flask path (S3, Textract start/poll, Bedrock) is
+awaited here instead, so a single event loop can hold thousands of in-flight
+claims. Clients are injected: if a client method is a coroutine function
+(aiobotocore / aioboto3 clients) it is awaited directly, otherwise the call is
+offloaded to a bounded thread pool. Textract polling uses asyncio.sleep, so a
+waiting claim holds no thread at all.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app import artifacts, bedrock_client, bedrock_usage, llm_gate, native_text, pipeline_stages, summarizer
+from app.block_store import BlockStore, BlockStoreBuilder
+from app.prompt_manager import SUMMARY_INSTRUCTION, extraction_instruction_for, extraction_schema_for
+from app.validator import validate_extraction
+from app.results_store import record_claim, text_digest
+from app.near_dup import find_duplicates
+
+AWS_REGION = os.environ.get("AWS_REGION", "ap-south-1")
+CLAIM_BUCKET = os.environ.get("CLAIM_BUCKET", "claim-documents-poc-S")
+POLL_INTERVAL = float(os.environ.get("ASYNC_POLL_INTERVAL", "5"))
+POLL_TIMEOUT = float(os.environ.get("ASYNC_POLL_TIMEOUT", "900"))
+OFFLOAD_THREADS = int(os.environ.get("ASYNC_OFFLOAD_THREADS", "64"))
+MAX_IN_FLIGHT = int(os.environ.get("ASYNC_MAX_IN_FLIGHT", "5000"))
+
+
+class AsyncClaimPipeline:
+    def __init__(self, s3=None, textract=None, invoker=None, ptm=None, bucket: Optional[str] = None,
+                 poll_interval: float = POLL_INTERVAL, poll_timeout: float = POLL_TIMEOUT,
+                 offload_threads: int = OFFLOAD_THREADS, max_in_flight: int = MAX_IN_FLIGHT):
+        if s3 is None or textract is None:
+            import boto3
+            s3 = s3 or boto3.client("s3", region_name=AWS_REGION)
+            textract = textract or boto3.client("textract", region_name=AWS_REGION)
+        if invoker is None:
+            from app.model_invoker import ModelInvoker
+            invoker = ModelInvoker()
+        if ptm is None:
+            from app.prompt_manager import PromptTemplateManager
+            ptm = PromptTemplateManager()
+        self.s3 = s3
+        self.textract = textract
+        self.invoker = invoker
+        self.ptm = ptm
+        self.bucket = bucket or CLAIM_BUCKET
+        self.poll_interval = poll_interval
+        self.poll_timeout = poll_timeout
+        self._executor = ThreadPoolExecutor(max_workers=offload_threads, thread_name_prefix="claim-offload")
+        self._max_in_flight = max_in_flight
+        self._slots = None
+        self.in_flight = 0
+
+    # ---------- plumbing ----------
+    async def _offload(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # like asyncio.to_thread: the worker thread sees this task's contextvars (app.bedrock_usage)
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, functools.partial(ctx.run, fn, *args, **kwargs))
+
+    async def _in_stage(self, name: str, fn, *args, **kwargs):
+        """_offload with Bedrock usage attributed to pipeline stage `name`."""
+        with bedrock_usage.stage(name):
+            return await self._offload(fn, *args, **kwargs)
+
+    async def _call(self, client, method: str, **kwargs):
+        """Await a native async client method, or offload a blocking boto3 one."""
+        fn = getattr(client, method)
+        if inspect.iscoroutinefunction(fn):
+            return await fn(**kwargs)
+        return await self._offload(fn, **kwargs)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    # ---------- stages ----------
+    async def start_text_detection(self, s3_key: str) -> str:
+        resp = await self._call(
+            self.textract, "start_document_text_detection",
+            DocumentLocation={"S3Object": {"Bucket": self.bucket, "Name": s3_key}},
+        )
+        return resp["JobId"]
+
+    async def poll_job(self, job_id: str) -> dict:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.poll_timeout
+        while True:
+            res = await self._call(self.textract, "get_document_text_detection", JobId=job_id)
+            if res.get("JobStatus") in ("SUCCEEDED", "FAILED"):
+                return res
+            if loop.time() >= deadline:
+                raise TimeoutError(f"textract job {job_id} did not finish in {self.poll_timeout}s")
+            await asyncio.sleep(self.poll_interval)
+
+    async def ocr_blocks(self, s3_key: str) -> BlockStore:
+        job_id = await self.start_text_detection(s3_key)
+        res = await self.poll_job(job_id)
+        if res.get("JobStatus") != "SUCCEEDED":
+            raise RuntimeError(f"textract job {job_id} status {res.get('JobStatus')}")
+        builder = BlockStoreBuilder()
+        while True:
+            builder.add(res.get("Blocks"))
+            token = res.get("NextToken")
+            if not token:
+                return builder.build()
+            res = await self._call(self.textract, "get_document_text_detection", JobId=job_id, NextToken=token)
+
+    async def ocr_pages(self, s3_key: str):
+        return (await self.ocr_blocks(s3_key)).pages()
+
+    async def extract_pages(self, s3_key: str) -> list:
+        """Native text layer where good, Textract for the remaining pages (see textract_worker)."""
+        from app.textract_worker import subset_key_for
+        if not (native_text.available() and s3_key.lower().endswith(".pdf")):
+            return await self.ocr_pages(s3_key)
+
+        obj = await self._call(self.s3, "get_object", Bucket=self.bucket, Key=s3_key)
+        body = obj["Body"]
+        pdf_bytes = await body.read() if inspect.iscoroutinefunction(body.read) else await self._offload(body.read)
+        native, ocr_numbers = await self._offload(native_text.plan_ocr, pdf_bytes)
+        if not native:
+            return await self.ocr_pages(s3_key)
+        if not ocr_numbers:
+            return native
+
+        subset_key = subset_key_for(s3_key)
+        subset = await self._offload(native_text.build_subset_pdf, pdf_bytes, ocr_numbers)
+        await self._call(self.s3, "put_object", Bucket=self.bucket, Key=subset_key, Body=subset)
+        try:
+            pages = await self.ocr_pages(subset_key)
+        finally:
+            await self._call(self.s3, "delete_object", Bucket=self.bucket, Key=subset_key)
+        return native_text.merge_pages(native, pages, ocr_numbers)
+
+    async def embed_chunks(self, pages) -> list:
+        from app.chunker import iter_page_chunks
+        chunks = list(iter_page_chunks(pages))
+        vectors = await asyncio.gather(*(self._offload(bedrock_client.create_embedding, c["text"]) for c in chunks))
+        return [
+            {"chunk": c["text"], "vector": v, "page": c["page"], "start": c["start"], "end": c["end"]}
+            for c, v in zip(chunks, vectors)
+        ]
+
+    async def write_artifacts(self, processed_key: str, text: str, embeddings: list, s3_key: Optional[str] = None):
+        from app.textract_worker import extract_fields
+        extracted = extract_fields(text, source=processed_key)
+        digest = text_digest(text)
+        await asyncio.gather(
+            self._call(self.s3, "put_object", Bucket=self.bucket, **artifacts.text_put_kwargs(processed_key, text)),
+            self._call(self.s3, "put_object", Bucket=self.bucket,
+                       **artifacts.extraction_put_kwargs(processed_key, extracted, text, digest)),
+            self._call(self.s3, "put_object", Bucket=self.bucket,
+                       **artifacts.embeddings_put_kwargs(processed_key, embeddings, text, digest)),
+        )
+        await self._offload(record_claim, processed_key, fields=extracted, s3_key=s3_key,
+                            digest=digest, extraction=extracted)
+        return extracted
+
+    async def run_local(self, text: str):
+        from scripts.local_extract import extract_from_text
+        from scripts.local_summary import summarize_text
+        extraction, summary = await asyncio.gather(
+            self._offload(extract_from_text, text),
+            self._offload(summarize_text, text),
+        )
+        return extraction, summary
+
+    async def run_llm(self, text: str, local_extraction=None, validation=None):
+        """Returns (llm_extraction, llm_summary, gate); see app.llm_gate."""
+        if not getattr(bedrock_client, "ENABLE_BEDROCK", False):
+            return {"note": "bedrock disabled"}, "bedrock disabled", None
+
+        gate = llm_gate.decide(local_extraction, validation)
+        calls = []
+        if gate["decision"] != "skip":
+            prompt = self.ptm.render("extraction", instruction=extraction_instruction_for(gate["fields"]),
+                                     context=extraction_schema_for(gate["fields"]), document=text,
+                                     model_id=self.invoker.cascade)
+            calls.append(self._in_stage("extract", self.invoker.generate_json, prompt,
+                                        validate=llm_gate.acceptor(local_extraction, gate)))
+        if not llm_gate.skip_summary(gate):
+            calls.append(self._in_stage("summarize", summarizer.summarize_llm, self.invoker, self.ptm,
+                                        SUMMARY_INSTRUCTION, text))
+        results = await asyncio.gather(*calls, return_exceptions=True)
+
+        if gate["decision"] == "skip":
+            llm_extraction = {"note": llm_gate.SKIPPED_NOTE}
+        else:
+            ext_res = results.pop(0)
+            if isinstance(ext_res, Exception):
+                llm_extraction = {"error": str(ext_res)}
+            elif ext_res.get("success"):
+                gate["model_id"], gate["escalations"] = ext_res.get("model_id"), ext_res.get("escalations")
+                parsed = ext_res.get("parsed")
+                llm_extraction = llm_gate.select(parsed, gate) if parsed is not None else {"raw": ext_res.get("text", "")}
+            else:
+                llm_extraction = {"error": ext_res.get("error") or "bedrock disabled or failed",
+                                  "note": ext_res.get("note")}
+
+        if not results:
+            llm_summary = llm_gate.SKIPPED_NOTE
+        elif isinstance(results[0], Exception):
+            llm_summary = f"llm summary error: {str(results[0])}"
+        elif results[0].get("success"):
+            llm_summary = results[0].get("text")
+        else:
+            llm_summary = "bedrock disabled or failed"
+        return llm_extraction, llm_summary, gate
+
+    async def analyze(self, text: str):
+        """Local extraction first; its validation decides what (if anything) the LLM is asked."""
+        local_extraction, local_summary = await self.run_local(text)
+        validation = validate_extraction(local_extraction) if isinstance(local_extraction, dict) else None
+        llm = await self.run_llm(text, local_extraction, validation)
+        return local_extraction, local_summary, validation, llm
+
+    async def coalesce_key(self, s3_key: str) -> str:
+        """S3 key plus the object's ETag (see app.main.coalesce_key)."""
+        try:
+            head = await self._call(self.s3, "head_object", Bucket=self.bucket, Key=s3_key)
+            etag = head.get("ETag", "").strip('"')
+        except Exception:
+            etag = ""
+        return f"{s3_key}@{etag}"
+
+    # ---------- entry point ----------
+    async def process(self, s3_key: str) -> dict:
+        """
+        Async equivalent of POST /process. Returns the same response shape.
+        Raises RuntimeError if Textract fails.
+        """
+        from app.textract_worker import processed_key_for
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._max_in_flight)
+        with bedrock_usage.claim() as usage:
+            async with self._slots:
+                self.in_flight += 1
+                try:
+                    pages = await self.extract_pages(s3_key)
+                    text = "\n".join(page_text for _, page_text in pages)
+                    processed_key = processed_key_for(s3_key)
+
+                    embeddings = await self.embed_chunks(pages)
+                    (_, (local_extraction, local_summary, validation, (llm_extraction, llm_summary, gate)),
+                     duplicates, source_key) = await asyncio.gather(
+                        self.write_artifacts(processed_key, text, embeddings, s3_key=s3_key),
+                        self.analyze(text),
+                        self._offload(find_duplicates, processed_key, text),
+                        self.coalesce_key(s3_key),
+                    )
+                    # every stage ran in this call, so the manifest is written whole (see app.pipeline_stages)
+                    stage_entries = await self._offload(
+                        lambda: {**pipeline_stages.ingest_entries(source_key.rsplit("@", 1)[1] or None, text, pages,
+                                                                  embeddings),
+                                 **pipeline_stages.analysis_entries(text, local_extraction, local_summary)})
+                    manifest = pipeline_stages.new_manifest(s3_key, stage_entries)
+                    await self._call(self.s3, "put_object", Bucket=self.bucket,
+                                     **pipeline_stages.manifest_put_kwargs(processed_key, manifest))
+                finally:
+                    self.in_flight -= 1
+
+        resp = {
+            "s3_processed_key": processed_key,
+            "local": {"extraction": local_extraction, "summary": local_summary},
+            "validation": validation,
+            "duplicates": duplicates,
+            "llm": {"extraction": llm_extraction, "summary": llm_summary, "gate": gate},
+            "usage": usage.summary(),
+        }
+        await self._offload(record_claim, processed_key, fields=local_extraction, s3_key=s3_key, result=resp)
+        return resp
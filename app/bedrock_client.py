@@ -1,6 +1,8 @@
 import os
 import json
-import boto3
+import time
+
+from app import bedrock_usage
 
 # Safe-mode: only call Bedrock if env var ENABLE_BEDROCK is set to "1"
 ENABLE_BEDROCK = os.environ.get("ENABLE_BEDROCK", "0") == "1"
@@ -13,16 +15,19 @@ _bedrock_client = None
 def _get_bedrock_client():
     global _bedrock_client
     if _bedrock_client is None:
+        import boto3  # deferred: ~250 ms of import time, only needed once Bedrock is called
         try:
             _bedrock_client = boto3.client("bedrock-runtime", region_name=REGION)
         except Exception:
             _bedrock_client = boto3.client("bedrock", region_name=REGION)
     return _bedrock_client
 
-def invoke_model(model_id: str, input_payload: dict, timeout_seconds: int = 30):
+def invoke_model(model_id: str, input_payload: dict, timeout_seconds: int = 30, kind: str = "text",
+                 cache_status: str = None):
     """
     Generic Bedrock invoke wrapper. Returns parsed JSON or raw text.
     Only runs if ENABLE_BEDROCK is True. Otherwise returns None.
+    Every call is recorded in app.bedrock_usage (bytes, tokens, latency, cache status).
     """
     if not ENABLE_BEDROCK:
         print("Bedrock calls are disabled (ENABLE_BEDROCK=0). Skipping invoke_model.")
@@ -30,12 +35,20 @@ def invoke_model(model_id: str, input_payload: dict, timeout_seconds: int = 30):
 
     client = _get_bedrock_client()
     body = json.dumps(input_payload)
-    response = client.invoke_model(
-        modelId=model_id,
-        contentType="application/json",
-        accept="application/json",
-        body=body
-    )
+    prompt = input_payload.get("inputText") or input_payload.get("input") or body
+    start = time.perf_counter()
+    try:
+        response = client.invoke_model(
+            modelId=model_id,
+            contentType="application/json",
+            accept="application/json",
+            body=body
+        )
+    except Exception:
+        bedrock_usage.record(model_id, kind, prompt_bytes=len(body.encode("utf-8")),
+                             input_tokens=bedrock_usage.estimate_tokens(prompt),
+                             seconds=time.perf_counter() - start, cache=cache_status, ok=False)
+        raise
     raw = None
     if "body" in response:
         try:
@@ -43,23 +56,49 @@ def invoke_model(model_id: str, input_payload: dict, timeout_seconds: int = 30):
             raw = raw_bytes.decode("utf-8")
         except Exception:
             raw = None
+    result = response
     if raw:
         try:
-            return json.loads(raw)
+            result = json.loads(raw)
         except Exception:
-            return raw
-    return response
+            result = raw
+
+    tin, tout = bedrock_usage.returned_tokens(response, result)
+    bedrock_usage.record(
+        model_id, kind, prompt_bytes=len(body.encode("utf-8")),
+        input_tokens=tin if tin is not None else bedrock_usage.estimate_tokens(prompt),
+        output_tokens=tout if tout is not None else (
+            0 if kind == "embed" else bedrock_usage.estimate_tokens(bedrock_usage.completion_text(result))),
+        tokens="returned" if tin is not None else "estimated",
+        seconds=time.perf_counter() - start, cache=cache_status)
+    return result
 
-def create_embedding(text: str):
+def create_embedding(text: str, model: str = None):
     """
     Return embedding vector or None.
     Must set BEDROCK_MODEL_EMBED and ENABLE_BEDROCK=1 to actually call.
+    Identical (normalized) chunk text is served from app.embedding_cache without calling Bedrock.
     """
     if not ENABLE_BEDROCK:
         print("Bedrock disabled; create_embedding returning None")
         return None
+    from app.embedding_cache import cached_embedding, get_cache
+    model_id = model or BEDROCK_MODEL_EMBED
+    cache_status = "miss" if get_cache() is not None else None
+    called = []
+
+    def compute():
+        called.append(True)
+        return _invoke_embedding(model_id, text, cache_status)
+
+    vector = cached_embedding(model_id, text, compute)
+    if not called:
+        bedrock_usage.record_cache_hit(model_id, "embed")
+    return vector
+
+def _invoke_embedding(model_id: str, text: str, cache_status: str = None):
     payload = {"input": text}
-    res = invoke_model(BEDROCK_MODEL_EMBED, payload)
+    res = invoke_model(model_id, payload, kind="embed", cache_status=cache_status)
     if isinstance(res, dict):
         # common shapes: {"embedding": [...] } or {"embeddings":[...]}
         if "embedding" in res:
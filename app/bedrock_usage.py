@@ -0,0 +1,209 @@
+# app/bedrock_usage.py
+"""
+Per-call Bedrock accounting.
+
+bedrock_client.invoke_model records every attempt (and create_embedding /
+the summary cache record every cache hit) as one entry:
+
+    model_id, kind (text/embed), stage, attempt (0 = first try),
+    prompt_bytes, input_tokens, output_tokens, tokens ("returned" from the
+    response headers/body, else "estimated" at ~4 characters per token of
+    the prompt and of the generated text),
+    seconds, cache (hit/miss/None), ok
+
+Entries are attributed to the current stage (`with bedrock_usage.stage("extract")`)
+and collected into the current claim's ledger (`with bedrock_usage.claim() as ledger`),
+both carried in contextvars; pools that run Bedrock calls on other threads wrap
+their callables with bind(). Every entry also feeds bedrock.* counters and
+latency timings in GET /metrics, per stage and per model.
+
+BEDROCK_PRICES ("<model id>=<usd per 1k input>:<usd per 1k output>,...") adds
+an estimated cost to the summaries.
+"""
+
+import contextvars
+import os
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+from app.metrics import metrics
+
+CHARS_PER_TOKEN = 4
+
+
+def _parse_prices(spec: str) -> dict:
+    prices = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        model_id, _, rates = item.strip().rpartition("=")
+        try:
+            rate_in, rate_out = (float(r) for r in rates.split(":"))
+        except ValueError:
+            continue
+        prices[model_id] = (rate_in, rate_out)
+    return prices
+
+
+BEDROCK_PRICES = _parse_prices(os.environ.get("BEDROCK_PRICES", ""))
+
+_ledger = contextvars.ContextVar("bedrock_usage_ledger", default=None)
+_stage = contextvars.ContextVar("bedrock_usage_stage", default=None)
+_attempt = contextvars.ContextVar("bedrock_usage_attempt", default=0)
+
+
+def estimate_tokens(text) -> int:
+    return -(-len(text or "") // CHARS_PER_TOKEN)
+
+
+def returned_tokens(response: dict, body) -> tuple:
+    """(input, output) token counts reported by Bedrock, None where absent."""
+    headers = (response.get("ResponseMetadata") or {}).get("HTTPHeaders") or {}
+    tin, tout = headers.get("x-amzn-bedrock-input-token-count"), headers.get("x-amzn-bedrock-output-token-count")
+    if isinstance(body, dict):
+        usage = body.get("usage") or {}
+        tin = tin or usage.get("input_tokens") or body.get("inputTextTokenCount") or body.get("prompt_token_count")
+        results = body.get("results") or [{}]
+        tout = (tout or usage.get("output_tokens") or body.get("generation_token_count")
+                or (results[0].get("tokenCount") if isinstance(results[0], dict) else None))
+    return (int(tin) if tin is not None else None), (int(tout) if tout is not None else None)
+
+
+def completion_text(body) -> str:
+    """The generated text of a response body (for estimating output tokens), "" if none is found."""
+    if isinstance(body, str):
+        return body
+    if not isinstance(body, dict):
+        return ""
+    for field in ("outputText", "completion", "generation", "generated_text", "text"):
+        if isinstance(body.get(field), str):
+            return body[field]
+    results = body.get("results") or body.get("content") or [{}]
+    first = results[0] if isinstance(results[0], dict) else {}
+    return first.get("outputText") or first.get("text") or ""
+
+
+def cost(model_id: str, input_tokens: int, output_tokens: int) -> Optional[float]:
+    rates = BEDROCK_PRICES.get(model_id)
+    if rates is None:
+        return None
+    return input_tokens / 1000 * rates[0] + output_tokens / 1000 * rates[1]
+
+
+class Ledger:
+    """Entries of one claim; summary() aggregates them per stage and per model."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.entries = []
+
+    def add(self, entry: dict):
+        with self._lock:
+            self.entries.append(entry)
+
+    def summary(self) -> dict:
+        with self._lock:
+            entries = list(self.entries)
+        return {
+            "total": _aggregate(entries),
+            "stages": {s: _aggregate([e for e in entries if e["stage"] == s])
+                       for s in sorted({e["stage"] for e in entries})},
+            "models": {m: _aggregate([e for e in entries if e["model_id"] == m])
+                       for m in sorted({e["model_id"] for e in entries})},
+        }
+
+
+def _aggregate(entries: list) -> dict:
+    called = [e for e in entries if e["cache"] != "hit"]
+    billed = [e for e in called if e["ok"]]   # failed attempts send bytes but are not counted as tokens
+    out = {
+        "calls": sum(1 for e in called if e["attempt"] == 0),
+        "retries": sum(1 for e in called if e["attempt"] > 0),
+        "errors": sum(1 for e in called if not e["ok"]),
+        "cache_hits": len(entries) - len(called),
+        "prompt_bytes": sum(e["prompt_bytes"] for e in called),
+        "input_tokens": sum(e["input_tokens"] for e in billed),
+        "output_tokens": sum(e["output_tokens"] for e in billed),
+        "estimated_tokens": any(e["tokens"] == "estimated" for e in billed),
+        "seconds": round(sum(e["seconds"] for e in called), 4),
+    }
+    costs = [cost(e["model_id"], e["input_tokens"], e["output_tokens"]) for e in billed]
+    if billed and all(c is not None for c in costs):
+        out["cost_usd"] = round(sum(costs), 6)
+    return out
+
+
+def record(model_id: str, kind: str, prompt_bytes: int = 0, input_tokens: int = 0, output_tokens: int = 0,
+           tokens: str = "estimated", seconds: float = 0.0, cache: Optional[str] = None, ok: bool = True):
+    stage_name = _stage.get() or kind
+    entry = {
+        "model_id": model_id, "kind": kind, "stage": stage_name, "attempt": _attempt.get(),
+        "prompt_bytes": prompt_bytes, "input_tokens": input_tokens, "output_tokens": output_tokens,
+        "tokens": tokens, "seconds": seconds, "cache": cache, "ok": ok,
+    }
+    ledger = _ledger.get()
+    if ledger is not None:
+        ledger.add(entry)
+
+    for scope in (f"bedrock.stage.{stage_name}", f"bedrock.model.{model_id}"):
+        if cache == "hit":
+            metrics.incr(f"{scope}.cache_hits")
+            continue
+        metrics.incr(f"{scope}.retries" if entry["attempt"] else f"{scope}.calls")
+        if not ok:
+            metrics.incr(f"{scope}.errors")
+        metrics.incr(f"{scope}.prompt_bytes", prompt_bytes)
+        if ok:
+            metrics.incr(f"{scope}.input_tokens", input_tokens)
+            metrics.incr(f"{scope}.output_tokens", output_tokens)
+        metrics.observe(f"{scope}.seconds", seconds)
+    return entry
+
+
+def record_cache_hit(model_id: str, kind: str):
+    return record(model_id, kind, tokens="none", cache="hit")
+
+
+@contextmanager
+def claim():
+    """Collect the Bedrock usage of everything run inside the block (this thread/task and bind()ed pools)."""
+    ledger = Ledger()
+    token = _ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _ledger.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    token = _stage.set(name)
+    try:
+        yield
+    finally:
+        _stage.reset(token)
+
+
+@contextmanager
+def attempt(n: int):
+    token = _attempt.set(n)
+    try:
+        yield
+    finally:
+        _attempt.reset(token)
+
+
+def current_summary() -> Optional[dict]:
+    """Summary of the current claim's ledger, or None outside claim()."""
+    ledger = _ledger.get()
+    return ledger.summary() if ledger is not None else None
+
+
+def bind(fn):
+    """fn wrapped to run with the caller's ledger and stage (for ThreadPoolExecutor work)."""
+    ctx = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return ctx.copy().run(fn, *args, **kwargs)
+    return run
@@ -0,0 +1,206 @@
+# app/block_store.py
+"""
+Compact store for Textract LINE blocks.
+
+Textract returns one dict per block (with geometry, polygon, ids and
+relationships), 1000 blocks per response page. BlockStore keeps only what the
+extractors use, as parallel NumPy arrays:
+
+    page, left, top, width, height, confidence   (int32 / float32)
+    start, end                                   offsets into one text buffer
+
+The text buffer is the LINE texts joined with "\\n" in page order, i.e. exactly
+the string extract_text_from_blocks used to build, so offsets line up with the
+processed text and app.chunker offsets.
+
+Indexes: rows are sorted by page (page_range is a binary search) and each page
+keeps its rows ordered by vertical centre, so spatial questions such as
+"the value to the right of 'Policy Number' on page 2" look at one row band of
+one page instead of rescanning every block.
+"""
+
+import re
+from typing import Iterable, Optional
+
+import numpy as np
+
+
+class Block:
+    """Read-only view of one stored line."""
+    __slots__ = ("index", "page", "text", "left", "top", "width", "height", "confidence")
+
+    def __init__(self, index, page, text, left, top, width, height, confidence):
+        self.index = index
+        self.page = page
+        self.text = text
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.confidence = confidence
+
+    def __repr__(self):
+        return f"Block(page={self.page}, text={self.text!r}, left={self.left:.3f}, top={self.top:.3f})"
+
+
+class BlockStoreBuilder:
+    """Accumulates LINE blocks one Textract response page at a time; the dicts are not retained."""
+
+    def __init__(self):
+        self._page, self._text, self._geom, self._conf = [], [], [], []
+
+    def add(self, blocks: Iterable[dict]):
+        for b in blocks or []:
+            if b.get("BlockType") != "LINE" or "Text" not in b:
+                continue
+            box = (b.get("Geometry") or {}).get("BoundingBox") or {}
+            self._page.append(b.get("Page", 1))
+            self._text.append(b["Text"])
+            self._geom.append((box.get("Left", 0.0), box.get("Top", 0.0), box.get("Width", 0.0), box.get("Height", 0.0)))
+            self._conf.append(b.get("Confidence", 100.0))
+        return self
+
+    def build(self) -> "BlockStore":
+        n = len(self._text)
+        page = np.asarray(self._page, dtype=np.int32)
+        order = np.argsort(page, kind="stable")
+        geom = np.asarray(self._geom, dtype=np.float32).reshape(n, 4)[order]
+        texts = [self._text[i] for i in order]
+
+        # "\n" between lines and between pages, like the old extract_text_from_blocks
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=n)
+        start = np.zeros(n, dtype=np.int64)
+        if n:
+            start[1:] = np.cumsum(lengths + 1)[:-1]
+        store = BlockStore(
+            text="\n".join(texts),
+            page=page[order],
+            start=start.astype(np.int32),
+            end=(start + lengths).astype(np.int32),
+            geometry=geom,
+            confidence=np.asarray(self._conf, dtype=np.float32)[order],
+        )
+        self.__init__()
+        return store
+
+
+class BlockStore:
+    def __init__(self, text: str, page, start, end, geometry, confidence):
+        self.text = text
+        self.page = page
+        self.start = start
+        self.end = end
+        self.left, self.top, self.width, self.height = (np.ascontiguousarray(geometry[:, i]) for i in range(4))
+        self.confidence = confidence
+        self._page_numbers = np.unique(page)
+        self._rows = {}   # page -> (row indices sorted by centre y, sorted centre y)
+
+    @classmethod
+    def from_blocks(cls, blocks: Iterable[dict]) -> "BlockStore":
+        return BlockStoreBuilder().add(blocks).build()
+
+    @classmethod
+    def from_response(cls, res: dict) -> "BlockStore":
+        return cls.from_blocks(res.get("Blocks", []) or [])
+
+    def __len__(self) -> int:
+        return len(self.page)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.page, self.start, self.end, self.left, self.top, self.width, self.height, self.confidence)
+        return sum(a.nbytes for a in arrays) + len(self.text.encode("utf-8"))
+
+    # ---------- page index ----------
+
+    @property
+    def page_numbers(self) -> list:
+        return [int(p) for p in self._page_numbers]
+
+    def page_range(self, page: int) -> tuple:
+        """Row slice [lo, hi) holding the lines of one page."""
+        return (int(np.searchsorted(self.page, page, "left")), int(np.searchsorted(self.page, page, "right")))
+
+    def line_text(self, i: int) -> str:
+        return self.text[self.start[i]:self.end[i]]
+
+    def block(self, i: int) -> Block:
+        return Block(int(i), int(self.page[i]), self.line_text(i), float(self.left[i]), float(self.top[i]),
+                     float(self.width[i]), float(self.height[i]), float(self.confidence[i]))
+
+    def pages(self) -> list:
+        """[(page_number, page_text), ...] in page order (same as extract_pages_from_blocks)."""
+        out = []
+        for p in self._page_numbers:
+            lo, hi = self.page_range(p)
+            out.append((int(p), self.text[self.start[lo]:self.end[hi - 1]]))
+        return out
+
+    def find(self, pattern, page: Optional[int] = None, flags: int = re.IGNORECASE) -> list:
+        """Rows whose text matches `pattern`; one regex pass over the page's slice of the text buffer."""
+        rx = re.compile(pattern, flags) if isinstance(pattern, str) else pattern
+        if page is None:
+            lo, hi = 0, len(self)
+        else:
+            lo, hi = self.page_range(page)
+        if lo >= hi:
+            return []
+        rows = []
+        for m in rx.finditer(self.text, int(self.start[lo]), int(self.end[hi - 1])):
+            i = int(np.searchsorted(self.start, m.start(), "right")) - 1
+            if m.start() < self.end[i] and (not rows or rows[-1] != i):
+                rows.append(i)
+        return rows
+
+    # ---------- spatial index ----------
+
+    def _page_rows(self, page: int) -> tuple:
+        rows = self._rows.get(page)
+        if rows is None:
+            lo, hi = self.page_range(page)
+            cy = self.top[lo:hi] + self.height[lo:hi] / 2
+            order = np.argsort(cy, kind="stable")
+            rows = self._rows[page] = (order + lo, cy[order])
+        return rows
+
+    def same_row(self, i: int, tolerance: float = 0.5) -> np.ndarray:
+        """Rows on i's page whose vertical centre is within tolerance x i's height of i's centre."""
+        idx, cy_sorted = self._page_rows(int(self.page[i]))
+        cy = self.top[i] + self.height[i] / 2
+        band = max(float(self.height[i]) * tolerance, 1e-4)
+        lo, hi = np.searchsorted(cy_sorted, cy - band, "left"), np.searchsorted(cy_sorted, cy + band, "right")
+        return idx[lo:hi]
+
+    def right_of(self, i: int, tolerance: float = 0.5) -> list:
+        """Rows in i's row band that start right of i, nearest first."""
+        cand = self.same_row(i, tolerance)
+        right_edge = self.left[i] + self.width[i]
+        cand = cand[(cand != i) & (self.left[cand] >= right_edge - self.height[i])]
+        return [int(j) for j in cand[np.argsort(self.left[cand], kind="stable")]]
+
+    def below(self, i: int, max_gap: float = 0.05) -> list:
+        """Rows starting under i (within max_gap page heights) that overlap it horizontally, nearest first."""
+        idx, cy_sorted = self._page_rows(int(self.page[i]))
+        bottom = self.top[i] + self.height[i]
+        lo, hi = np.searchsorted(cy_sorted, bottom, "left"), np.searchsorted(cy_sorted, bottom + max_gap, "right")
+        cand = idx[lo:hi]
+        overlap = (self.left[cand] < self.left[i] + self.width[i]) & (self.left[cand] + self.width[cand] > self.left[i])
+        cand = cand[overlap & (cand != i)]
+        return [int(j) for j in cand[np.argsort(self.top[cand], kind="stable")]]
+
+    def value_right_of(self, label, page: Optional[int] = None, tolerance: float = 0.5) -> Optional[str]:
+        """
+        Value for a form label: the text after the label on its own line ("Policy No: PL-1"),
+        else the nearest line to its right in the same row band, else None.
+        """
+        rx = re.compile(label, re.IGNORECASE) if isinstance(label, str) else label
+        for i in self.find(rx, page):
+            line = self.line_text(i)
+            m = rx.search(line)
+            rest = line[m.end():].strip(" \t:-#") if m else ""
+            if rest:
+                return rest
+            right = self.right_of(i, tolerance)
+            if right:
+                return self.line_text(right[0]).strip(" \t:-")
+        return None
@@ -0,0 +1,208 @@
+# app/bundle.py
+"""
+Claim bundles: one claim made of several documents (claim form, estimates,
+invoices, photos) processed concurrently and merged into one result.
+
+- classify_document: form / invoice / estimate / photo / other, from the file
+  name or, failing that, keywords in the extracted text
+- merge_documents:   per field, the value from the highest-precedence source
+  (DOC_TYPE_PRECEDENCE, overridable per field); disagreeing values from other
+  documents are reported as conflicts instead of being silently dropped
+- bundle_summary:    one consolidated summary for the whole claim
+
+The routes (Flask /bundles, ASGI /bundles) run the documents and call
+build_bundle_response with the per-document /process results.
+"""
+
+import os
+import re
+from typing import Optional
+
+from app.validator import validate_extraction
+
+BUNDLE_MAX_DOCUMENTS = int(os.environ.get("BUNDLE_MAX_DOCUMENTS", "20"))
+
+DOC_TYPES = ("form", "invoice", "estimate", "photo", "other")
+# highest precedence first
+DOC_TYPE_PRECEDENCE = ("form", "invoice", "estimate", "other", "photo")
+# per-field overrides of DOC_TYPE_PRECEDENCE, e.g. {"amount_claimed": ("invoice", "form", ...)}
+FIELD_PRECEDENCE = {}
+MERGE_FIELDS = ("policy_number", "claimant_name", "date_of_loss", "amount_claimed", "claim_description")
+# free text: taken by precedence, never reported as a conflict
+NO_CONFLICT_FIELDS = ("claim_description",)
+
+_NAME_KEYWORDS = (
+    ("invoice", re.compile(r"invoice|bill|receipt", re.I)),
+    ("estimate", re.compile(r"estimate|quot(e|ation)", re.I)),
+    ("photo", re.compile(r"photo|image|img|\.(jpe?g|png|heic|tiff?)$", re.I)),
+    ("form", re.compile(r"claim[-_ ]?form|\bform\b|application", re.I)),
+)
+_TEXT_KEYWORDS = (
+    ("invoice", re.compile(r"\b(tax\s+)?invoice\b|invoice\s+(no|number)", re.I)),
+    ("estimate", re.compile(r"\bestimate\b|\bquotation\b", re.I)),
+    ("form", re.compile(r"claim\s+form|policy\s*(number|no)|date\s+of\s+loss", re.I)),
+)
+
+_AMOUNT_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def normalize_documents(body: dict) -> list:
+    """
+    Accepts {"s3_keys": [...]} or {"documents": [{"s3_key": ..., "type": ...}, ...]}.
+    Returns [{"s3_key", "type"}] (type None = classify); raises ValueError on bad input.
+    """
+    docs = body.get("documents")
+    if docs is None:
+        docs = [{"s3_key": k} for k in body.get("s3_keys") or []]
+    if not isinstance(docs, list) or not docs:
+        raise ValueError("s3_keys or documents required")
+    if len(docs) > BUNDLE_MAX_DOCUMENTS:
+        raise ValueError(f"at most {BUNDLE_MAX_DOCUMENTS} documents per bundle")
+    out, seen = [], set()
+    for d in docs:
+        d = {"s3_key": d} if isinstance(d, str) else d
+        key = d.get("s3_key") if isinstance(d, dict) else None
+        if not key:
+            raise ValueError("every document needs an s3_key")
+        if key in seen:
+            continue
+        seen.add(key)
+        doc_type = d.get("type")
+        out.append({"s3_key": key, "type": doc_type if doc_type in DOC_TYPES else None})
+    return out
+
+
+def classify_document(s3_key: str, text: Optional[str] = None) -> str:
+    """Type from the file name, else from keywords in `text`; a document with no text is a photo."""
+    name = s3_key.rsplit("/", 1)[-1]
+    for doc_type, rx in _NAME_KEYWORDS:
+        if rx.search(name):
+            return doc_type
+    if text is None:
+        return "other"
+    if not text.strip():
+        return "photo"
+    for doc_type, rx in _TEXT_KEYWORDS:
+        if rx.search(text):
+            return doc_type
+    return "other"
+
+
+def document_fields(result: dict) -> dict:
+    """
+    Local extraction, with gaps filled from the LLM extraction when it returned fields;
+    fields the confidence gate flagged as invalid take the LLM value when there is one.
+    """
+    local = ((result.get("local") or {}).get("extraction")) or {}
+    llm = ((result.get("llm") or {}).get("extraction")) or {}
+    flagged = set((((result.get("llm") or {}).get("gate")) or {}).get("fields") or ())
+    if not isinstance(local, dict):
+        local = {}
+    if not isinstance(llm, dict) or "error" in llm or "note" in llm or "raw" in llm:
+        llm = {}
+    out = {}
+    for f in MERGE_FIELDS:
+        prefer_llm = f in flagged and llm.get(f) not in (None, "")
+        out[f] = llm.get(f) if prefer_llm or local.get(f) in (None, "") else local.get(f)
+    return out
+
+
+def _comparable(field: str, value) -> str:
+    s = str(value)
+    if field == "amount_claimed":
+        # the number only: "Rs. 45,000" and "INR 45000.00" are the same amount
+        m = _AMOUNT_RE.search(s)
+        if m:
+            return f"{float(m.group(0).replace(',', '')):.2f}"
+    return re.sub(r"[^0-9a-z]", "", s.casefold())
+
+
+def merge_documents(docs: list) -> dict:
+    """
+    docs: [{"s3_key", "type", "fields"}] for the documents that processed.
+    Returns {"fields", "sources", "conflicts"}.
+    """
+    fields, sources, conflicts = {}, {}, []
+    for field in MERGE_FIELDS:
+        order = FIELD_PRECEDENCE.get(field, DOC_TYPE_PRECEDENCE)
+        # stable: equal types keep request order
+        ranked = sorted((d for d in docs if d["fields"].get(field) not in (None, "")),
+                        key=lambda d: order.index(d["type"]) if d["type"] in order else len(order))
+        if not ranked:
+            fields[field] = None
+            continue
+        chosen = ranked[0]
+        fields[field] = chosen["fields"][field]
+        sources[field] = chosen["s3_key"]
+        if field in NO_CONFLICT_FIELDS:
+            continue
+        chosen_cmp = _comparable(field, fields[field])
+        others = [{"s3_key": d["s3_key"], "type": d["type"], "value": d["fields"][field]}
+                  for d in ranked[1:] if _comparable(field, d["fields"][field]) != chosen_cmp]
+        if others:
+            conflicts.append({
+                "field": field,
+                "chosen": {"s3_key": chosen["s3_key"], "type": chosen["type"], "value": fields[field]},
+                "alternatives": others,
+            })
+    return {"fields": fields, "sources": sources, "conflicts": conflicts}
+
+
+def bundle_summary(docs: list, merged: dict, failed: list) -> str:
+    f = merged["fields"]
+    types = ", ".join(d["type"] for d in docs) or "none"
+    lines = [f"Claim bundle of {len(docs) + len(failed)} documents ({types}"
+             + (f"; {len(failed)} failed" if failed else "") + ")."]
+    facts = [f"{label} {f[name]}" for name, label in (
+        ("policy_number", "policy"), ("claimant_name", "claimant"),
+        ("date_of_loss", "date of loss"), ("amount_claimed", "amount claimed")) if f.get(name)]
+    if facts:
+        lines.append("Merged fields: " + ", ".join(facts) + ".")
+    for c in merged["conflicts"]:
+        alts = "; ".join(f"{a['type']}: {a['value']}" for a in c["alternatives"])
+        lines.append(f"Conflict on {c['field']}: using {c['chosen']['type']} ({c['chosen']['value']}), also {alts}.")
+    for d in docs:
+        if d.get("summary"):
+            lines.append(f"- {d['s3_key'].rsplit('/', 1)[-1]} ({d['type']}): {d['summary']}")
+    return "\n".join(lines)
+
+
+def build_bundle_response(documents: list, outcomes: list, elapsed: float) -> dict:
+    """
+    documents: normalize_documents() output; outcomes: per document, either
+    ("ok", /process response) or ("error", message), in the same order.
+    """
+    processed, failed, listing = [], [], []
+    for doc, (status, value) in zip(documents, outcomes):
+        if status != "ok":
+            failed.append(doc["s3_key"])
+            listing.append({"s3_key": doc["s3_key"], "type": doc["type"], "status": "error", "error": value})
+            continue
+        fields = document_fields(value)
+        summary = (value.get("local") or {}).get("summary") or ""
+        entry = {
+            "s3_key": doc["s3_key"],
+            # the description chunk and extractive summary stand in for the full text
+            "type": doc["type"] or classify_document(doc["s3_key"], f"{fields.get('claim_description') or ''}\n{summary}"),
+            "fields": fields,
+            "summary": summary,
+        }
+        processed.append(entry)
+        listing.append({
+            "s3_key": entry["s3_key"], "type": entry["type"], "status": "ok",
+            "s3_processed_key": value.get("s3_processed_key"),
+            "fields": {k: v for k, v in entry["fields"].items() if k not in NO_CONFLICT_FIELDS},
+            "validation": value.get("validation"),
+            "duplicates": value.get("duplicates"),
+        })
+    merged = merge_documents(processed)
+    return {
+        "bundle": {"documents": len(documents), "processed": len(processed), "failed": len(failed),
+                   "elapsed_ms": round(elapsed * 1000, 1)},
+        "fields": merged["fields"],
+        "sources": merged["sources"],
+        "conflicts": merged["conflicts"],
+        "validation": validate_extraction(merged["fields"]),
+        "summary": bundle_summary(processed, merged, failed),
+        "documents": listing,
+    }
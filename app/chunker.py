@@ -0,0 +1,108 @@
+# app/chunker.py
+"""
+Page- and sentence-aware streaming chunker.
+
+Chunks never cross a page boundary and are cut at line breaks where possible,
+then at sentence ends, then at whitespace; a word is only split if it is longer
+than a whole chunk. Consecutive chunks on a page share up to `overlap`
+characters of trailing lines/sentences.
+
+Each chunk is a dict:
+    {"index": 0, "text": "...", "page": 1, "start": 0, "end": 742}
+where start/end are character offsets into the full document text
+(pages joined with "\\n", matching extract_text_from_blocks).
+"""
+
+import os
+import re
+from typing import Iterable, Iterator, Optional, Tuple
+
+CHUNK_SIZE = int(os.environ.get("CHUNK_SIZE", "1000"))
+CHUNK_OVERLAP = int(os.environ.get("CHUNK_OVERLAP", "150"))
+
+_LINE_RE = re.compile(r"[^\n]+")
+_SENTENCE_RE = re.compile(r".+?(?:[.!?]+(?=\s)|$)")
+_WORD_RE = re.compile(r"\S+")
+
+
+def _split_long(text: str, start: int, end: int, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """Split text[start:end] into spans <= chunk_size at sentence, then word boundaries."""
+    for pattern in (_SENTENCE_RE, _WORD_RE):
+        spans = []
+        for m in pattern.finditer(text, start, end):
+            s, e = m.start(), m.end()
+            while s < e and text[s].isspace():
+                s += 1
+            if s < e:
+                spans.append((s, e))
+        if len(spans) > 1 or (spans and spans[0][1] - spans[0][0] <= chunk_size):
+            break
+    for s, e in spans:
+        if e - s <= chunk_size:
+            yield s, e
+        elif pattern is _SENTENCE_RE:
+            yield from _split_long(text, s, e, chunk_size)
+        else:
+            # a single "word" longer than a chunk: hard split
+            for i in range(s, e, chunk_size):
+                yield i, min(i + chunk_size, e)
+
+
+def _segments(text: str, start: int, end: int, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) spans of lines in text[start:end], splitting lines longer than chunk_size."""
+    for m in _LINE_RE.finditer(text, start, end):
+        s, e = m.start(), m.end()
+        if not text[s:e].strip():
+            continue
+        if e - s <= chunk_size:
+            yield s, e
+        else:
+            yield from _split_long(text, s, e, chunk_size)
+
+
+def _pack(segments: Iterable[Tuple[int, int]], chunk_size: int, overlap: int) -> Iterator[Tuple[int, int]]:
+    """Greedily pack segments into (start, end) chunk spans with trailing-segment overlap."""
+    current = []
+    for seg in segments:
+        if current and seg[1] - current[0][0] > chunk_size:
+            yield current[0][0], current[-1][1]
+            last_end = current[-1][1]
+            keep = len(current)
+            while keep > 0 and last_end - current[keep - 1][0] <= overlap:
+                keep -= 1
+            # never carry the whole previous chunk forward
+            current = current[max(keep, 1):]
+            while current and seg[1] - current[0][0] > chunk_size:
+                current.pop(0)
+        current.append(seg)
+    if current:
+        yield current[0][0], current[-1][1]
+
+
+def iter_page_chunks(pages: Iterable[Tuple[int, str]], chunk_size: int = CHUNK_SIZE,
+                     overlap: int = CHUNK_OVERLAP) -> Iterator[dict]:
+    """
+    Stream chunks from (page_number, page_text) pairs. Offsets are into
+    "\\n".join(page_text for each page).
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    overlap = max(0, min(overlap, chunk_size // 2))
+    index = 0
+    base = 0
+    for page, page_text in pages:
+        for s, e in _pack(_segments(page_text, 0, len(page_text), chunk_size), chunk_size, overlap):
+            yield {"index": index, "text": page_text[s:e], "page": page, "start": base + s, "end": base + e}
+            index += 1
+        base += len(page_text) + 1
+
+
+def iter_chunks(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP,
+                page: Optional[int] = 1) -> Iterator[dict]:
+    """Stream chunks from a single text (treated as one page)."""
+    return iter_page_chunks([(page, text)], chunk_size=chunk_size, overlap=overlap)
+
+
+def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> list:
+    """List of chunk strings (for callers that only need the text, e.g. LocalRetriever)."""
+    return [c["text"] for c in iter_chunks(text, chunk_size=chunk_size, overlap=overlap)]
@@ -0,0 +1,158 @@
+# app/date_parser.py
+"""
+Shared date normalization for the Textract worker and local extraction.
+
+Instead of trying ten strptime formats in turn (each failure raising and
+catching an exception), the raw string is dispatched by regex shape straight
+to the matching layout and built with datetime.date(). Results are memoized
+in an LRU keyed by the raw string.
+
+Numeric dates like 05/06/2025 are ambiguous. The default is day-first (what
+the old "%d/%m/%Y" format did); a normalizer also counts unambiguous evidence
+(a first field > 12 means day-first, a second field > 12 means month-first)
+per source/document and uses the dominant order for ambiguous values. Only
+calls that pass a source learn; source=None always uses the default.
+
+Fallbacks when no shape matches:
+- "year"  -> return the first 20xx year in the string (old worker behaviour)
+- "fuzzy" -> dateutil fuzzy parse, year validated to 1900-2100 (old local_extract behaviour)
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from datetime import date
+from functools import lru_cache
+from typing import Iterable, Optional
+
+MEMO_SIZE = 8192
+MAX_SOURCES = 1024
+
+_MONTHS = {}
+for _i, _name in enumerate(["january", "february", "march", "april", "may", "june", "july",
+                            "august", "september", "october", "november", "december"], 1):
+    _MONTHS[_name] = _i
+    _MONTHS[_name[:3]] = _i
+_MONTHS["sept"] = 9
+
+_ORDINAL_RE = re.compile(r"(\d)(st|nd|rd|th)", re.IGNORECASE)
+_YMD_RE = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})$")
+_NUMERIC_RE = re.compile(r"^(\d{1,2})([-/.])(\d{1,2})\2(\d{4})$")
+_DAY_MONTH_RE = re.compile(r"^(\d{1,2})\s+([A-Za-z]+)\.?,?\s+(\d{4})$")
+_MONTH_DAY_RE = re.compile(r"^([A-Za-z]+)\.?\s+(\d{1,2}),?\s+(\d{4})$")
+_ISO_SEARCH_RE = re.compile(r"\b(20\d{2})[-/](0[1-9]|1[0-2])[-/](0[1-9]|[12]\d|3[01])\b")
+_YEAR_RE = re.compile(r"(20\d{2})")
+
+
+def _iso(y, m, d) -> Optional[str]:
+    try:
+        return date(int(y), int(m), int(d)).isoformat()
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _parse_shape(s: str, dayfirst: bool) -> Optional[str]:
+    """Parse a cleaned string by shape. Returns 'YYYY-MM-DD' or None."""
+    m = _YMD_RE.match(s)
+    if m:
+        return _iso(m.group(1), m.group(2), m.group(3))
+    m = _NUMERIC_RE.match(s)
+    if m:
+        a, b, y = m.group(1), m.group(3), m.group(4)
+        # the preferred order first; the other one only if that is not a valid date
+        return (_iso(y, b, a) or _iso(y, a, b)) if dayfirst else (_iso(y, a, b) or _iso(y, b, a))
+    m = _DAY_MONTH_RE.match(s)
+    if m and m.group(2).lower() in _MONTHS:
+        return _iso(m.group(3), _MONTHS[m.group(2).lower()], m.group(1))
+    m = _MONTH_DAY_RE.match(s)
+    if m and m.group(1).lower() in _MONTHS:
+        return _iso(m.group(3), _MONTHS[m.group(1).lower()], m.group(2))
+    m = _ISO_SEARCH_RE.search(s)
+    if m:
+        return f"{m.group(1)}-{m.group(2)}-{m.group(3)}"
+    return None
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _fuzzy(s: str, dayfirst: bool) -> Optional[str]:
+    from dateutil.parser import parse
+    try:
+        dt = parse(s, dayfirst=dayfirst, fuzzy=True).date()
+        if 1900 <= dt.year <= 2100:
+            return dt.isoformat()
+    except Exception:
+        pass
+    return None
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _clean(raw: str) -> str:
+    return _ORDINAL_RE.sub(r"\1", raw.strip())
+
+
+class DateNormalizer:
+    def __init__(self, fallback: str = "fuzzy", max_sources: int = MAX_SOURCES):
+        if fallback not in ("fuzzy", "year", None):
+            raise ValueError(f"unknown fallback: {fallback}")
+        self.fallback = fallback
+        self.max_sources = max_sources
+        # source -> [day_first_votes, month_first_votes]; shared by request and pool threads
+        self._votes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _vote(self, s: str, source):
+        if source is None:
+            return
+        m = _NUMERIC_RE.match(s)
+        if not m:
+            return
+        a, b = int(m.group(1)), int(m.group(3))
+        if a > 12 >= b:
+            idx = 0
+        elif b > 12 >= a:
+            idx = 1
+        else:
+            return
+        with self._lock:
+            votes = self._votes.get(source)
+            if votes is None:
+                votes = self._votes[source] = [0, 0]
+                if len(self._votes) > self.max_sources:
+                    self._votes.popitem(last=False)
+            else:
+                self._votes.move_to_end(source)
+            votes[idx] += 1
+
+    def dayfirst(self, source=None) -> bool:
+        """Dominant numeric order learned for source (day-first unless month-first has more evidence)."""
+        with self._lock:
+            votes = self._votes.get(source)
+            return not votes or votes[0] >= votes[1]
+
+    def learn(self, values: Iterable[str], source=None):
+        """Record order evidence from many raw values (e.g. all date-like tokens of a document)."""
+        for raw in values:
+            if raw:
+                self._vote(_clean(raw), source)
+
+    def normalize(self, raw: Optional[str], source=None) -> Optional[str]:
+        """Return 'YYYY-MM-DD' (or 'YYYY' with the year fallback) or None."""
+        if not raw:
+            return None
+        s = _clean(raw)
+        self._vote(s, source)
+        dayfirst = self.dayfirst(source)
+        parsed = _parse_shape(s, dayfirst)
+        if parsed or self.fallback is None:
+            return parsed
+        if self.fallback == "year":
+            m = _YEAR_RE.search(s)
+            return m.group(1) if m else None
+        # fuzzy parsing stays month-first (dateutil default) until the source shows otherwise
+        with self._lock:
+            learned = source in self._votes
+        return _fuzzy(s, dayfirst if learned else False)
+
+    def cache_info(self) -> dict:
+        return {"shape": _parse_shape.cache_info()._asdict(), "fuzzy": _fuzzy.cache_info()._asdict()}
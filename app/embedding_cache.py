@@ -0,0 +1,186 @@
+# app/embedding_cache.py
+"""
+Persistent cross-document embedding cache.
+
+Claim forms repeat a lot of boilerplate (headers, instructions, "please
+attach photos and estimates"), so the same chunk text is embedded again and
+again. bedrock_client.create_embedding looks here before calling Bedrock:
+
+    key     sha256(model id, normalized chunk text)
+            normalization: NFKC, whitespace runs collapsed, trimmed
+    vector  float32 array (4 bytes per dimension); a miss returns the vector
+            rounded the same way, so results don't depend on cache state
+
+The cache is an SQLite file bounded by EMBED_CACHE_MAX_MB; every
+EVICT_CHECK_EVERY writes the least recently used entries are evicted down to
+EVICT_TO_FRACTION of the bound. Hits, misses and evictions are counted under
+embed_cache.* in GET /metrics, with the hit rate and size as a gauge.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from typing import Optional
+
+from app.metrics import metrics
+
+EMBED_CACHE_ENABLED = os.environ.get("EMBED_CACHE_ENABLED", "1") == "1"
+EMBED_CACHE_DB = os.environ.get("EMBED_CACHE_DB", "embedding_cache.db")
+EMBED_CACHE_MAX_MB = float(os.environ.get("EMBED_CACHE_MAX_MB", "512"))
+EVICT_CHECK_EVERY = 200
+EVICT_TO_FRACTION = 0.9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key        TEXT PRIMARY KEY,
+    model_id   TEXT NOT NULL,
+    vector     BLOB NOT NULL,
+    nbytes     INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used);
+"""
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    return _WS_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def cache_key(model_id: str, text: str) -> str:
+    return hashlib.sha256(f"{model_id}\0{normalize(text)}".encode("utf-8")).hexdigest()
+
+
+def _float32(vector) -> Optional[array]:
+    """The vector as stored (float32), or None if it is not a flat list of numbers."""
+    try:
+        return array("f", vector)
+    except TypeError:
+        return None
+
+
+class EmbeddingCache:
+    def __init__(self, path: str = EMBED_CACHE_DB, max_bytes: int = int(EMBED_CACHE_MAX_MB * 1024 * 1024)):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, model_id: str, text: str) -> Optional[list]:
+        key = cache_key(model_id, text)
+        row = self._conn().execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            metrics.incr("embed_cache.misses")
+            return None
+        with self._conn() as conn:
+            conn.execute("UPDATE embeddings SET last_used = ? WHERE key = ?", (time.time(), key))
+        metrics.incr("embed_cache.hits")
+        return array("f", row[0]).tolist()
+
+    def put(self, model_id: str, text: str, vector):
+        stored = _float32(vector)
+        if stored is None:
+            return   # not a flat list of numbers; leave it uncached
+        blob = stored.tobytes()
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, model_id, vector, nbytes, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_key(model_id, text), model_id, blob, len(blob), now, now))
+        with self._writes_lock:
+            self._writes += 1
+            check = self._writes % EVICT_CHECK_EVERY == 0
+        if check:
+            self.evict()
+
+    def size(self) -> tuple:
+        """(entries, vector bytes)."""
+        n, total = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM embeddings").fetchone()
+        return n, total
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the cache is under EVICT_TO_FRACTION of max_bytes."""
+        _, total = self.size()
+        if total <= self.max_bytes:
+            return 0
+        target = total - int(self.max_bytes * EVICT_TO_FRACTION)
+        freed = 0
+        with self._conn() as conn:
+            rows = conn.execute("SELECT key, nbytes FROM embeddings ORDER BY last_used").fetchall()
+            doomed = []
+            for key, nbytes in rows:
+                if freed >= target:
+                    break
+                doomed.append((key,))
+                freed += nbytes
+            conn.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
+            removed = len(doomed)
+        metrics.incr("embed_cache.evictions", removed)
+        return removed
+
+    def stats(self) -> dict:
+        entries, nbytes = self.size()
+        hits, misses = metrics.counter("embed_cache.hits"), metrics.counter("embed_cache.misses")
+        return {"entries": entries, "bytes": nbytes, "max_bytes": self.max_bytes,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[EmbeddingCache]:
+    """Process-wide cache (opened on first use); None if EMBED_CACHE_ENABLED=0."""
+    global _cache
+    if not EMBED_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache()
+                metrics.gauge("embed_cache", _cache.stats)
+    return _cache
+
+
+def cached_embedding(model_id: str, text: str, compute):
+    """Vector for `text` from the cache, else compute() (stored when it returns a vector)."""
+    cache = get_cache()
+    if cache is None:
+        return compute()
+    try:
+        vector = cache.get(model_id, text)
+    except sqlite3.Error as e:
+        print("embedding cache read failed:", e)
+        return compute()
+    if vector is not None:
+        return vector
+    vector = compute()
+    stored = _float32(vector) if vector is not None else None
+    if stored is None:
+        return vector
+    try:
+        cache.put(model_id, text, vector)
+    except sqlite3.Error as e:
+        print("embedding cache write failed:", e)
+    # what a later hit returns
+    return stored.tolist()
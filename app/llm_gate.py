@@ -0,0 +1,88 @@
+# app/llm_gate.py
+"""
+Confidence gate in front of the LLM extraction.
+
+The local (regex) extraction is validated first (app.validator). If its score
+reaches LLM_GATE_THRESHOLD and no field is missing, Bedrock is not called for
+extraction (nor, with LLM_GATE_SUMMARY=1, for the summary). Otherwise the LLM
+is asked only for the fields that are missing or that the validator flagged.
+
+Decisions are counted in app.metrics: llm_gate.skip / .partial / .full,
+llm_gate.fields_requested and the llm_gate.score distribution.
+"""
+
+import os
+
+from app.metrics import metrics
+from app.prompt_manager import EXTRACTION_FIELD_SPECS
+from app.validator import validate_extraction
+
+LLM_GATE_ENABLED = os.environ.get("LLM_GATE_ENABLED", "1") == "1"
+LLM_GATE_THRESHOLD = float(os.environ.get("LLM_GATE_THRESHOLD", "1.0"))
+LLM_GATE_SUMMARY = os.environ.get("LLM_GATE_SUMMARY", "1") == "1"
+
+LLM_FIELDS = tuple(EXTRACTION_FIELD_SPECS)
+ISSUE_FIELDS = {
+    "policy_number_missing_or_invalid": "policy_number",
+    "date_of_loss_missing": "date_of_loss",
+    "date_of_loss_unparseable": "date_of_loss",
+    "amount_missing": "amount_claimed",
+    "amount_non_positive": "amount_claimed",
+    "amount_unparseable": "amount_claimed",
+}
+
+SKIPPED_NOTE = "skipped: local extraction passed validation"
+
+
+def decide(local_extraction, validation, threshold: float = None) -> dict:
+    """
+    Returns {"decision": "skip" | "partial" | "full", "fields": [...], "score": s, "threshold": t}.
+    `fields` are the ones to request from the LLM (empty for "skip").
+    """
+    threshold = LLM_GATE_THRESHOLD if threshold is None else threshold
+    if not LLM_GATE_ENABLED or not isinstance(local_extraction, dict) or not validation:
+        gate = {"decision": "full", "fields": list(LLM_FIELDS), "score": None, "threshold": threshold}
+    else:
+        flagged = {ISSUE_FIELDS[i] for i in validation.get("issues", []) if i in ISSUE_FIELDS}
+        missing = {f for f in LLM_FIELDS if local_extraction.get(f) in (None, "")}
+        wanted = [f for f in LLM_FIELDS if f in flagged | missing]
+        score = validation.get("score", 0.0)
+        if score >= threshold and not missing:
+            decision = "skip"
+            wanted = []
+        else:
+            decision = "full" if len(wanted) == len(LLM_FIELDS) else "partial"
+        gate = {"decision": decision, "fields": wanted, "score": score, "threshold": threshold}
+
+    metrics.incr(f"llm_gate.{gate['decision']}")
+    metrics.incr("llm_gate.fields_requested", len(gate["fields"]))
+    if gate["score"] is not None:
+        metrics.observe("llm_gate.score", gate["score"])
+    return gate
+
+
+def skip_summary(gate: dict) -> bool:
+    return LLM_GATE_SUMMARY and gate["decision"] == "skip"
+
+
+def select(parsed: dict, gate: dict) -> dict:
+    """Keep only the requested fields of a parsed LLM extraction."""
+    if gate["decision"] == "full" or not isinstance(parsed, dict):
+        return parsed
+    return {f: parsed.get(f) for f in gate["fields"]}
+
+
+def acceptor(local_extraction, gate: dict):
+    """
+    Validation hook for ModelInvoker.generate_json: a reply is accepted when the
+    requested fields, merged over the local extraction, raise no validator issue.
+    """
+    base = local_extraction if isinstance(local_extraction, dict) else {}
+    wanted = set(gate["fields"])
+
+    def accept(parsed: dict) -> bool:
+        merged = dict(base, **{f: parsed.get(f) for f in wanted})
+        issues = validate_extraction(merged)["issues"]
+        return not any(ISSUE_FIELDS.get(i) in wanted for i in issues)
+
+    return accept
@@ -1,26 +1,55 @@
 # app/main.py
 import os
 import uuid
-import boto3
+import time
 import subprocess
+import tempfile
 import json
-import re
-from flask import Flask, request, jsonify, render_template_string
+import threading
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, request, jsonify, render_template_string, send_file
 
 # Should exist in your repo
-from app import bedrock_client
-from app.prompt_manager import PromptTemplateManager
-from app.model_invoker import ModelInvoker
+from app import artifacts, bedrock_client, bedrock_usage, llm_gate, pipeline_stages, profiling, responses, summarizer
+from app.prompt_manager import (PromptTemplateManager, SUMMARY_INSTRUCTION, extraction_instruction_for,
+                                extraction_schema_for)
+from app.model_invoker import ModelInvoker, try_parse_json_from_text
+from app.validator import validate_extraction
+from app.results_store import FIELDS, get_store, record_claim
+from app.singleflight import SingleFlight
+from app.bundle import normalize_documents, build_bundle_response
+from app.admission import AdmissionController, StageLimiter, Saturated
+from app.metrics import metrics
+from app.work_queue import get_queue
 
 # ENV
 CLAIM_BUCKET = os.environ.get("CLAIM_BUCKET", "claim-documents-poc-S")
 AWS_REGION = os.environ.get("AWS_REGION", "ap-south-1")
+TEXTRACT_IN_PROCESS = os.environ.get("TEXTRACT_IN_PROCESS", "1") == "1"
+# needs `python -m app.queue_worker` running; otherwise queued uploads are never processed
+AUTO_PROCESS_ON_UPLOAD = os.environ.get("AUTO_PROCESS_ON_UPLOAD", "0") == "1"
+BUNDLE_WORKERS = int(os.environ.get("BUNDLE_WORKERS", "16"))
 
-s3 = boto3.client("s3", region_name=AWS_REGION)
+_s3 = None
+
+def get_s3():
+    """S3 client, created on first use (or by warm_up before the server forks)."""
+    global _s3
+    if _s3 is None:
+        import boto3
+        _s3 = boto3.client("s3", region_name=AWS_REGION)
+    return _s3
 
 app = Flask(__name__, static_folder=None)
 ptm = PromptTemplateManager()
 invoker = ModelInvoker()
+# only successful results are kept for the retention window; failures are shared while in flight only
+inflight = SingleFlight(retain=lambda result: result[1] == 200)
+admission = AdmissionController()
+stages = StageLimiter()
+bundle_pool = ThreadPoolExecutor(max_workers=BUNDLE_WORKERS, thread_name_prefix="bundle")
+metrics.gauge("work_queue", lambda: get_queue().stats())
 
 # Simple UI HTML (keeps same look as your screenshot)
 INDEX_HTML = """
@@ -56,23 +85,24 @@ INDEX_HTML = """
 </div>
 
 <script>
+let uploadTask = null;   // {s3_key, task_id} of the last upload, when it was queued for processing
+
 document.getElementById('uploadForm').onsubmit = async function(e) {
   e.preventDefault();
   const form = e.target;
   const fd = new FormData(form);
   const res = await fetch('/upload', {method:'POST', body: fd});
   const j = await res.json();
-  document.getElementById('uploadResult').innerText = 'Uploaded: ' + j.s3_key;
+  document.getElementById('uploadResult').innerText = 'Uploaded: ' + j.s3_key + (j.task_id ? ' (queued for processing)' : '');
   document.getElementById('s3_key').value = j.s3_key;
+  uploadTask = j.task_id ? {s3_key: j.s3_key, task_id: j.task_id} : null;
 }
 
-document.getElementById('processForm').onsubmit = async function(e) {
-  e.preventDefault();
-  const s3key = document.getElementById('s3_key').value;
-  document.getElementById('summary_box').innerText = 'Processing...';
-  document.getElementById('extraction_box').innerText = '';
-  const res = await fetch('/process', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({s3_key: s3key})});
-  const j = await res.json();
+function showResult(j) {
+  if (j.error) {
+    document.getElementById('summary_box').innerText = 'Error: ' + j.error;
+    return;
+  }
   // populate UI with both local and llm results
   const localSummary = j.local && j.local.summary ? j.local.summary : '';
   const localExtract = j.local && j.local.extraction ? JSON.stringify(j.local.extraction, null, 2) : '';
@@ -83,6 +113,34 @@ document.getElementById('processForm').onsubmit = async function(e) {
   document.getElementById('summary_box').innerText = summaryText;
   document.getElementById('extraction_box').innerText = extractText;
 }
+
+// the queue worker processes the upload; wait for its task instead of processing it a second time
+const TASK_POLL_LIMIT = 300;   // x 2 s = 10 minutes
+async function waitForTask(taskId) {
+  for (let i = 0; i < TASK_POLL_LIMIT; i++) {
+    const res = await fetch('/tasks/' + taskId);
+    const t = await res.json();
+    if (t.status === 'done') return t.result || {};
+    if (t.status === 'dead' || res.status === 404) return {error: t.last_error || t.error || 'task failed'};
+    document.getElementById('summary_box').innerText = 'Processing... (task ' + t.status + ')';
+    await new Promise(r => setTimeout(r, 2000));
+  }
+  return {error: 'task ' + taskId + ' is still not done; is a queue worker (python -m app.queue_worker) running?'};
+}
+
+document.getElementById('processForm').onsubmit = async function(e) {
+  e.preventDefault();
+  const s3key = document.getElementById('s3_key').value;
+  document.getElementById('summary_box').innerText = 'Processing...';
+  document.getElementById('extraction_box').innerText = '';
+  if (uploadTask && uploadTask.s3_key === s3key) {
+    showResult(await waitForTask(uploadTask.task_id));
+    return;
+  }
+  const res = await fetch('/process', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({s3_key: s3key})});
+  const j = await res.json();
+  showResult(res.status === 202 ? await waitForTask(j.task_id) : j);
+}
 </script>
 """
 
@@ -99,12 +157,25 @@ def upload():
     uid = str(uuid.uuid4())
     s3_key = f"raw/{uid}_{fname}"
     # upload to S3
-    s3.upload_fileobj(f, CLAIM_BUCKET, s3_key)
-    return jsonify({"s3_key": s3_key})
+    get_s3().upload_fileobj(f, CLAIM_BUCKET, s3_key)
+    resp = {"s3_key": s3_key}
+    if AUTO_PROCESS_ON_UPLOAD:
+        # picked up by `python -m app.queue_worker`
+        resp["task_id"] = get_queue().enqueue(s3_key, priority=admission.lane_for(request.form.get("priority")))
+    return jsonify(resp)
 
-def run_textract_worker(s3_key: str):
+def run_textract_worker(s3_key: str, job_id: str = None, on_job=None):
+    """job_id resumes a Textract job started earlier; on_job(job_id) is called when one is started (in-process only)."""
+    if TEXTRACT_IN_PROCESS:
+        # avoids interpreter start-up per claim; born-digital PDFs finish without Textract
+        from app import textract_worker
+        if textract_worker.process_document(s3_key, bucket=CLAIM_BUCKET, job_id=job_id, on_job=on_job) is None:
+            raise RuntimeError("Textract failed or did not finish.")
+        return ""
     env = os.environ.copy()
     env["SAMPLE_S3_KEY"] = s3_key
+    if job_id:
+        env["SAMPLE_TEXTRACT_JOB_ID"] = job_id
     # Use same Python interpreter as the running Flask process:
     import sys
     cmd = [sys.executable, "-m", "app.textract_worker"]
@@ -117,12 +188,16 @@ def run_textract_worker(s3_key: str):
 
 def download_processed_text(s3_key: str) -> str:
     """
-    Transforms raw/<name>.pdf -> processed/<name>.txt and downloads the text file to /tmp and returns local path.
+    Transforms raw/<name>.pdf -> processed/<name>.txt and downloads the text file to a
+    unique temp file (so concurrent requests never share a path) and returns local path.
     """
     basename = s3_key.rsplit("/",1)[-1].rsplit(".",1)[0]
     processed_key = f"processed/{basename}.txt"
-    local_path = f"/tmp/{basename}.txt"
-    s3.download_file(CLAIM_BUCKET, processed_key, local_path)
+    # plain or compressed (ContentEncoding) text, see app.artifacts
+    data = artifacts.get_artifact(get_s3(), CLAIM_BUCKET, processed_key)
+    fd, local_path = tempfile.mkstemp(prefix=f"{basename}-", suffix=".txt")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
     return local_path, processed_key
 
 def run_local_extraction(local_txt_path: str):
@@ -168,85 +243,92 @@ def run_local_summary(local_txt_path: str):
     proc = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
     return proc.stdout.strip()
 
-def try_parse_json_from_text(text: str):
+def process_claim(s3_key: str):
     """
-    Attempt to extract a JSON object from text (first {...} block)
+    Run the full pipeline for one uploaded document.
+    Returns (response dict, HTTP status).
     """
-    m = re.search(r"(\{[\s\S]*\})", text)
-    if not m:
-        return None
-    try:
-        return json.loads(m.group(1))
-    except Exception:
-        return None
-
-@app.route("/process", methods=["POST"])
-def process():
-    body = request.get_json() or {}
-    s3_key = body.get("s3_key")
-    if not s3_key:
-        return jsonify({"error":"s3_key required"}), 400
+    # Bedrock calls made for this claim (worker embeddings included) are reported as resp["usage"]
+    with bedrock_usage.claim():
+        return _process_claim(s3_key)
 
+def _process_claim(s3_key: str):
     # 1) run textract worker (writes processed/<name>.txt and processed/<name>.extraction.json etc.)
     try:
-        run_textract_worker(s3_key)
+        with stages.stage("textract"):
+            run_textract_worker(s3_key)
     except Exception as e:
-        return jsonify({"error": f"textract worker failed: {str(e)}"}), 500
+        return {"error": f"textract worker failed: {str(e)}"}, 500
 
     # 2) download processed text
     try:
         local_txt_path, processed_s3_key = download_processed_text(s3_key)
     except Exception as e:
-        return jsonify({"error": f"failed to download processed text: {str(e)}"}), 500
+        return {"error": f"failed to download processed text: {str(e)}"}, 500
+    try:
+        return analyze_processed_text(s3_key, local_txt_path, processed_s3_key), 200
+    finally:
+        os.remove(local_txt_path)
 
+def analyze_processed_text(s3_key: str, local_txt_path: str, processed_s3_key: str) -> dict:
     # 3) local extraction & summary
-    local_extraction = run_local_extraction(local_txt_path)
-    local_summary = run_local_summary(local_txt_path)
+    with stages.stage("local"):
+        local_extraction = run_local_extraction(local_txt_path)
+        local_summary = run_local_summary(local_txt_path)
+    validation = validate_extraction(local_extraction) if isinstance(local_extraction, dict) else None
+    from app.near_dup import find_duplicates  # numpy; imported by warm_up before fork
+    with open(local_txt_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    duplicates = find_duplicates(processed_s3_key, text)
+    pipeline_stages.record_stages(get_s3(), CLAIM_BUCKET, processed_s3_key,
+                                  pipeline_stages.analysis_entries(text, local_extraction, local_summary),
+                                  s3_key=s3_key)
 
-    # 4) LLM extraction & summary (if enabled)
+    # 4) LLM extraction & summary (if enabled), gated on the local extraction's validation
     llm_extraction = None
     llm_summary = None
+    gate = None
     if getattr(bedrock_client, "ENABLE_BEDROCK", False):
-        try:
-            # Build extraction prompt - ask for JSON strictly
-            extraction_prompt = ptm.render(
-                "extraction",
-                instruction=(
-                    "Respond with a single JSON object (no surrounding text). "
-                    "Extract fields: policy_number (string), claimant_name (string), "
-                    "date_of_loss (YYYY-MM-DD or null), amount_claimed (numeric string or null), "
-                    "claim_description (string or null). If missing set value null."
-                ),
-                context="",
-                document=open(local_txt_path, "r", encoding="utf-8").read()
-            )
-            gen_res = invoker.generate(extraction_prompt)
-            if gen_res.get("success"):
-                raw = gen_res.get("text","")
-                parsed = try_parse_json_from_text(raw)
-                llm_extraction = parsed if parsed is not None else {"raw": raw}
-            else:
-                llm_extraction = {"error": "bedrock disabled or failed", "note": gen_res.get("note")}
-        except Exception as e:
-            llm_extraction = {"error": str(e)}
-
-        try:
-            summary_prompt = ptm.render(
-                "summary",
-                instruction=(
-                    "Write a concise 3-sentence claim summary that includes policy number, claimant name, "
-                    "date_of_loss and amount claimed if present. Then on a new line produce one-line 'Action items:' listing docs required."
-                ),
-                context="",
-                document=open(local_txt_path, "r", encoding="utf-8").read()
-            )
-            sum_res = invoker.generate(summary_prompt)
-            if sum_res.get("success"):
-                llm_summary = sum_res.get("text")
-            else:
-                llm_summary = "bedrock disabled or failed"
-        except Exception as e:
-            llm_summary = f"llm summary error: {str(e)}"
+        gate = llm_gate.decide(local_extraction, validation)
+        if gate["decision"] == "skip":
+            llm_extraction = {"note": llm_gate.SKIPPED_NOTE}
+        else:
+            try:
+                # Build extraction prompt - ask for JSON strictly, only for the fields the gate flagged
+                extraction_prompt = ptm.render(
+                    "extraction",
+                    instruction=extraction_instruction_for(gate["fields"]),
+                    context=extraction_schema_for(gate["fields"]),
+                    document=text,
+                    model_id=invoker.cascade
+                )
+                # cheap model first; escalates on unparseable or invalid JSON (BEDROCK_MODEL_CASCADE)
+                with stages.stage("llm"), bedrock_usage.stage("extract"):
+                    gen_res = invoker.generate_json(extraction_prompt,
+                                                    validate=llm_gate.acceptor(local_extraction, gate))
+                gate["model_id"], gate["escalations"] = gen_res.get("model_id"), gen_res.get("escalations")
+                if gen_res.get("success"):
+                    parsed = gen_res.get("parsed")
+                    llm_extraction = llm_gate.select(parsed, gate) if parsed is not None else {"raw": gen_res.get("text", "")}
+                else:
+                    llm_extraction = {"error": gen_res.get("error") or "bedrock disabled or failed",
+                                      "note": gen_res.get("note")}
+            except Exception as e:
+                llm_extraction = {"error": str(e)}
+
+        if llm_gate.skip_summary(gate):
+            llm_summary = llm_gate.SKIPPED_NOTE
+        else:
+            try:
+                # one call for short documents; chunked map-reduce (cached per chunk) for long ones
+                with stages.stage("llm"), bedrock_usage.stage("summarize"):
+                    sum_res = summarizer.summarize_llm(invoker, ptm, SUMMARY_INSTRUCTION, text)
+                if sum_res.get("success"):
+                    llm_summary = sum_res.get("text")
+                else:
+                    llm_summary = "bedrock disabled or failed"
+            except Exception as e:
+                llm_summary = f"llm summary error: {str(e)}"
     else:
         llm_extraction = {"note": "bedrock disabled"}
         llm_summary = "bedrock disabled"
@@ -254,9 +336,304 @@ def process():
     resp = {
         "s3_processed_key": processed_s3_key,
         "local": {"extraction": local_extraction, "summary": local_summary},
-        "llm": {"extraction": llm_extraction, "summary": llm_summary}
+        "validation": validation,
+        "duplicates": duplicates,
+        "llm": {"extraction": llm_extraction, "summary": llm_summary, "gate": gate},
+        "usage": bedrock_usage.current_summary(),
     }
-    return jsonify(resp)
+    record_claim(processed_s3_key, fields=local_extraction if isinstance(local_extraction, dict) else None,
+                 s3_key=s3_key, result=resp)
+    return resp
+
+def admitted_process_claim(s3_key: str, lane: str):
+    with admission.admit(lane):
+        return process_claim(s3_key)
+
+def coalesce_key(s3_key: str) -> str:
+    """S3 key plus the object's ETag, so a re-upload under the same key is not served a stale result."""
+    try:
+        etag = get_s3().head_object(Bucket=CLAIM_BUCKET, Key=s3_key).get("ETag", "").strip('"')
+    except Exception:
+        etag = ""
+    return f"{s3_key}@{etag}"
+
+@app.route("/process", methods=["POST"])
+def process():
+    body = request.get_json() or {}
+    s3_key = body.get("s3_key")
+    if not s3_key:
+        return jsonify({"error":"s3_key required"}), 400
+
+    # interactive (UI) or batch (backfills, test runner) priority lane
+    lane = admission.lane_for(request.headers.get("X-Priority") or body.get("priority"))
+    metrics.incr(f"process.requests.{lane}")
+
+    # an upload already queued for (or being processed by) a queue worker is not processed
+    # a second time here: single-flight cannot coalesce across processes
+    task = get_queue().active_for(s3_key) if AUTO_PROCESS_ON_UPLOAD else None
+    if task is not None:
+        metrics.incr("process.attached_to_task")
+        out = jsonify({"task_id": task["id"], "status": task["status"], "poll": f"/tasks/{task['id']}"})
+        out.status_code = 202
+        out.headers["Location"] = f"/tasks/{task['id']}"
+        return out
+
+    # concurrent calls for the same document attach to the running job; only the
+    # leader takes an admission slot. A profiled run (X-Profile: 1 / ?profile=1) is
+    # never coalesced, so the profile covers this request's own work.
+    profile = None
+    try:
+        if profiling.requested(request):
+            (resp, status), profile = profiling.run(admitted_process_claim, s3_key, lane, label=s3_key)
+            shared = False
+            metrics.incr(f"profile.{profile['status']}")
+        else:
+            (resp, status), shared = inflight.do(coalesce_key(s3_key), admitted_process_claim, s3_key, lane)
+    except Saturated as e:
+        out = jsonify({"error": "server busy, retry later", "lane": e.lane, "reason": e.reason,
+                       "retry_after": e.retry_after})
+        out.status_code = 429
+        out.headers["Retry-After"] = str(e.retry_after)
+        return out
+    if profile is not None:
+        if profile.get("id"):
+            profile["url"] = f"/admin/profiles/{profile['id']}"
+        resp = dict(resp, profile=profile)
+    out = jsonify(resp)
+    out.status_code = status
+    if shared:
+        out.headers["X-Coalesced"] = "1"
+    if profile and profile.get("id"):
+        out.headers["X-Profile-Id"] = profile["id"]
+    return out
+
+def _bundle_document(s3_key: str, lane: str):
+    try:
+        (resp, status), _ = inflight.do(coalesce_key(s3_key), admitted_process_claim, s3_key, lane)
+    except Saturated as e:
+        return "saturated", e
+    except Exception as e:
+        return "error", str(e)
+    if status != 200:
+        return "error", resp.get("error", f"status {status}")
+    return "ok", resp
+
+@app.route("/bundles", methods=["POST"])
+def process_bundle():
+    """
+    Process every document of a claim concurrently and merge them, e.g.
+    {"s3_keys": ["raw/form.pdf", "raw/invoice.pdf"]} or
+    {"documents": [{"s3_key": "raw/a.pdf", "type": "invoice"}, ...]}
+    """
+    body = request.get_json() or {}
+    try:
+        documents = normalize_documents(body)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    lane = admission.lane_for(request.headers.get("X-Priority") or body.get("priority"))
+    metrics.incr("bundle.requests")
+    metrics.observe("bundle.documents", len(documents))
+
+    start = time.perf_counter()
+    # latency ~ slowest document; each document still goes through single-flight + admission
+    outcomes = list(bundle_pool.map(lambda d: _bundle_document(d["s3_key"], lane), documents))
+    saturated = [o[1] for o in outcomes if o[0] == "saturated"]
+    if len(saturated) == len(outcomes):
+        retry_after = max(e.retry_after for e in saturated)
+        out = jsonify({"error": "server busy, retry later", "retry_after": retry_after})
+        out.status_code = 429
+        out.headers["Retry-After"] = str(retry_after)
+        return out
+    outcomes = [("error", f"server busy: {o[1].reason}") if o[0] == "saturated" else o for o in outcomes]
+    resp = build_bundle_response(documents, outcomes, time.perf_counter() - start)
+    metrics.observe("bundle.seconds", time.perf_counter() - start)
+    metrics.incr("bundle.conflicts", len(resp["conflicts"]))
+    return jsonify(resp), 200 if resp["bundle"]["processed"] else 502
+
+@app.route("/metrics", methods=["GET"])
+def metrics_view():
+    return jsonify(metrics.snapshot())
+
+@app.route("/metrics/cascade", methods=["GET"])
+def cascade_report():
+    """Per-tier latency and escalation rate of the LLM model cascade."""
+    return jsonify({"tiers": invoker.cascade_report()})
+
+@app.route("/admin/profiles", methods=["GET"])
+def list_profiles():
+    """Recent /process profiles, newest first."""
+    if not profiling.authorized(request):
+        return jsonify({"error": "forbidden"}), 403
+    try:
+        limit = min(int(request.args.get("limit", 50)), 500)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    return jsonify({"profiles": profiling.list_profiles(limit)})
+
+@app.route("/admin/profiles/<profile_id>", methods=["GET"])
+def get_profile(profile_id):
+    """Profile summary (top functions, allocation sites); ?download=1 returns the pstats dump."""
+    if not profiling.authorized(request):
+        return jsonify({"error": "forbidden"}), 403
+    if request.args.get("download"):
+        path = profiling.stats_path(profile_id)
+        if not path:
+            return jsonify({"error": "not found"}), 404
+        return send_file(os.path.abspath(path), mimetype="application/octet-stream",
+                         as_attachment=True, download_name=f"{profile_id}.prof")
+    meta = profiling.load(profile_id)
+    if not meta:
+        return jsonify({"error": "not found"}), 404
+    return jsonify(meta)
+
+@app.route("/tasks", methods=["GET"])
+def list_tasks():
+    try:
+        limit = min(int(request.args.get("limit", 100)), 1000)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    queue = get_queue()
+    return jsonify({"stats": queue.stats(), "tasks": queue.list(request.args.get("status"), limit)})
+
+@app.route("/tasks/<task_id>", methods=["GET"])
+def get_task(task_id):
+    task = get_queue().get(task_id)
+    if not task:
+        return jsonify({"error": "not found"}), 404
+    return jsonify(task)
+
+@app.route("/tasks/<task_id>/requeue", methods=["POST"])
+def requeue_task(task_id):
+    if not get_queue().requeue(task_id):
+        return jsonify({"error": "task not found or not dead-lettered"}), 409
+    return jsonify(get_queue().get(task_id))
+
+CLAIM_FILTERS = ("policy_number", "claim_reference", "date_of_loss", "date_from", "date_to", "digest", "s3_key")
+
+@app.route("/claims", methods=["GET"])
+def find_claims():
+    """
+    Indexed lookup in the results store, e.g.
+    /claims?policy_number=PL-2024-00987  or  /claims?claim_reference=CLM-2025-5567&full=1
+    """
+    filters = {k: request.args.get(k) for k in CLAIM_FILTERS if request.args.get(k)}
+    if not filters:
+        return jsonify({"error": f"one of {', '.join(CLAIM_FILTERS)} required"}), 400
+    try:
+        limit = min(int(request.args.get("limit", 100)), 1000)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    start = time.perf_counter()
+    rows = get_store().find(limit=limit, include_result=request.args.get("full") == "1", **filters)
+    return jsonify({"claims": rows, "count": len(rows), "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)})
+
+@app.route("/claims/<path:processed_key>", methods=["GET"])
+def get_claim(processed_key):
+    row = get_store().get(processed_key)
+    if not row:
+        return jsonify({"error": "not found"}), 404
+    return jsonify(row)
+
+@app.route("/results/<path:processed_key>", methods=["GET"])
+def get_result(processed_key):
+    """
+    Stored /process result for a claim, e.g.
+    /results/processed/<name>.txt?fields=claim.policy_number,claim.amount_claimed,validation.score
+    ETag is the row version plus the projection; a matching If-None-Match answers 304
+    without reading the stored JSON.
+    """
+    store = get_store()
+    version = store.version(processed_key)
+    if version is None:
+        return jsonify({"error": "not found"}), 404
+    paths = responses.parse_fields(request.args.get("fields"))
+    etag = responses.projection_tag(version, paths)
+    if request.if_none_match.contains_weak(etag):
+        metrics.incr("results.not_modified")
+        out = app.response_class(status=304)
+    else:
+        row = store.get(processed_key)
+        if row is None:
+            return jsonify({"error": "not found"}), 404
+        doc = {
+            "processed_key": processed_key,
+            "version": row["version"],
+            "updated_at": row["updated_at"],
+            "digest": row["digest"],
+            "claim": {f: row[f] for f in FIELDS},
+            "extraction": row["extraction"],
+            **(row["result"] or {}),
+        }
+        out = jsonify(responses.project(doc, paths))
+        # a concurrent upsert may have bumped the version since the check above
+        etag = responses.projection_tag(row["version"], paths)
+    out.set_etag(etag, weak=True)
+    out.headers["Cache-Control"] = "no-cache"
+    return out
+
+@app.after_request
+def compress_response(response):
+    """gzip/br for JSON and text bodies above COMPRESS_MIN_BYTES, negotiated per request."""
+    response.vary.add("Accept-Encoding")
+    if not responses.should_compress(response):
+        return response
+    encoding = responses.negotiate_encoding(request.accept_encodings)
+    if encoding:
+        response.set_data(responses.compress(response.get_data(), encoding))
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+# ---------- Warm-up / readiness ----------
+_warmup = {"state": "cold", "steps": {}, "errors": {}, "seconds": None}
+_warmup_lock = threading.Lock()
+
+def _warm_local_models():
+    importlib.import_module("scripts.local_summary")
+    importlib.import_module("scripts.local_extract")._local_retriever()
+
+def _warm_bedrock():
+    if getattr(bedrock_client, "ENABLE_BEDROCK", False):
+        bedrock_client._get_bedrock_client()
+
+WARMUP_STEPS = (
+    ("s3_client", get_s3),
+    ("textract_worker", lambda: importlib.import_module("app.textract_worker")),
+    ("local_models", _warm_local_models),
+    ("near_dup", lambda: importlib.import_module("app.near_dup")),
+    ("bedrock_client", _warm_bedrock),
+)
+
+def warm_up() -> dict:
+    """
+    Import heavy modules and build AWS clients once. Run by app.wsgi in the gunicorn
+    master (preload_app) so forked workers inherit them. SQLite connections are
+    deliberately not opened here: they must not be shared across a fork.
+    """
+    with _warmup_lock:
+        if _warmup["state"] in ("ready", "degraded"):
+            return _warmup
+        _warmup["state"] = "warming"
+        start = time.perf_counter()
+        for name, step in WARMUP_STEPS:
+            t0 = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                _warmup["errors"][name] = f"{type(e).__name__}: {e}"
+            _warmup["steps"][name] = round(time.perf_counter() - t0, 4)
+        _warmup["seconds"] = round(time.perf_counter() - start, 4)
+        _warmup["state"] = "degraded" if _warmup["errors"] else "ready"
+        metrics.observe("warmup.seconds", _warmup["seconds"])
+    return _warmup
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    """200 once warm_up has run (errors in optional steps are reported, not fatal), else 503."""
+    ready = _warmup["state"] in ("ready", "degraded")
+    return jsonify({"ready": ready, "pid": os.getpid(), **_warmup}), 200 if ready else 503
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)), debug=True)
+    # development server; production: gunicorn -c gunicorn.conf.py app.wsgi:application
+    warm_up()
+    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)),
+            debug=os.environ.get("FLASK_DEBUG", "0") == "1")
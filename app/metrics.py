@@ -0,0 +1,101 @@
+# app/metrics.py
+"""
+Process-local metrics registry served at GET /metrics.
+
+- counters: monotonically increasing numbers (incr)
+- timings:  count/sum/max plus p50/p95 over the most recent samples (observe, timer)
+- gauges:   callables sampled at snapshot time (gauge)
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+RECENT_SAMPLES = 512
+
+
+class _Timing:
+    __slots__ = ("count", "total", "max", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def summary(self) -> dict:
+        recent = sorted(self.recent)
+
+        def pct(p):
+            return recent[min(len(recent) - 1, int(p * len(recent)))] if recent else 0.0
+
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": pct(0.50),
+            "p95": pct(0.95),
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._timings = {}
+        self._gauges = {}
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = self._timings[name] = _Timing()
+            timing.add(value)
+
+    @contextmanager
+    def timer(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def gauge(self, name: str, fn):
+        with self._lock:
+            self._gauges[name] = fn
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def mean(self, name: str, default: float = 0.0) -> float:
+        with self._lock:
+            timing = self._timings.get(name)
+            return timing.total / timing.count if timing and timing.count else default
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            timings = {k: t.summary() for k, t in self._timings.items()}
+            gauges = dict(self._gauges)
+        sampled = {}
+        for name, fn in gauges.items():
+            try:
+                sampled[name] = fn()
+            except Exception:
+                sampled[name] = None
+        return {"counters": counters, "timings": timings, "gauges": sampled}
+
+
+metrics = Metrics()
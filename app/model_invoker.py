@@ -1,10 +1,13 @@
 # app/model_invoker.py
 import time
 import os
+import re
+import json
 import logging
-from typing import Optional, Dict, Any
+from typing import Any, Callable, Dict, List, Optional
 
-from app import bedrock_client
+from app import bedrock_client, bedrock_usage
+from app.metrics import metrics
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -12,17 +15,34 @@ logger.setLevel(logging.INFO)
 DEFAULT_RETRIES = int(os.environ.get("MODEL_INVOKER_RETRIES", "3"))
 DEFAULT_BACKOFF = float(os.environ.get("MODEL_INVOKER_BACKOFF", "1.2"))
 DEFAULT_TIMEOUT = int(os.environ.get("MODEL_INVOKER_TIMEOUT", "30"))
+# cheapest first, e.g. "<fast model id>,<large model id>"; unset = BEDROCK_MODEL_SUMMARY only
+BEDROCK_MODEL_CASCADE = os.environ.get("BEDROCK_MODEL_CASCADE", "")
+
+def try_parse_json_from_text(text: str):
+    """
+    Attempt to extract a JSON object from text (first {...} block)
+    """
+    m = re.search(r"(\{[\s\S]*\})", text)
+    if not m:
+        return None
+    try:
+        return json.loads(m.group(1))
+    except Exception:
+        return None
 
 class ModelInvoker:
     def __init__(self, text_model_id: Optional[str] = None, embed_model_id: Optional[str] = None):
         self.text_model_id = text_model_id or os.environ.get("BEDROCK_MODEL_SUMMARY")
         self.embed_model_id = embed_model_id or os.environ.get("BEDROCK_MODEL_EMBED")
+        self.cascade = [m.strip() for m in BEDROCK_MODEL_CASCADE.split(",") if m.strip()] or [self.text_model_id]
 
     def _retry_loop(self, fn, *args, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, **kwargs):
         attempt = 0
         while True:
             try:
-                return fn(*args, **kwargs)
+                # attempt number for app.bedrock_usage (retries are counted separately from calls)
+                with bedrock_usage.attempt(attempt):
+                    return fn(*args, **kwargs)
             except Exception as e:
                 attempt += 1
                 logger.warning("ModelInvoker attempt %s failed: %s", attempt, str(e))
@@ -58,6 +78,70 @@ class ModelInvoker:
             text = str(raw)
         return {"success": True, "text": text, "raw": raw}
 
+    def generate_json(self, prompt: str, validate: Optional[Callable[[dict], bool]] = None,
+                      tiers: Optional[List[str]] = None, timeout: int = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+        """
+        Model cascade for JSON answers: try each tier (cheapest first) and escalate to the
+        next when the reply does not parse (try_parse_json_from_text), fails `validate`,
+        or the call errors. Returns generate()'s dict plus "parsed", "model_id", "tier" and
+        "escalations" ([{"model_id", "reason"}]); the last tier's answer is returned as-is.
+        Per-tier calls, latency and escalations are recorded under model.tier.<model_id>.*.
+        """
+        tiers = tiers or self.cascade
+        escalations = []
+        res = {"success": False, "text": None, "raw": None}
+        for i, mid in enumerate(tiers):
+            last = i == len(tiers) - 1
+            start = time.perf_counter()
+            try:
+                res = self.generate(prompt, model_id=mid, timeout=timeout)
+            except Exception as e:
+                res = {"success": False, "text": None, "raw": None, "error": str(e)}
+            metrics.observe(f"model.tier.{mid}.seconds", time.perf_counter() - start)
+            metrics.incr(f"model.tier.{mid}.calls")
+            if not res.get("success") and res.get("note") == "bedrock disabled":
+                return dict(res, parsed=None, model_id=mid, tier=i, escalations=escalations)
+
+            parsed = try_parse_json_from_text(res.get("text") or "") if res.get("success") else None
+            if not res.get("success"):
+                reason = "error"
+            elif parsed is None:
+                reason = "parse"
+            elif validate is not None and not validate(parsed):
+                reason = "validation"
+            else:
+                reason = None
+            if reason is None or last:
+                metrics.incr(f"model.tier.{mid}.{'accepted' if reason is None else 'exhausted'}")
+                return dict(res, parsed=parsed, model_id=mid, tier=i, escalations=escalations)
+            metrics.incr(f"model.tier.{mid}.escalated.{reason}")
+            escalations.append({"model_id": mid, "reason": reason})
+        return dict(res, parsed=None, model_id=None, tier=None, escalations=escalations)
+
+    def cascade_report(self, tiers: Optional[List[str]] = None) -> list:
+        """Per-tier calls, latency and escalation rate from app.metrics (the cost/latency tradeoff)."""
+        snap = metrics.snapshot()
+        counters, timings = snap["counters"], snap["timings"]
+        report = []
+        for i, mid in enumerate(tiers or self.cascade):
+            prefix = f"model.tier.{mid}."
+            calls = counters.get(prefix + "calls", 0)
+            escalated = {k[len(prefix + "escalated."):]: v for k, v in counters.items()
+                         if k.startswith(prefix + "escalated.")}
+            latency = timings.get(prefix + "seconds") or {}
+            report.append({
+                "tier": i,
+                "model_id": mid,
+                "calls": calls,
+                "accepted": counters.get(prefix + "accepted", 0),
+                "escalated": escalated,
+                "escalation_rate": round(sum(escalated.values()) / calls, 4) if calls else 0.0,
+                "latency_mean": latency.get("mean", 0.0),
+                "latency_p50": latency.get("p50", 0.0),
+                "latency_p95": latency.get("p95", 0.0),
+            })
+        return report
+
     def embed(self, text: str, model_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Returns {"success": bool, "embedding": [...], "raw": <raw>}
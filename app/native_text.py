@@ -0,0 +1,111 @@
+# app/native_text.py
+"""
+Pre-OCR classifier for born-digital PDFs.
+
+Extracts the embedded text layer per page with pypdf and scores its quality.
+Pages that are image-only or whose text layer looks like garbage are sent to
+Textract; everything else is used as-is. Results are merged back in page order.
+
+If pypdf is not installed (or the upload is not a PDF) every page goes to OCR.
+"""
+
+import io
+import os
+import re
+
+try:
+    from pypdf import PdfReader, PdfWriter
+    _HAS_PYPDF = True
+except Exception:
+    _HAS_PYPDF = False
+
+NATIVE_TEXT_ENABLED = os.environ.get("NATIVE_TEXT_ENABLED", "1") == "1"
+NATIVE_MIN_CHARS = int(os.environ.get("NATIVE_MIN_CHARS", "40"))
+NATIVE_MIN_QUALITY = float(os.environ.get("NATIVE_MIN_QUALITY", "0.6"))
+
+_WORD_RE = re.compile(r"[A-Za-z]{2,}|\d+")
+# glyphs with no unicode mapping come out as "(cid:NN)" or U+FFFD
+_GARBAGE_RE = re.compile(r"\(cid:\d+\)")
+
+
+def available() -> bool:
+    """True if the native-text stage is enabled and pypdf is importable."""
+    return NATIVE_TEXT_ENABLED and _HAS_PYPDF
+
+
+def page_quality(text: str) -> float:
+    """
+    Score a page's text layer in [0, 1]: share of characters that are letters,
+    digits, whitespace or common punctuation, scaled by the share of tokens that
+    look like words/numbers. Empty or very short pages score 0.
+    """
+    if not text:
+        return 0.0
+    stripped = _GARBAGE_RE.sub("\ufffd", text).strip()
+    if len(stripped) < NATIVE_MIN_CHARS:
+        return 0.0
+    good = sum(1 for ch in stripped if ch.isalnum() or ch.isspace() or ch in ".,:;-/()#&'\"%₹$+@")
+    char_ratio = good / len(stripped)
+    tokens = stripped.split()
+    word_ratio = sum(1 for t in tokens if "\ufffd" not in t and _WORD_RE.search(t)) / len(tokens) if tokens else 0.0
+    return char_ratio * word_ratio
+
+
+def extract_native_pages(pdf_bytes: bytes) -> list:
+    """Return [(page_number, text), ...] for every page of the PDF's text layer."""
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    pages = []
+    for i, page in enumerate(reader.pages, 1):
+        try:
+            text = page.extract_text() or ""
+        except Exception:
+            text = ""
+        # match Textract LINE output: one line per row, no blank lines
+        lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
+        pages.append((i, "\n".join(lines)))
+    return pages
+
+
+def build_subset_pdf(pdf_bytes: bytes, page_numbers: list) -> bytes:
+    """Return a new PDF containing only page_numbers (1-based), in order."""
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    writer = PdfWriter()
+    for n in page_numbers:
+        writer.add_page(reader.pages[n - 1])
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def plan_ocr(pdf_bytes: bytes):
+    """
+    Classify pages. Returns (native_pages, ocr_page_numbers):
+    - native_pages: [(page, text)] whose text layer passed the quality check
+    - ocr_page_numbers: pages that still need Textract
+    Returns (None, None) when the text layer can't be read at all (send whole document to OCR).
+    """
+    if not available() or not pdf_bytes.startswith(b"%PDF"):
+        return None, None
+    try:
+        pages = extract_native_pages(pdf_bytes)
+    except Exception:
+        return None, None
+    native, ocr = [], []
+    for page, text in pages:
+        if page_quality(text) >= NATIVE_MIN_QUALITY:
+            native.append((page, text))
+        else:
+            ocr.append(page)
+    return native, ocr
+
+
+def merge_pages(native_pages: list, ocr_pages: list, ocr_page_numbers: list) -> list:
+    """
+    Merge native pages with Textract pages of a subset PDF.
+    ocr_pages are numbered 1..k within the subset; ocr_page_numbers maps them back.
+    """
+    merged = dict(native_pages)
+    for sub_page, text in ocr_pages:
+        if 1 <= sub_page <= len(ocr_page_numbers):
+            merged[ocr_page_numbers[sub_page - 1]] = text
+    return sorted(merged.items())
@@ -0,0 +1,182 @@
+# app/near_dup.py
+"""
+Near-duplicate claim detection with MinHash signatures and an LSH index.
+
+Each document's text is reduced to word k-shingles, hashed, and summarized as
+a NUM_PERM-value MinHash signature. The signature is split into BANDS bands;
+each band is hashed to a bucket and stored in SQLite with an index on
+(band, bucket). A lookup is BANDS indexed point queries plus a signature
+comparison for the (few) colliding candidates, so it stays fast however many
+historical claims are indexed.
+
+Jaccard similarity is estimated as the share of equal signature positions.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from typing import Optional
+
+import numpy as np
+
+NEAR_DUP_DB = os.environ.get("NEAR_DUP_DB", "near_dup.db")
+NEAR_DUP_THRESHOLD = float(os.environ.get("NEAR_DUP_THRESHOLD", "0.5"))
+SHINGLE_SIZE = int(os.environ.get("NEAR_DUP_SHINGLE_SIZE", "5"))
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+# shingles hashed per step: bounds the NUM_PERM x block working matrix (~2 MB) whatever the document length
+MINHASH_BLOCK = 2048
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(20240601)
+_A = _rng.randint(1, _PRIME, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, _PRIME, size=NUM_PERM).astype(np.uint64)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    doc_key TEXT PRIMARY KEY,
+    sig     BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band    INTEGER NOT NULL,
+    bucket  INTEGER NOT NULL,
+    doc_key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_lsh_band_bucket ON lsh_buckets(band, bucket);
+CREATE INDEX IF NOT EXISTS idx_lsh_doc ON lsh_buckets(doc_key);
+"""
+
+
+def shingles(text: str, k: int = SHINGLE_SIZE) -> set:
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < k:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+
+def minhash(text: str) -> Optional[np.ndarray]:
+    """NUM_PERM-value MinHash signature (uint64), or None for empty text."""
+    sh = shingles(text)
+    if not sh:
+        return None
+    # 31-bit shingle hashes keep a * x + b inside uint64
+    x = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") & _PRIME for s in sh),
+        dtype=np.uint64, count=len(sh),
+    )
+    sig = np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    for i in range(0, len(x), MINHASH_BLOCK):
+        block = (np.outer(_A, x[i:i + MINHASH_BLOCK]) + _B[:, None]) % _PRIME
+        np.minimum(sig, block.min(axis=1), out=sig)
+    return sig
+
+
+def band_buckets(sig: np.ndarray) -> list:
+    """One signed 64-bit bucket id per band."""
+    out = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(sig[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest()
+        out.append(int.from_bytes(digest, "little", signed=True))
+    return out
+
+
+def estimate_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+
+class NearDupIndex:
+    def __init__(self, path: str = NEAR_DUP_DB, threshold: float = NEAR_DUP_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def query(self, sig: np.ndarray, exclude: Optional[str] = None, limit: int = 10) -> list:
+        """Candidates sharing at least one LSH bucket, with Jaccard estimate >= threshold, best first."""
+        conn = self._conn()
+        candidates = set()
+        for band, bucket in enumerate(band_buckets(sig)):
+            for (doc_key,) in conn.execute(
+                    "SELECT doc_key FROM lsh_buckets WHERE band = ? AND bucket = ?", (band, bucket)):
+                candidates.add(doc_key)
+        candidates.discard(exclude)
+
+        results = []
+        for doc_key in candidates:
+            row = conn.execute("SELECT sig FROM signatures WHERE doc_key = ?", (doc_key,)).fetchone()
+            if not row:
+                continue
+            j = estimate_jaccard(sig, np.frombuffer(row[0], dtype=np.uint64))
+            if j >= self.threshold:
+                results.append({"doc_key": doc_key, "jaccard": round(j, 3)})
+        results.sort(key=lambda r: r["jaccard"], reverse=True)
+        return results[:limit]
+
+    @staticmethod
+    def _add(conn, doc_key: str, sig: np.ndarray):
+        conn.execute("DELETE FROM lsh_buckets WHERE doc_key = ?", (doc_key,))
+        conn.execute("INSERT OR REPLACE INTO signatures (doc_key, sig) VALUES (?, ?)",
+                     (doc_key, sig.astype(np.uint64).tobytes()))
+        conn.executemany("INSERT INTO lsh_buckets (band, bucket, doc_key) VALUES (?, ?, ?)",
+                         [(band, bucket, doc_key) for band, bucket in enumerate(band_buckets(sig))])
+
+    def add(self, doc_key: str, sig: np.ndarray):
+        """Insert or replace a document's signature and buckets."""
+        with self._conn() as conn:
+            self._add(conn, doc_key, sig)
+
+    def add_many(self, items: list):
+        """Bulk add [(doc_key, sig), ...] in one transaction (used by the backfill)."""
+        with self._conn() as conn:
+            for doc_key, sig in items:
+                self._add(conn, doc_key, sig)
+
+    def check_and_add(self, doc_key: str, text: str, limit: int = 10) -> list:
+        """Return near-duplicates of text among indexed documents, then index it under doc_key."""
+        sig = minhash(text or "")
+        if sig is None:
+            return []
+        dups = self.query(sig, exclude=doc_key, limit=limit)
+        self.add(doc_key, sig)
+        return dups
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+
+def find_duplicates(doc_key: str, text: str) -> list:
+    """Best-effort near-duplicate check for /process; never fails processing."""
+    try:
+        return get_index().check_and_add(doc_key, text)
+    except Exception as e:
+        print("near-duplicate check failed:", e)
+        return []
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> NearDupIndex:
+    """Process-wide index (opened on first use)."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = NearDupIndex()
+    return _index
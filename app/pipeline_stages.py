@@ -0,0 +1,219 @@
+# app/pipeline_stages.py
+"""
+Versioned pipeline stages and the per-document stage manifest.
+
+    ocr -> chunk -> embed
+        -> extract
+        -> summarize
+
+Every stage has a version and an input digest:
+
+    stage      version                                   input digest
+    ocr        OCR_VERSION                               ETag of the raw upload
+    chunk      CHUNK_VERSION + chunker code/settings     digest of the text
+    embed      EMBED_VERSION + embedding model id        digest of the chunk texts
+    extract    EXTRACT_VERSION + extraction code         digest of the text
+    summarize  SUMMARIZE_VERSION + local summary code    digest of the text
+
+The versions of the cheap stages include a fingerprint of their source, so
+editing a pattern in scripts/local_extract.py or textract_worker.extract_fields
+invalidates `extract` without anyone bumping a number; OCR and embeddings only
+change when OCR_VERSION / EMBED_VERSION (or the model) change.
+
+processed/<name>.manifest.json records, per stage, the version and input digest
+it last ran with and the digest of its output. A stage is current when both
+match; `python -m scripts.reprocess` recomputes only the stages that are not.
+"""
+
+import hashlib
+import inspect
+import json
+import threading
+import time
+from typing import Optional
+
+from app import artifacts
+from app.results_store import text_digest
+
+STAGES = ("ocr", "chunk", "embed", "extract", "summarize")
+# stage -> the stage whose output is its input
+UPSTREAM = {"chunk": "ocr", "embed": "chunk", "extract": "ocr", "summarize": "ocr"}
+
+# bump to force recomputation of the expensive stages across the corpus
+OCR_VERSION = "1"
+EMBED_VERSION = "1"
+# cheap stages: also fingerprinted from their code (see stage_versions)
+CHUNK_VERSION = "1"
+EXTRACT_VERSION = "1"
+SUMMARIZE_VERSION = "1"
+
+MANIFEST_VERSION = 1
+
+_versions = None
+_versions_lock = threading.Lock()
+
+
+def manifest_key_for(processed_key: str) -> str:
+    return processed_key.rsplit(".", 1)[0] + ".manifest.json"
+
+
+def _fingerprint(*parts) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(inspect.getsource(part).encode("utf-8") if inspect.ismodule(part) or callable(part)
+                 else str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:12]
+
+
+def stage_versions() -> dict:
+    """Current version string of every stage (computed once per process)."""
+    global _versions
+    if _versions is None:
+        with _versions_lock:
+            if _versions is None:
+                from app import bedrock_client, chunker, date_parser, summarizer, textract_worker, validator
+                from scripts import local_extract, local_summary
+                _versions = {
+                    "ocr": OCR_VERSION,
+                    "chunk": f"{CHUNK_VERSION}-" + _fingerprint(chunker, chunker.CHUNK_SIZE, chunker.CHUNK_OVERLAP),
+                    "embed": f"{EMBED_VERSION}-{bedrock_client.BEDROCK_MODEL_EMBED}",
+                    "extract": f"{EXTRACT_VERSION}-" + _fingerprint(
+                        textract_worker.extract_fields, textract_worker._clean_number_string,
+                        textract_worker._try_parse_date, date_parser, local_extract, validator),
+                    "summarize": f"{SUMMARIZE_VERSION}-" + _fingerprint(
+                        local_summary, summarizer, summarizer.SUMMARY_MAP_REDUCE_MIN_CHARS,
+                        summarizer.SUMMARY_CHUNK_SIZE, summarizer.SUMMARY_REDUCE_FANOUT),
+                }
+    return _versions
+
+
+# ---------- digests ----------
+
+def page_spans(pages) -> list:
+    """[(page, text), ...] -> [[page, start, end], ...] offsets into "\\n".join(texts)."""
+    spans, pos = [], 0
+    for page, page_text in pages:
+        spans.append([page, pos, pos + len(page_text)])
+        pos += len(page_text) + 1
+    return spans
+
+
+def pages_from_spans(text: str, spans) -> list:
+    return [(page, text[start:end]) for page, start, end in spans]
+
+
+def pages_from_chunks(text: str, chunks) -> list:
+    """
+    Best-effort page split for documents processed before manifests existed, from the
+    page/offsets of their embedded chunks; one page if the chunks carry no page numbers.
+    """
+    bounds = {}
+    for c in chunks or []:
+        if c.get("page") is None:
+            continue
+        lo, hi = bounds.get(c["page"], (c["start"], c["end"]))
+        bounds[c["page"]] = (min(lo, c["start"]), max(hi, c["end"]))
+    if not bounds:
+        return [(1, text)]
+    pages = sorted(bounds)
+    starts = [0] + [bounds[p][0] for p in pages[1:]]
+    ends = [s - 1 for s in starts[1:]] + [len(text)]
+    return [(p, text[s:max(s, e)]) for p, s, e in zip(pages, starts, ends)]
+
+
+def chunks_digest(chunks) -> str:
+    """Digest of chunker output (or embed_chunks entries, which carry the text as "chunk")."""
+    h = hashlib.sha256()
+    for c in chunks:
+        h.update(f"{c.get('page')}:{c['start']}:{c['end']}\0".encode("utf-8"))
+        h.update((c["text"] if "text" in c else c["chunk"]).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def result_digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+# ---------- manifest entries ----------
+
+def entry(stage: str, input_digest: Optional[str], output_digest: Optional[str], **extra) -> dict:
+    return dict({"version": stage_versions()[stage], "input": input_digest, "output": output_digest,
+                 "at": time.time()}, **extra)
+
+
+def ingest_entries(etag: Optional[str], text: str, pages, chunks) -> dict:
+    """ocr/chunk/embed entries for a document just OCRed, chunked and embedded (chunks: embed_chunks output)."""
+    digest = text_digest(text)
+    chunk_out = chunks_digest(chunks)
+    return {
+        "ocr": entry("ocr", etag, digest, pages=page_spans(pages)),
+        "chunk": entry("chunk", digest, chunk_out),
+        "embed": entry("embed", chunk_out, None),
+    }
+
+
+def analysis_entries(text: str, local_extraction, local_summary) -> dict:
+    """extract/summarize entries for a document whose local extraction and summary were just computed."""
+    digest = text_digest(text)
+    return {
+        "extract": entry("extract", digest, result_digest(local_extraction)),
+        "summarize": entry("summarize", digest, result_digest(local_summary)),
+    }
+
+
+def is_current(manifest: dict, stage: str, input_digest: Optional[str]) -> bool:
+    e = (manifest.get("stages") or {}).get(stage)
+    return bool(e) and e.get("version") == stage_versions()[stage] and e.get("input") == input_digest
+
+
+def plan(manifest: dict, etag: Optional[str] = None, force=()) -> list:
+    """
+    Stages that would be recomputed, assuming a recomputed stage changes its output.
+    `etag` is the raw upload's current ETag (None: unknown, the recorded OCR input is trusted).
+    """
+    stages = manifest.get("stages") or {}
+    todo = []
+    for stage in STAGES:
+        e = stages.get(stage) or {}
+        if stage == "ocr":
+            expected = etag if etag is not None else e.get("input")
+            stale = not e or e.get("version") != OCR_VERSION or e.get("input") != expected
+        else:
+            upstream = UPSTREAM[stage]
+            stale = (upstream in todo or e.get("version") != stage_versions()[stage]
+                     or e.get("input") != (stages.get(upstream) or {}).get("output"))
+        if stale or stage in force:
+            todo.append(stage)
+    return todo
+
+
+# ---------- S3 ----------
+
+def manifest_put_kwargs(processed_key: str, manifest: dict) -> dict:
+    doc = dict(manifest, v=MANIFEST_VERSION, updated_at=time.time())
+    return artifacts.put_kwargs(manifest_key_for(processed_key),
+                                json.dumps(doc, separators=(",", ":")).encode("utf-8"), "application/json")
+
+
+def new_manifest(s3_key: Optional[str], stages: dict) -> dict:
+    return {"s3_key": s3_key, "stages": dict(stages)}
+
+
+def load_manifest(client, bucket: str, processed_key: str) -> Optional[dict]:
+    try:
+        return json.loads(artifacts.get_artifact(client, bucket, manifest_key_for(processed_key)))
+    except client.exceptions.NoSuchKey:
+        return None
+
+
+def record_stages(client, bucket: str, processed_key: str, stages: dict, s3_key: Optional[str] = None):
+    """Merge stage entries into a document's manifest (best effort, like record_claim)."""
+    try:
+        manifest = load_manifest(client, bucket, processed_key) or new_manifest(s3_key, {})
+        manifest["stages"].update(stages)
+        manifest["s3_key"] = manifest.get("s3_key") or s3_key
+        client.put_object(Bucket=bucket, **manifest_put_kwargs(processed_key, manifest))
+    except Exception as e:
+        print("stage manifest write failed:", e)
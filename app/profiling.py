@@ -0,0 +1,171 @@
+# app/profiling.py
+"""
+Opt-in per-request profiling for /process.
+
+With PROFILE_ENABLED=1 (off by default; set PROFILE_ADMIN_TOKEN too outside
+development), a request sent with `X-Profile: 1` (or `?profile=1`) runs its
+in-process stages under cProfile with tracemalloc tracing, and leaves two
+files in PROFILE_DIR:
+
+    <id>.prof   pstats dump (python -m pstats, snakeviz, ...)
+    <id>.json   metadata: wall time, tracemalloc peak, top functions by
+                cumulative time, top allocation sites
+
+Only one profile runs at a time per process (cProfile and tracemalloc are
+process-global); a profile request that finds the profiler busy runs
+unprofiled and says so. Requests without the flag never touch this module
+beyond requested(), so profiling costs nothing when it is not asked for.
+
+cProfile sees the request thread only; work handed to pools (summary map
+calls, Bedrock calls) shows up as the time spent waiting for it.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from typing import Optional
+
+# off by default: a profile turns on process-wide tracemalloc and bypasses single-flight
+PROFILE_ENABLED = os.environ.get("PROFILE_ENABLED", "0") == "1"
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "50"))
+# if set, profiling and the /admin/profiles endpoints require X-Admin-Token
+PROFILE_ADMIN_TOKEN = os.environ.get("PROFILE_ADMIN_TOKEN", "")
+PROFILE_TOP_N = 30
+TRACEMALLOC_FRAMES = 5
+
+_lock = threading.Lock()
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+
+def authorized(req) -> bool:
+    """Profiling (and the /admin/profiles endpoints) must be enabled, and the admin token sent if one is set."""
+    return PROFILE_ENABLED and (not PROFILE_ADMIN_TOKEN or req.headers.get("X-Admin-Token") == PROFILE_ADMIN_TOKEN)
+
+
+def requested(req) -> bool:
+    """True if a Flask request asks for (and may have) a profile."""
+    flag = req.headers.get("X-Profile") or req.args.get("profile")
+    return flag not in (None, "", "0", "false") and authorized(req)
+
+
+def _path(profile_id: str, ext: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{profile_id}.{ext}")
+
+
+def _valid_id(profile_id: str) -> bool:
+    return len(profile_id) == 32 and all(c in "0123456789abcdef" for c in profile_id)
+
+
+def _top_functions(prof: cProfile.Profile) -> list:
+    stats = pstats.Stats(prof, stream=io.StringIO())
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+        if filename.startswith(_ROOT):
+            filename = filename[len(_ROOT):]
+        rows.append({"function": f"{filename}:{line}({func})",
+                     "calls": nc, "primitive_calls": cc, "tottime": round(tt, 6), "cumtime": round(ct, 6)})
+    rows.sort(key=lambda r: r["cumtime"], reverse=True)
+    return rows[:PROFILE_TOP_N]
+
+
+def _top_allocations(snapshot) -> list:
+    return [{"site": str(stat.traceback[0]), "size_bytes": stat.size, "blocks": stat.count}
+            for stat in snapshot.statistics("lineno")[:PROFILE_TOP_N]]
+
+
+def _prune():
+    metas = sorted((f for f in os.listdir(PROFILE_DIR) if f.endswith(".json")),
+                   key=lambda f: os.path.getmtime(os.path.join(PROFILE_DIR, f)), reverse=True)
+    for name in metas[PROFILE_KEEP:]:
+        for ext in ("json", "prof"):
+            try:
+                os.remove(_path(name[:-5], ext))
+            except FileNotFoundError:
+                pass
+
+
+def run(fn, *args, label: str = "", **kwargs):
+    """
+    Call fn under the profiler. Returns (fn's result, profile summary dict); the summary is
+    {"status": "busy"} if another profile is running (fn then runs unprofiled).
+    """
+    if not _lock.acquire(blocking=False):
+        return fn(*args, **kwargs), {"status": "busy"}
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profile_id = uuid.uuid4().hex
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        prof = cProfile.Profile()
+        start = time.perf_counter()
+        prof.enable()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            prof.disable()
+            seconds = time.perf_counter() - start
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            if not was_tracing:
+                tracemalloc.stop()
+
+        prof.dump_stats(_path(profile_id, "prof"))
+        meta = {
+            "id": profile_id,
+            "label": label,
+            "created_at": time.time(),
+            "seconds": round(seconds, 4),
+            "memory": {"peak_bytes": peak - base, "retained_bytes": current - base},
+            "top_functions": _top_functions(prof),
+            "top_allocations": _top_allocations(snapshot),
+        }
+        with open(_path(profile_id, "json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        _prune()
+        return result, {"status": "ok", "id": profile_id, "seconds": meta["seconds"],
+                        "peak_memory_bytes": meta["memory"]["peak_bytes"]}
+    finally:
+        _lock.release()
+
+
+def list_profiles(limit: int = 50) -> list:
+    """Newest first, without the per-function tables."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    out = []
+    for name in os.listdir(PROFILE_DIR):
+        if not name.endswith(".json"):
+            continue
+        meta = load(name[:-5])
+        if meta:
+            out.append({k: meta[k] for k in ("id", "label", "created_at", "seconds", "memory")})
+    out.sort(key=lambda m: m["created_at"], reverse=True)
+    return out[:limit]
+
+
+def load(profile_id: str) -> Optional[dict]:
+    if not _valid_id(profile_id):
+        return None
+    try:
+        with open(_path(profile_id, "json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def stats_path(profile_id: str) -> Optional[str]:
+    """Path of the .prof dump, or None."""
+    if not _valid_id(profile_id):
+        return None
+    path = _path(profile_id, "prof")
+    return path if os.path.exists(path) else None
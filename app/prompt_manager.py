@@ -1,15 +1,42 @@
 # app/prompt_manager.py
 """
-PromptTemplateManager - small wrapper around Jinja2 templates for extraction & summary prompts.
-If Jinja2 is not installed, falls back to Python .format string rendering.
+PromptTemplateManager - extraction & summary prompts.
+
+Templates use Jinja-style {{ instruction }} / {{ context }} / {{ document }}
+placeholders and nothing else, so each one is compiled once per
+(kind, instruction, context) into a static prefix and suffix around the
+document; a render is a single join of prefix, document and suffix (the
+output matches Jinja's, including the dropped trailing newline).
+
+Prompts are fitted to the target model: the limit is PROMPT_MAX_TOKENS, or
+the model's entry in PROMPT_MODEL_TOKEN_LIMITS ("<model id>=<tokens>,..."),
+at CHARS_PER_TOKEN characters per token. A document that does not fit is
+reduced to the chunks that best match the instruction (extraction; always
+keeping the first chunk) or to its head and tail (summary). Prompt lengths and
+fitted prompts are counted under prompt.<kind>.* in GET /metrics.
 """
 
-from typing import Optional
-try:
-    from jinja2 import Template
-    _HAS_JINJA = True
-except Exception:
-    _HAS_JINJA = False
+import os
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Union
+
+from app.bedrock_usage import CHARS_PER_TOKEN
+from app.metrics import metrics
+
+PROMPT_MAX_TOKENS = int(os.environ.get("PROMPT_MAX_TOKENS", "100000"))
+
+
+def _parse_limits(spec: str) -> dict:
+    limits = {}
+    for item in spec.split(","):
+        model_id, _, tokens = item.strip().rpartition("=")
+        if model_id and tokens.strip().isdigit():
+            limits[model_id] = int(tokens)
+    return limits
+
+
+PROMPT_MODEL_TOKEN_LIMITS = _parse_limits(os.environ.get("PROMPT_MODEL_TOKEN_LIMITS", ""))
 
 EXTRACTION_TEMPLATE = """{{ instruction }}
 
@@ -23,51 +50,191 @@ DOCUMENT:
 {{ document }}
 """
 
+# {{ context }}: the schema of the fields asked for (extraction_schema_for)
 EXTRACTION_TEMPLATE_JSON = """{{ instruction }}
 
 # Return only a single JSON object (no additional text). Schema:
-# {
-#   "policy_number": <string or null>,
-#   "claimant_name": <string or null>,
-#   "date_of_loss": <YYYY-MM-DD or null>,
-#   "amount_claimed": <string numeric or null>,
-#   "claim_description": <string or null>
-# }
+{{ context }}
 
 DOCUMENT:
 {{ document }}
 """
 
+# Instructions used by the /process pipelines (sync and async)
+EXTRACTION_INSTRUCTION = (
+    "Respond with a single JSON object (no surrounding text). "
+    "Extract fields: policy_number (string), claimant_name (string), "
+    "date_of_loss (YYYY-MM-DD or null), amount_claimed (numeric string or null), "
+    "claim_description (string or null). If missing set value null."
+)
+
+# per-field hints, used to ask only for the fields the confidence gate flagged
+EXTRACTION_FIELD_SPECS = {
+    "policy_number": "string",
+    "claimant_name": "string",
+    "date_of_loss": "YYYY-MM-DD or null",
+    "amount_claimed": "numeric string or null",
+    "claim_description": "string or null",
+}
+
+
+def extraction_instruction_for(fields) -> str:
+    """EXTRACTION_INSTRUCTION restricted to `fields` (the full instruction if all are requested)."""
+    fields = [f for f in EXTRACTION_FIELD_SPECS if f in set(fields)]
+    if len(fields) == len(EXTRACTION_FIELD_SPECS):
+        return EXTRACTION_INSTRUCTION
+    return (
+        "Respond with a single JSON object (no surrounding text). "
+        "Extract only these fields: "
+        + ", ".join(f"{f} ({EXTRACTION_FIELD_SPECS[f]})" for f in fields)
+        + ". Ignore every other field. If missing set value null."
+    )
+
+def extraction_schema_for(fields) -> str:
+    """Schema comment block for EXTRACTION_TEMPLATE_JSON, listing only `fields`."""
+    fields = [f for f in EXTRACTION_FIELD_SPECS if f in set(fields)]
+    types = {f: s if "null" in s else f"{s} or null" for f, s in EXTRACTION_FIELD_SPECS.items()}
+    lines = [f'#   "{f}": <{types[f]}>' for f in fields]
+    return "\n".join(["# {", ",\n".join(lines), "# }"])
+
+
+EXTRACTION_SCHEMA = extraction_schema_for(EXTRACTION_FIELD_SPECS)
+
+SUMMARY_INSTRUCTION = (
+    "Write a concise 3-sentence claim summary that includes policy number, claimant name, "
+    "date_of_loss and amount claimed if present. Then on a new line produce one-line 'Action items:' listing docs required."
+)
+
+# map-reduce summaries (app.summarizer): per-chunk notes, then notes of notes
+CHUNK_SUMMARY_INSTRUCTION = (
+    "This is one part of a longer claim document. Summarize it in at most 5 short sentences, keeping every "
+    "policy number, name, date, amount and required document it mentions verbatim."
+)
+REDUCE_SUMMARY_INSTRUCTION = (
+    "These are summaries of consecutive parts of one claim document. Merge them into one summary of at most "
+    "5 short sentences, keeping every policy number, name, date, amount and required document verbatim."
+)
+
+_PLACEHOLDER_RE = re.compile(r"{{\s*(instruction|context|document)\s*}}")
+RETRIEVE_CHUNK_SIZE = 1000
+RETRIEVE_SEPARATOR = "\n...\n"
+TRUNCATE_MARKER = "\n[... {} characters omitted ...]\n"
+_TERM_RE = re.compile(r"[a-z0-9]{3,}")
+
+
+def limit_chars(model_id: Union[None, str, Sequence[str]] = None) -> int:
+    """Prompt size limit in characters for a model (the smallest one for a list, e.g. a cascade)."""
+    ids = [model_id] if isinstance(model_id, str) or model_id is None else list(model_id)
+    return min(PROMPT_MODEL_TOKEN_LIMITS.get(m, PROMPT_MAX_TOKENS) for m in ids or [None]) * CHARS_PER_TOKEN
+
+
+@lru_cache(maxsize=256)
+def _compile(source: str, instruction: str, context: str) -> tuple:
+    """(prefix, suffix) of a template around {{ document }}, with instruction and context filled in."""
+    if source.endswith("\n"):
+        source = source[:-1]   # as Jinja does (keep_trailing_newline=False)
+    parts, pos, side = [[], []], 0, 0
+    for m in _PLACEHOLDER_RE.finditer(source):
+        parts[side].append(source[pos:m.start()])
+        name = m.group(1)
+        if name == "document":
+            if side:
+                raise ValueError("template has more than one {{ document }}")
+            side = 1
+        else:
+            parts[side].append(instruction if name == "instruction" else context)
+        pos = m.end()
+    parts[side].append(source[pos:])
+    rest = _PLACEHOLDER_RE.sub("", source)
+    if "{{" in rest or "{%" in rest:
+        raise ValueError("only {{ instruction }}, {{ context }} and {{ document }} are supported")
+    if not side:
+        raise ValueError("template has no {{ document }}")
+    return "".join(parts[0]), "".join(parts[1])
+
+
+def _truncate(document: str, budget: int) -> str:
+    """Head and tail of `document` within `budget` characters (2/3 head)."""
+    keep = max(0, budget - len(TRUNCATE_MARKER.format(len(document))))
+    head = keep * 2 // 3
+    return "".join((document[:head], TRUNCATE_MARKER.format(len(document) - keep),
+                    document[len(document) - (keep - head):]))
+
+
+def _retrieve(document: str, query: str, budget: int) -> Optional[str]:
+    """
+    The chunks sharing most terms with `query`, in document order, within `budget` characters;
+    the first chunk (letterhead, policy and claimant block) is always kept. None if even that does not fit.
+    """
+    from app.chunker import iter_chunks
+
+    terms = set(_TERM_RE.findall(query.lower().replace("_", " ")))
+    chunks = list(iter_chunks(document, chunk_size=RETRIEVE_CHUNK_SIZE, overlap=0))
+    if not chunks or len(chunks[0]["text"]) > budget:
+        return None
+    scored = sorted(chunks[1:], key=lambda c: (-len(terms.intersection(_TERM_RE.findall(c["text"].lower()))),
+                                               c["index"]))
+    picked, used = [chunks[0]], len(chunks[0]["text"])
+    for c in scored:
+        cost = len(c["text"]) + len(RETRIEVE_SEPARATOR)
+        if used + cost <= budget:
+            picked.append(c)
+            used += cost
+    picked.sort(key=lambda c: c["index"])
+    return RETRIEVE_SEPARATOR.join(c["text"] for c in picked)
+
+
 class PromptTemplateManager:
+    # how a document that does not fit the model is reduced, per template kind
+    FIT = {"extraction": "retrieve", "summary": "truncate"}
+
     def __init__(self, use_json_extraction: bool = True):
         # choose the extraction template (JSON schema) for more reliable parseable output
         self.use_json_extraction = use_json_extraction
-        if _HAS_JINJA:
-            self.templates = {
-                "extraction": Template(EXTRACTION_TEMPLATE_JSON if use_json_extraction else EXTRACTION_TEMPLATE),
-                "summary": Template(SUMMARY_TEMPLATE)
-            }
-        else:
-            # fallback: simple format strings
-            self.templates = {
-                "extraction": EXTRACTION_TEMPLATE_JSON if use_json_extraction else EXTRACTION_TEMPLATE,
-                "summary": SUMMARY_TEMPLATE
-            }
+        self.templates = {
+            "extraction": EXTRACTION_TEMPLATE_JSON if use_json_extraction else EXTRACTION_TEMPLATE,
+            "summary": SUMMARY_TEMPLATE
+        }
+
+    def _parts(self, kind: str, instruction: str, context: Optional[str]) -> tuple:
+        if kind not in self.templates:
+            raise ValueError(f"unknown template kind: {kind}")
+        return _compile(self.templates[kind], instruction, context or "")
 
-    def render(self, kind: str, instruction: str, context: Optional[str], document: str) -> str:
+    def _fit(self, kind: str, instruction: str, document: str, budget: int) -> str:
+        if len(document) <= budget:
+            return document
+        metrics.incr(f"prompt.{kind}.fitted")
+        metrics.incr(f"prompt.{kind}.omitted_chars", len(document) - budget)
+        if self.FIT.get(kind) == "retrieve":
+            fitted = _retrieve(document, instruction, budget)
+            if fitted is not None:
+                return fitted
+        return _truncate(document, budget)
+
+    def render(self, kind: str, instruction: str, context: Optional[str], document: str,
+               model_id: Union[None, str, Sequence[str]] = None) -> str:
         """
         Render a template.
         - kind: "extraction" or "summary"
         - instruction: the instruction text to include
-        - context: optional extra context (unused by default templates)
+        - context: extraction: the schema block (extraction_schema_for; all fields if empty);
+          unused by the summary template
         - document: the document text to send to the model
+        - model_id: model (or cascade of models) the prompt must fit; PROMPT_MAX_TOKENS if None
         """
-        if kind not in self.templates:
-            raise ValueError(f"unknown template kind: {kind}")
+        return self.render_many(kind, instruction, (document,), context=context, model_id=model_id)[0]
 
-        tpl = self.templates[kind]
-        if _HAS_JINJA:
-            return tpl.render(instruction=instruction, context=context or "", document=document or "")
-        else:
-            # fallback formatting
-            return tpl.replace("{{ instruction }}", instruction).replace("{{ context }}", context or "").replace("{{ document }}", document or "")
+    def render_many(self, kind: str, instruction: str, documents: Iterable[str], context: Optional[str] = None,
+                    model_id: Union[None, str, Sequence[str]] = None) -> List[str]:
+        """render() for many documents with the same instruction (template compiled and limit looked up once)."""
+        if kind == "extraction" and self.use_json_extraction and not context:
+            context = EXTRACTION_SCHEMA
+        prefix, suffix = self._parts(kind, instruction, context)
+        budget = limit_chars(model_id) - len(prefix) - len(suffix)
+        prompts = []
+        for document in documents:
+            prompt = "".join((prefix, self._fit(kind, instruction, document or "", budget), suffix))
+            metrics.observe(f"prompt.{kind}.chars", len(prompt))
+            prompts.append(prompt)
+        return prompts
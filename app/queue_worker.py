@@ -0,0 +1,133 @@
+# app/queue_worker.py
+"""
+Worker process for the durable work queue.
+
+    python -m app.queue_worker [--concurrency 2] [--once]
+
+Leases tasks from app.work_queue, keeps the lease alive with a heartbeat
+while a task runs, and checkpoints the Textract job id when OCR starts and
+again after OCR, so a retried task (after a crash, a lost lease or a failed
+later stage) resumes the running job or skips OCR instead of paying for
+Textract again. Start more processes to scale out; SIGTERM/SIGINT finish the
+current task and exit.
+"""
+
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+import uuid
+
+from app.work_queue import get_queue
+
+POLL_INTERVAL = float(os.environ.get("QUEUE_WORKER_POLL", "1"))
+
+_stop = threading.Event()
+
+
+class _Heartbeat(threading.Thread):
+    def __init__(self, queue, task_id: str, worker_id: str):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.task_id = task_id
+        self.worker_id = worker_id
+        self.lost = False
+        self._done = threading.Event()
+
+    def run(self):
+        interval = max(1.0, self.queue.visibility / 3)
+        while not self._done.wait(interval):
+            if not self.queue.heartbeat(self.task_id, self.worker_id):
+                self.lost = True
+                return
+
+    def stop(self):
+        self._done.set()
+
+
+def run_task(queue, task: dict, worker_id: str) -> dict:
+    """Run the pipeline stages for one task, checkpointing the Textract job and OCR."""
+    from app import bedrock_usage, main
+
+    with bedrock_usage.claim():
+        return _run_task(main, queue, task, worker_id)
+
+
+def _run_task(main, queue, task: dict, worker_id: str) -> dict:
+    s3_key = task["s3_key"]
+    checkpoint = task["checkpoint"]
+    if "ocr" not in checkpoint:
+        def on_job(job_id):
+            # a retry polls this job instead of starting (and paying for) a new one
+            queue.checkpoint(task["id"], worker_id, "textract_job", job_id)
+
+        with main.stages.stage("textract"):
+            main.run_textract_worker(s3_key, job_id=checkpoint.get("textract_job"), on_job=on_job)
+        queue.checkpoint(task["id"], worker_id, "ocr")
+
+    local_txt_path, processed_key = main.download_processed_text(s3_key)
+    try:
+        return main.analyze_processed_text(s3_key, local_txt_path, processed_key)
+    finally:
+        os.remove(local_txt_path)
+
+
+def work_once(queue, worker_id: str) -> bool:
+    """Lease and run one task. Returns False if the queue had nothing ready."""
+    task = queue.lease(worker_id)
+    if task is None:
+        return False
+    print(f"[{worker_id}] task {task['id']} {task['s3_key']} attempt {task['attempts']}")
+    hb = _Heartbeat(queue, task["id"], worker_id)
+    hb.start()
+    try:
+        result = run_task(queue, task, worker_id)
+    except Exception as e:
+        hb.stop()
+        traceback.print_exc()
+        queue.fail(task["id"], worker_id, f"{type(e).__name__}: {e}")
+        return True
+    hb.stop()
+    if hb.lost or not queue.complete(task["id"], worker_id, result):
+        print(f"[{worker_id}] lost lease on {task['id']}; result discarded")
+    return True
+
+
+def worker_loop(worker_id: str, once: bool = False):
+    queue = get_queue()
+    while not _stop.is_set():
+        did_work = work_once(queue, worker_id)
+        if once and not did_work:
+            return
+        if not did_work:
+            _stop.wait(POLL_INTERVAL)
+
+
+def main(argv):
+    concurrency = int(argv[argv.index("--concurrency") + 1]) if "--concurrency" in argv else 1
+    once = "--once" in argv
+    base = f"{socket.gethostname()}-{os.getpid()}"
+
+    def _shutdown(signum, frame):
+        print("stopping after current task...")
+        _stop.set()
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+
+    threads = [
+        threading.Thread(target=worker_loop, args=(f"{base}-{i}-{uuid.uuid4().hex[:4]}", once), daemon=True)
+        for i in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    while any(t.is_alive() for t in threads):
+        time.sleep(0.5)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
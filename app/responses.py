@@ -0,0 +1,84 @@
+# app/responses.py
+"""
+Response shaping for the read endpoints.
+
+- project:  keep only the requested dotted paths of a result document
+            (?fields=claim.policy_number,validation.score)
+- compress: gzip / brotli negotiated from Accept-Encoding, applied by main's
+            after_request hook to JSON and text responses above a size floor
+
+Brotli is used only if the `brotli` package is installed; gzip otherwise.
+"""
+
+import gzip
+import hashlib
+import os
+
+try:
+    import brotli
+    _HAS_BROTLI = True
+except Exception:
+    _HAS_BROTLI = False
+
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_TYPES = ("application/json", "text/plain", "text/html")
+
+
+def parse_fields(value) -> list:
+    """'a.b, c' -> ['a.b', 'c']; empty/None -> [] (no projection)."""
+    return [p.strip() for p in (value or "").split(",") if p.strip()]
+
+
+def project(doc: dict, paths: list) -> dict:
+    """
+    Copy of `doc` with only the given dotted paths. Missing paths are omitted;
+    a path that stops at a dict keeps the whole sub-document.
+    """
+    if not paths:
+        return doc
+    out = {}
+    for path in paths:
+        parts = path.split(".")
+        node = doc
+        for part in parts:
+            if not isinstance(node, dict) or part not in node:
+                break
+            node = node[part]
+        else:
+            target = out
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = node
+    return out
+
+
+def projection_tag(version: int, paths: list) -> str:
+    """ETag value for one version of a document under one projection."""
+    spec = ",".join(sorted(paths))
+    suffix = hashlib.sha1(spec.encode("utf-8")).hexdigest()[:12] if spec else "all"
+    return f"v{version}-{suffix}"
+
+
+def negotiate_encoding(accept_encodings) -> str:
+    """'br', 'gzip' or '' from a werkzeug Accept object (request.accept_encodings)."""
+    if _HAS_BROTLI and accept_encodings.quality("br") > 0:
+        return "br"
+    if accept_encodings.quality("gzip") > 0:
+        return "gzip"
+    return ""
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+
+def should_compress(response) -> bool:
+    return (
+        response.status_code == 200
+        and not response.direct_passthrough
+        and "Content-Encoding" not in response.headers
+        and response.mimetype in COMPRESS_TYPES
+        and (response.content_length or 0) >= COMPRESS_MIN_BYTES
+    )
@@ -0,0 +1,183 @@
+# app/results_store.py
+"""
+Embedded, indexed store of processed claims (SQLite).
+
+One row per processed document, keyed by its processed text key
+(processed/<name>.txt). The Textract worker writes the row when it writes
+the S3 artifacts; /process adds the local extraction, validation and full
+response. Lookups by policy number, claim reference, date of loss or
+content digest hit an index instead of listing S3.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+RESULTS_DB = os.environ.get("RESULTS_DB", "results.db")
+
+FIELDS = ("policy_number", "claim_reference", "claimant_name", "date_of_loss", "amount_claimed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS claims (
+    processed_key   TEXT PRIMARY KEY,
+    s3_key          TEXT,
+    policy_number   TEXT,
+    claim_reference TEXT,
+    claimant_name   TEXT,
+    date_of_loss    TEXT,
+    amount_claimed  TEXT,
+    digest          TEXT,
+    extraction_json TEXT,
+    result_json     TEXT,
+    version         INTEGER NOT NULL DEFAULT 1,
+    created_at      REAL NOT NULL,
+    updated_at      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_claims_policy ON claims(policy_number);
+CREATE INDEX IF NOT EXISTS idx_claims_reference ON claims(claim_reference);
+CREATE INDEX IF NOT EXISTS idx_claims_date ON claims(date_of_loss);
+CREATE INDEX IF NOT EXISTS idx_claims_digest ON claims(digest);
+CREATE INDEX IF NOT EXISTS idx_claims_s3_key ON claims(s3_key);
+"""
+
+
+def text_digest(text: str) -> str:
+    """Content digest of processed text (sha256 hex)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResultsStore:
+    def __init__(self, path: str = RESULTS_DB):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _upsert_statement(processed_key: str, fields: Optional[dict] = None, s3_key: Optional[str] = None,
+                          digest: Optional[str] = None, extraction: Optional[dict] = None,
+                          result: Optional[dict] = None):
+        fields = fields or {}
+        now = time.time()
+        row = {
+            "processed_key": processed_key,
+            "s3_key": s3_key,
+            "digest": digest,
+            "extraction_json": json.dumps(extraction, ensure_ascii=False) if extraction is not None else None,
+            "result_json": json.dumps(result, ensure_ascii=False) if result is not None else None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for f in FIELDS:
+            v = fields.get(f)
+            row[f] = str(v).strip() if v not in (None, "") else None
+
+        cols = list(row)
+        updates = ", ".join(
+            f"{c} = COALESCE(excluded.{c}, claims.{c})" for c in cols if c not in ("processed_key", "created_at")
+        )
+        # re-upserting what is already stored (e.g. a repeated backfill) keeps the version, and so the ETags
+        changed = " OR ".join(
+            f"COALESCE(excluded.{c}, claims.{c}) IS NOT claims.{c}"
+            for c in cols if c not in ("processed_key", "created_at", "updated_at")
+        )
+        sql = (
+            f"INSERT INTO claims ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)}) "
+            f"ON CONFLICT(processed_key) DO UPDATE SET {updates}, version = claims.version + 1 WHERE {changed}"
+        )
+        return sql, [row[c] for c in cols]
+
+    def upsert(self, processed_key: str, **kwargs):
+        """
+        Insert or update a claim row (fields, s3_key, digest, extraction, result).
+        Null values never overwrite existing ones, so the worker and /process can
+        each fill in what they know. An upsert that changes nothing is a no-op.
+        """
+        sql, args = self._upsert_statement(processed_key, **kwargs)
+        with self._conn() as conn:
+            conn.execute(sql, args)
+
+    def upsert_many(self, rows: list):
+        """Bulk upsert of dicts with upsert() keyword arguments, in one transaction (used by the backfill)."""
+        with self._conn() as conn:
+            for r in rows:
+                conn.execute(*self._upsert_statement(**r))
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row, include_result: bool) -> dict:
+        d = {k: row[k] for k in row.keys() if k not in ("extraction_json", "result_json")}
+        if include_result:
+            d["extraction"] = json.loads(row["extraction_json"]) if row["extraction_json"] else None
+            d["result"] = json.loads(row["result_json"]) if row["result_json"] else None
+        return d
+
+    def get(self, processed_key: str, include_result: bool = True) -> Optional[dict]:
+        row = self._conn().execute("SELECT * FROM claims WHERE processed_key = ?", (processed_key,)).fetchone()
+        return self._to_dict(row, include_result) if row else None
+
+    def find(self, policy_number: Optional[str] = None, claim_reference: Optional[str] = None,
+             date_of_loss: Optional[str] = None, date_from: Optional[str] = None, date_to: Optional[str] = None,
+             digest: Optional[str] = None, s3_key: Optional[str] = None, limit: int = 100,
+             include_result: bool = False) -> list:
+        """Indexed lookup; all given filters are ANDed. Dates compare as ISO strings."""
+        where, args = [], []
+        for col, val in (("policy_number", policy_number), ("claim_reference", claim_reference),
+                         ("date_of_loss", date_of_loss), ("digest", digest), ("s3_key", s3_key)):
+            if val:
+                where.append(f"{col} = ?")
+                args.append(val)
+        if date_from:
+            where.append("date_of_loss >= ?")
+            args.append(date_from)
+        if date_to:
+            where.append("date_of_loss <= ?")
+            args.append(date_to)
+        if not where:
+            raise ValueError("at least one filter is required")
+        sql = f"SELECT * FROM claims WHERE {' AND '.join(where)} ORDER BY updated_at DESC LIMIT ?"
+        args.append(int(limit))
+        return [self._to_dict(r, include_result) for r in self._conn().execute(sql, args)]
+
+    def version(self, processed_key: str) -> Optional[int]:
+        """Current version of a row (bumped on every upsert that changes it) without loading its JSON; None if absent."""
+        row = self._conn().execute("SELECT version FROM claims WHERE processed_key = ?", (processed_key,)).fetchone()
+        return row[0] if row else None
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM claims").fetchone()[0]
+
+
+def record_claim(processed_key: str, **kwargs):
+    """Best-effort upsert into the process-wide store; a store failure never fails processing."""
+    try:
+        get_store().upsert(processed_key, **kwargs)
+    except Exception as e:
+        print("results store write failed:", e)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ResultsStore:
+    """Process-wide store (opened on first use)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ResultsStore()
+    return _store
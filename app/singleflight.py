@@ -0,0 +1,130 @@
+# app/singleflight.py
+"""
+In-flight request coalescing ("single flight").
+
+The first caller for a key runs the function; callers arriving while it runs
+wait for and share the same result instead of starting duplicate Textract
+jobs, S3 round trips and LLM calls. A finished result is kept for
+`retention` seconds so a late double-click is also served from it.
+
+SingleFlight is for threads (Flask); AsyncSingleFlight for the asyncio pipeline.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+SINGLE_FLIGHT_RETENTION = float(os.environ.get("SINGLE_FLIGHT_RETENTION", "30"))
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "done_at")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.done_at = None
+
+
+class SingleFlight:
+    def __init__(self, retention: float = SINGLE_FLIGHT_RETENTION, retain: Optional[Callable] = None):
+        """
+        retention: seconds a finished result stays shareable (0 = only while in flight)
+        retain: optional predicate on the result; results it rejects are not kept after completion
+        """
+        self.retention = retention
+        self.retain = retain
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def _purge(self, now: float):
+        expired = [k for k, c in self._calls.items() if c.done_at is not None and now - c.done_at > self.retention]
+        for k in expired:
+            del self._calls[k]
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) once per key. Returns (result, shared) where shared is
+        True if this caller attached to another caller's run. Exceptions are re-raised
+        in every waiting caller.
+        """
+        with self._lock:
+            self._purge(time.monotonic())
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+        finally:
+            with self._lock:
+                call.done_at = time.monotonic()
+                keep = (call.error is None and self.retention > 0
+                        and (self.retain is None or self.retain(call.result)))
+                if not keep and self._calls.get(key) is call:
+                    del self._calls[key]
+            call.event.set()
+        if call.error is not None:
+            raise call.error
+        return call.result, False
+
+    def forget(self, key):
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(1 for c in self._calls.values() if c.done_at is None)
+
+
+class AsyncSingleFlight:
+    def __init__(self, retention: float = SINGLE_FLIGHT_RETENTION, retain: Optional[Callable] = None):
+        self.retention = retention
+        self.retain = retain
+        # key -> (future, done_at)
+        self._calls = {}
+
+    def _purge(self, now: float):
+        expired = [k for k, (_, done_at) in self._calls.items()
+                   if done_at is not None and now - done_at > self.retention]
+        for k in expired:
+            del self._calls[k]
+
+    async def do(self, key, coro_fn, *args, **kwargs):
+        """
+        Async equivalent of SingleFlight.do: returns (result, shared). The run is a task of
+        its own that every caller (the first one included) awaits through asyncio.shield, so
+        a cancelled caller - e.g. a disconnected client - never cancels it for the others.
+        """
+        loop = asyncio.get_running_loop()
+        self._purge(loop.time())
+        entry = self._calls.get(key)
+        if entry is not None:
+            return await asyncio.shield(entry[0]), True
+
+        task = asyncio.create_task(coro_fn(*args, **kwargs))
+        self._calls[key] = (task, None)
+        task.add_done_callback(lambda t: self._finished(key, t))
+        return await asyncio.shield(task), False
+
+    def _finished(self, key, task: asyncio.Task):
+        if self._calls.get(key, (None,))[0] is not task:
+            return
+        keep = (not task.cancelled() and task.exception() is None and self.retention > 0
+                and (self.retain is None or self.retain(task.result())))
+        if keep:
+            self._calls[key] = (task, asyncio.get_running_loop().time())
+        else:
+            del self._calls[key]
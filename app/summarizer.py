@@ -0,0 +1,279 @@
+# app/summarizer.py
+"""
+Map-reduce summarization for long documents.
+
+map:    the text is cut with app.chunker (no overlap) and every chunk is
+        summarized in parallel (LLM calls, or the local extractive scorer)
+reduce: partial summaries are combined SUMMARY_REDUCE_FANOUT at a time,
+        level by level, until one summary is left; the last combine uses the
+        caller's final instruction
+
+Every map and reduce result is cached in SQLite keyed by (summarizer name,
+instruction, sha256 of the input), so re-summarizing an amended document
+only pays for the chunks (and reduce groups) whose text changed. The cache is
+bounded by SUMMARY_CACHE_MAX_MB (least recently used entries are evicted, as
+in app.embedding_cache).
+
+Map and reduce calls of every document run on one process-wide pool of
+SUMMARY_WORKERS threads, so concurrent claims share that bound instead of
+each starting its own pool of Bedrock calls.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from app import bedrock_usage
+from app.chunker import iter_chunks
+from app.metrics import metrics
+
+SUMMARY_MAP_REDUCE_MIN_CHARS = int(os.environ.get("SUMMARY_MAP_REDUCE_MIN_CHARS", "12000"))
+SUMMARY_CHUNK_SIZE = int(os.environ.get("SUMMARY_CHUNK_SIZE", "4000"))
+SUMMARY_REDUCE_FANOUT = int(os.environ.get("SUMMARY_REDUCE_FANOUT", "4"))
+SUMMARY_WORKERS = int(os.environ.get("SUMMARY_WORKERS", "8"))
+SUMMARY_CACHE_DB = os.environ.get("SUMMARY_CACHE_DB", "summary_cache.db")
+SUMMARY_CACHE_MAX_MB = float(os.environ.get("SUMMARY_CACHE_MAX_MB", "256"))
+EVICT_CHECK_EVERY = 200
+EVICT_TO_FRACTION = 0.9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key        TEXT PRIMARY KEY,
+    summary    TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+# added after the first release; existing cache files are migrated in place
+COLUMNS = {
+    "nbytes": "ALTER TABLE summaries ADD COLUMN nbytes INTEGER NOT NULL DEFAULT 0",
+    "last_used": "ALTER TABLE summaries ADD COLUMN last_used REAL NOT NULL DEFAULT 0",
+}
+INDEXES = "CREATE INDEX IF NOT EXISTS idx_summaries_last_used ON summaries(last_used);"
+
+
+class SummaryCache:
+    def __init__(self, path: str = SUMMARY_CACHE_DB, max_bytes: int = int(SUMMARY_CACHE_MAX_MB * 1024 * 1024)):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+            have = {row[1] for row in conn.execute("PRAGMA table_info(summaries)")}
+            for column, ddl in COLUMNS.items():
+                if column not in have:
+                    conn.execute(ddl)
+            if "nbytes" not in have:
+                conn.execute("UPDATE summaries SET nbytes = length(CAST(summary AS BLOB)), last_used = created_at")
+            conn.executescript(INDEXES)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: List[str]) -> dict:
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        for i in range(0, len(unique), 500):
+            batch = unique[i:i + 500]
+            rows = self._conn().execute(
+                f"SELECT key, summary FROM summaries WHERE key IN ({', '.join('?' for _ in batch)})", batch)
+            found.update(rows.fetchall())
+        if found:
+            with self._conn() as conn:
+                conn.executemany("UPDATE summaries SET last_used = ? WHERE key = ?",
+                                 [(time.time(), k) for k in found])
+        return found
+
+    def put_many(self, items: dict):
+        now = time.time()
+        rows = [(k, v, len(v.encode("utf-8")), now, now) for k, v in items.items()]
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO summaries (key, summary, nbytes, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows)
+        with self._writes_lock:
+            before = self._writes
+            self._writes += len(rows)
+            check = self._writes // EVICT_CHECK_EVERY > before // EVICT_CHECK_EVERY
+        if check:
+            self.evict()
+
+    def size(self) -> tuple:
+        """(entries, summary bytes)."""
+        n, total = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM summaries").fetchone()
+        return n, total
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the cache is under EVICT_TO_FRACTION of max_bytes."""
+        _, total = self.size()
+        if total <= self.max_bytes:
+            return 0
+        target = total - int(self.max_bytes * EVICT_TO_FRACTION)
+        freed = 0
+        with self._conn() as conn:
+            rows = conn.execute("SELECT key, nbytes FROM summaries ORDER BY last_used").fetchall()
+            doomed = []
+            for key, nbytes in rows:
+                if freed >= target:
+                    break
+                doomed.append((key,))
+                freed += nbytes
+            conn.executemany("DELETE FROM summaries WHERE key = ?", doomed)
+        metrics.incr("summary_cache.evictions", len(doomed))
+        return len(doomed)
+
+
+def _key(name: str, instruction: str, text: str) -> str:
+    h = hashlib.sha256()
+    for part in (name, instruction, text):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class MapReduceSummarizer:
+    """
+    summarize_chunk(text) -> str          map step
+    combine(parts, final: bool) -> str    reduce step (final=True for the last combine)
+    `name` must change whenever the model or instructions behind these callables change.
+    """
+
+    def __init__(self, name: str, summarize_chunk: Callable[[str], str],
+                 combine: Callable[[List[str], bool], str], chunk_size: int = SUMMARY_CHUNK_SIZE,
+                 fanout: int = SUMMARY_REDUCE_FANOUT, pool: Optional[ThreadPoolExecutor] = None,
+                 cache: Optional[SummaryCache] = None, model_id: Optional[str] = None):
+        self.name = name
+        self.model_id = model_id   # set for LLM summarizers: cache hits are recorded in app.bedrock_usage
+        self.summarize_chunk = summarize_chunk
+        self.combine = combine
+        self.chunk_size = chunk_size
+        self.fanout = max(2, fanout)
+        self.pool = pool   # None: the shared get_pool()
+        self.cache = cache
+
+    @property
+    def kind(self) -> str:
+        return self.name.split(":", 1)[0]
+
+    def _cached_map(self, pool, stage: str, fn, args: list, key_texts: list, stats: dict) -> list:
+        """fn(arg) for every arg, in parallel, skipping the ones whose key text is cached."""
+        keys = [_key(self.name, stage, text) for text in key_texts]
+        cached = self.cache.get_many(keys) if self.cache is not None else {}
+        todo = {}
+        for k, arg in zip(keys, args):
+            if k not in cached:
+                todo.setdefault(k, arg)
+        stats["cache_hits"] += len(keys) - len(todo)
+        stats["computed"] += len(todo)
+        if self.model_id:
+            for _ in range(len(keys) - len(todo)):
+                bedrock_usage.record_cache_hit(self.model_id, "text")
+        fresh = dict(zip(todo, pool.map(bedrock_usage.bind(fn), todo.values()))) if todo else {}
+        if fresh and self.cache is not None:
+            self.cache.put_many(fresh)
+        return [cached[k] if k in cached else fresh[k] for k in keys]
+
+    def summarize(self, text: str) -> dict:
+        """Returns {"summary", "chunks", "levels", "cache_hits", "computed", "seconds"}."""
+        start = time.perf_counter()
+        chunks = [c["text"] for c in iter_chunks(text, chunk_size=self.chunk_size, overlap=0)] or [text]
+        stats = {"cache_hits": 0, "computed": 0}
+        pool = self.pool or get_pool()
+        # a single chunk goes straight to the final combine (same as a one-pass summary)
+        partials = chunks if len(chunks) == 1 else \
+            self._cached_map(pool, "map", self.summarize_chunk, chunks, chunks, stats)
+        levels = 0
+        while len(partials) > 1 or levels == 0:
+            final = len(partials) <= self.fanout
+            groups = [partials[i:i + self.fanout] for i in range(0, len(partials), self.fanout)]
+            partials = self._cached_map(
+                pool, "reduce-final" if final else "reduce",
+                lambda parts, final=final: self.combine(parts, final),
+                groups, ["\x1e".join(g) for g in groups], stats)
+            levels += 1
+        seconds = time.perf_counter() - start
+        metrics.incr(f"summary.{self.kind}.cache_hits", stats["cache_hits"])
+        metrics.incr(f"summary.{self.kind}.computed", stats["computed"])
+        metrics.observe(f"summary.{self.kind}.seconds", seconds)
+        return {"summary": partials[0], "chunks": len(chunks), "levels": levels, "seconds": seconds, **stats}
+
+
+def use_map_reduce(text: str) -> bool:
+    return len(text) >= SUMMARY_MAP_REDUCE_MIN_CHARS
+
+
+_cache = None
+_cache_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ThreadPoolExecutor:
+    """
+    Process-wide pool for map/reduce calls (created on first use). Its tasks never
+    submit to it themselves, so callers blocking on it cannot deadlock.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=SUMMARY_WORKERS, thread_name_prefix="summary")
+    return _pool
+
+
+def get_cache() -> SummaryCache:
+    """Process-wide summary cache (opened on first use)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SummaryCache()
+    return _cache
+
+
+def llm_summarizer(invoker, ptm, final_instruction: str) -> MapReduceSummarizer:
+    """Bedrock map-reduce summarizer; a failed call raises, so it is never cached."""
+    from app.prompt_manager import CHUNK_SUMMARY_INSTRUCTION, REDUCE_SUMMARY_INSTRUCTION
+
+    def generate(instruction: str, document: str) -> str:
+        res = invoker.generate(ptm.render("summary", instruction=instruction, context="", document=document,
+                                          model_id=invoker.text_model_id))
+        if not res.get("success"):
+            raise RuntimeError(res.get("error") or "bedrock disabled or failed")
+        return (res.get("text") or "").strip()
+
+    def combine(parts: List[str], final: bool) -> str:
+        return generate(final_instruction if final else REDUCE_SUMMARY_INSTRUCTION, "\n\n".join(parts))
+
+    version = hashlib.sha256("\0".join(
+        (CHUNK_SUMMARY_INSTRUCTION, REDUCE_SUMMARY_INSTRUCTION, final_instruction)).encode("utf-8")).hexdigest()[:12]
+    return MapReduceSummarizer(f"llm:{invoker.text_model_id}:{version}",
+                               lambda chunk: generate(CHUNK_SUMMARY_INSTRUCTION, chunk), combine, cache=get_cache(),
+                               model_id=invoker.text_model_id)
+
+
+def summarize_llm(invoker, ptm, instruction: str, text: str) -> dict:
+    """
+    LLM summary in the shape of ModelInvoker.generate ({"success", "text", ...}): one call for short
+    documents, map-reduce (with "map_reduce" stats) above SUMMARY_MAP_REDUCE_MIN_CHARS.
+    """
+    if not use_map_reduce(text):
+        return invoker.generate(ptm.render("summary", instruction=instruction, context="", document=text,
+                                            model_id=invoker.text_model_id))
+    try:
+        out = llm_summarizer(invoker, ptm, instruction).summarize(text)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+    summary = out.pop("summary")
+    return {"success": True, "text": summary, "map_reduce": out}
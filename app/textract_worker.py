@@ -4,17 +4,25 @@ import os
 import time
 import json
 import re
+import uuid
 import boto3
-from datetime import datetime
 from dotenv import load_dotenv
 from app.bedrock_client import create_embedding
+from app.chunker import iter_page_chunks
+from app import artifacts, native_text, pipeline_stages
+from app.block_store import BlockStore, BlockStoreBuilder
+from app.date_parser import DateNormalizer
+from app.results_store import record_claim, text_digest
 
 load_dotenv()
 
 REGION = os.environ.get("AWS_REGION", "ap-south-1")
 BUCKET = os.environ.get("CLAIM_BUCKET", "aws-task1-1-sahil")
+# a Textract job that has not finished by then fails the document instead of blocking its thread forever
+TEXTRACT_POLL_TIMEOUT = float(os.environ.get("TEXTRACT_POLL_TIMEOUT", "900"))
 
 textract = boto3.client("textract", region_name=REGION)
+_DATES = DateNormalizer(fallback="year")
 s3 = boto3.client("s3", region_name=REGION)
 
 
@@ -25,26 +33,26 @@ def start_text_detection(s3_bucket, s3_key):
     return resp["JobId"]
 
 
-def poll_job(job_id, poll_interval=5):
+def poll_job(job_id, poll_interval=5, timeout=TEXTRACT_POLL_TIMEOUT):
+    deadline = time.monotonic() + timeout
     while True:
         res = textract.get_document_text_detection(JobId=job_id)
         status = res.get("JobStatus")
         print("Textract job status:", status)
         if status in ("SUCCEEDED", "FAILED"):
             return res
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"textract job {job_id} did not finish in {timeout}s")
         time.sleep(poll_interval)
 
 
-def extract_text_from_blocks(res):
-    lines = []
-    for b in res.get("Blocks", []) or []:
-        if b.get("BlockType") == "LINE" and "Text" in b:
-            lines.append(b["Text"])
-    return "\n".join(lines)
+def extract_pages_from_blocks(res):
+    """Return [(page_number, page_text), ...] from LINE blocks, in page order."""
+    return BlockStore.from_response(res).pages()
 
 
-def chunk_text(text, chunk_size=1000):
-    return [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
+def extract_text_from_blocks(res):
+    return "\n".join(text for _, text in extract_pages_from_blocks(res))
 
 
 # --- NEW: field extraction utilities ---
@@ -54,40 +62,19 @@ def _clean_number_string(s: str) -> str:
     return re.sub(r"[^\d\.]", "", s)
 
 
-def _try_parse_date(date_str: str):
-    """Try multiple common date formats; return 'YYYY-MM-DD' or None."""
-    date_str = date_str.strip()
-    # Common formats to try (expand if needed)
-    formats = [
-        "%Y-%m-%d",
-        "%d-%m-%Y",
-        "%d/%m/%Y",
-        "%d %B %Y",    # 28 November 2025
-        "%d %b %Y",    # 28 Nov 2025
-        "%B %d %Y",    # November 28 2025
-        "%b %d %Y",
-        "%d %b, %Y",
-        "%d %B, %Y",
-        "%d.%m.%Y",
-    ]
-    # remove ordinal suffixes (1st, 2nd, 3rd, 4th)
-    date_str = re.sub(r'(\d)(st|nd|rd|th)', r'\1', date_str, flags=re.IGNORECASE)
-    for fmt in formats:
-        try:
-            d = datetime.strptime(date_str, fmt)
-            return d.strftime("%Y-%m-%d")
-        except Exception:
-            continue
-    # fallback: try to extract yyyy and assume if present
-    m = re.search(r"(20\d{2})", date_str)
-    if m:
-        return m.group(1)
-    return None
+def _try_parse_date(date_str: str, source=None):
+    """Return 'YYYY-MM-DD', a bare 'YYYY' if only a year is present, or None."""
+    return _DATES.normalize(date_str, source=source)
 
 
-def extract_fields(text: str) -> dict:
+# numeric date tokens, the evidence for a document's day/month order
+_NUMERIC_DATE_RE = re.compile(r"\b\d{1,2}[-/.]\d{1,2}[-/.]\d{4}\b")
+
+
+def extract_fields(text: str, source=None) -> dict:
     """
-    Extract common claim fields from OCR text.
+    Extract common claim fields from OCR text. `source` identifies the document
+    (e.g. its processed key; the text itself if omitted) for learning its day/month order.
     Returns dict with keys:
     - policy_number
     - claimant_name
@@ -103,6 +90,9 @@ def extract_fields(text: str) -> dict:
     """
     # Normalized lowercase for searching keywords, but keep original for captures
     text_lower = text.lower()
+    # learn this document's day/month order from all its numeric dates
+    source = source if source is not None else hash(text)
+    _DATES.learn(_NUMERIC_DATE_RE.findall(text), source=source)
 
     def single_line_search(label_patterns):
         """Return line text matching any of the label patterns (case-insensitive)."""
@@ -117,7 +107,7 @@ def extract_fields(text: str) -> dict:
         # First try same-line capture
         m = re.search(rf"{label_regex}\s*[:\-]\s*(.+)", text, flags=re.IGNORECASE)
         if m:
-            return m.group(1).strip()
+            return m.groups()[-1].strip()   # the value; earlier groups belong to label_regex
         # If pattern not on same line, check lines
         lines = text.splitlines()
         for i, line in enumerate(lines):
@@ -155,11 +145,11 @@ def extract_fields(text: str) -> dict:
     # Date of Loss
     date_val = search_after_label(r"(date\s*of\s*loss|date\s*of\s*damage|date\s*of\s*incident|date)")
     if date_val:
-        parsed_date = _try_parse_date(date_val)
+        parsed_date = _try_parse_date(date_val, source)
     else:
         # try to find any date-like token near words 'loss' or 'damage'
         m = re.search(r"(?:loss|damage|incident)[^\n]{0,40}(\d{1,2}(?:[\/\-\.\s]\w+){1,2}\d{2,4}|20\d{2})", text, flags=re.IGNORECASE)
-        parsed_date = _try_parse_date(m.group(1)) if m else None
+        parsed_date = _try_parse_date(m.group(1), source) if m else None
 
     # Location
     location = search_after_label(r"(location\s*of\s*loss|location|place)")
@@ -222,33 +212,142 @@ def extract_fields(text: str) -> dict:
 # --- End extraction utilities ---
 
 
+def processed_key_for(s3_key: str) -> str:
+    """raw/<name>.pdf -> processed/<name>.txt"""
+    return s3_key.replace("raw/", "processed/").rsplit(".", 1)[0] + ".txt"
+
+
+def embed_chunks(pages) -> list:
+    """
+    Chunk [(page, text), ...] and create an embedding per chunk (vector may be None if Bedrock disabled).
+    Each entry keeps the chunk's page and character offsets into the full text.
+    """
+    return [
+        {"chunk": c["text"], "vector": create_embedding(c["text"]), "page": c["page"], "start": c["start"], "end": c["end"]}
+        for c in iter_page_chunks(pages)
+    ]
+
+
+def write_processed_artifacts(processed_key: str, text: str, embeddings: list, bucket: str = BUCKET, s3_client=None,
+                              s3_key: str = None) -> dict:
+    """
+    Write processed/<name>.txt, .extraction.json and .emb.json to S3 (app.artifacts layout:
+    text stored once, spans/chunks as offsets, optionally compressed) and record the claim
+    in the results store. Returns the extracted fields.
+    """
+    client = s3_client or s3
+    digest = text_digest(text)
+    client.put_object(Bucket=bucket, **artifacts.text_put_kwargs(processed_key, text))
+    print("Wrote processed text to", processed_key)
+
+    extracted = extract_fields(text, source=processed_key)
+    client.put_object(Bucket=bucket, **artifacts.extraction_put_kwargs(processed_key, extracted, text, digest))
+    print("Wrote extraction JSON to", artifacts.extraction_key_for(processed_key))
+
+    client.put_object(Bucket=bucket, **artifacts.embeddings_put_kwargs(processed_key, embeddings, text, digest))
+    print("Wrote embeddings to", artifacts.embeddings_key_for(processed_key))
+
+    record_claim(processed_key, fields=extracted, s3_key=s3_key, digest=digest, extraction=extracted)
+    return extracted
+
+
+def ocr_blocks(s3_bucket, s3_key, job_id=None, on_job=None):
+    """
+    Run Textract on a document; returns a BlockStore (lines with page, geometry and
+    confidence) or None on failure. Follows NextToken so documents over 1000 blocks
+    are complete; each response page is folded into the store and dropped.
+
+    job_id resumes polling a job started earlier (e.g. by a queue worker that lost its
+    lease) instead of paying for a new one; on_job(job_id) is called when a job is started.
+    """
+    res = None
+    if job_id:
+        try:
+            res = poll_job(job_id)
+            job = job_id
+        except textract.exceptions.InvalidJobIdException:
+            print("Textract job", job_id, "expired; starting a new one")
+    if res is None:
+        job = start_text_detection(s3_bucket, s3_key)
+        if on_job is not None:
+            on_job(job)
+        res = poll_job(job)
+    if res.get("JobStatus") != "SUCCEEDED":
+        return None
+    builder = BlockStoreBuilder()
+    while True:
+        builder.add(res.get("Blocks"))
+        token = res.get("NextToken")
+        if not token:
+            return builder.build()
+        res = textract.get_document_text_detection(JobId=job, NextToken=token)
+
+
+def ocr_pages(s3_bucket, s3_key, job_id=None, on_job=None):
+    """Run Textract on a document; returns [(page, text), ...] or None on failure."""
+    store = ocr_blocks(s3_bucket, s3_key, job_id=job_id, on_job=on_job)
+    return store.pages() if store is not None else None
+
+
+def subset_key_for(s3_key: str) -> str:
+    """Temporary key for the OCR-only subset of a document."""
+    basename = s3_key.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+    return f"tmp/ocr/{basename}-{uuid.uuid4().hex[:8]}.pdf"
+
+
+def extract_document_pages(s3_key: str, bucket: str = BUCKET, job_id=None, on_job=None):
+    """
+    Pre-OCR classifier stage: use the PDF's own text layer where it is good,
+    send only image-only / low-quality pages to Textract, merge in page order.
+    Returns [(page, text), ...] or None if Textract failed.
+    job_id / on_job: see ocr_blocks (the page plan is deterministic, so a resumed
+    job covers the same pages).
+    """
+    if not (native_text.available() and s3_key.lower().endswith(".pdf")):
+        return ocr_pages(bucket, s3_key, job_id=job_id, on_job=on_job)
+
+    pdf_bytes = s3.get_object(Bucket=bucket, Key=s3_key)["Body"].read()
+    native, ocr_numbers = native_text.plan_ocr(pdf_bytes)
+    if not native:
+        return ocr_pages(bucket, s3_key, job_id=job_id, on_job=on_job)
+    if not ocr_numbers:
+        print("Native text layer used for all", len(native), "pages; skipping Textract")
+        return native
+
+    print("Native text for pages", [p for p, _ in native], "- Textract for pages", ocr_numbers)
+    subset_key = subset_key_for(s3_key)
+    s3.put_object(Bucket=bucket, Key=subset_key, Body=native_text.build_subset_pdf(pdf_bytes, ocr_numbers))
+    try:
+        pages = ocr_pages(bucket, subset_key, job_id=job_id, on_job=on_job)
+    finally:
+        s3.delete_object(Bucket=bucket, Key=subset_key)
+    if pages is None:
+        return None
+    return native_text.merge_pages(native, pages, ocr_numbers)
+
+
+def process_document(s3_key: str, bucket: str = BUCKET, job_id=None, on_job=None):
+    """
+    Extract text (native text layer and/or Textract) and write the processed artifacts.
+    Returns the processed text key, or None if Textract failed. job_id / on_job: see ocr_blocks.
+    """
+    etag = s3.head_object(Bucket=bucket, Key=s3_key).get("ETag", "").strip('"')
+    pages = extract_document_pages(s3_key, bucket=bucket, job_id=job_id, on_job=on_job)
+    if pages is None:
+        return None
+    text = "\n".join(page_text for _, page_text in pages)
+    processed_key = processed_key_for(s3_key)
+    embeddings = embed_chunks(pages)
+    write_processed_artifacts(processed_key, text, embeddings, bucket=bucket, s3_key=s3_key)
+    # ocr/chunk/embed checkpoints for scripts.reprocess; extract/summarize are added by the analysis step
+    pipeline_stages.record_stages(s3, bucket, processed_key,
+                                  pipeline_stages.ingest_entries(etag, text, pages, embeddings), s3_key=s3_key)
+    return processed_key
+
+
 if __name__ == "__main__":
     # Replace sample_key with an actual S3 key you got from upload
     sample_key = os.environ.get("SAMPLE_S3_KEY", "raw/sample-claim.pdf")
     print("Processing", sample_key)
-    job = start_text_detection(BUCKET, sample_key)
-    res = poll_job(job)
-    if res.get("JobStatus") == "SUCCEEDED":
-        text = extract_text_from_blocks(res)
-        processed_key = sample_key.replace("raw/", "processed/").rsplit(".", 1)[0] + ".txt"
-        s3.put_object(Bucket=BUCKET, Key=processed_key, Body=text.encode("utf-8"))
-        print("Wrote processed text to", processed_key)
-
-        # --- NEW: write extracted fields JSON to S3 ---
-        extracted = extract_fields(text)
-        json_key = processed_key.replace(".txt", ".extraction.json")
-        s3.put_object(Bucket=BUCKET, Key=json_key, Body=json.dumps(extracted, indent=2).encode("utf-8"))
-        print("Wrote extraction JSON to", json_key)
-        # --- end new ---
-
-        # chunk + create embeddings (embedding may be None if Bedrock disabled)
-        chunks = chunk_text(text)
-        embeddings = []
-        for c in chunks:
-            vec = create_embedding(c)
-            embeddings.append({"chunk": c, "vector": vec})
-        emb_key = processed_key.replace(".txt", ".emb.json")
-        s3.put_object(Bucket=BUCKET, Key=emb_key, Body=json.dumps(embeddings).encode("utf-8"))
-        print("Wrote embeddings to", emb_key)
-    else:
+    if process_document(sample_key, job_id=os.environ.get("SAMPLE_TEXTRACT_JOB_ID")) is None:
         print("Textract failed or did not finish.")
@@ -0,0 +1,213 @@
+# app/work_queue.py
+"""
+Durable, SQLite-backed work queue (local stand-in for SQS).
+
+Tasks are leased with a visibility timeout: a worker that dies mid-task
+simply stops extending its lease and the task becomes visible again for
+another worker. Failed tasks are retried with exponential backoff and moved
+to the dead-letter state after `max_attempts`. Workers checkpoint per stage
+so a retried task resumes after the last completed stage (e.g. skips OCR).
+
+Any number of worker processes on the host can share the queue file.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+
+WORK_QUEUE_DB = os.environ.get("WORK_QUEUE_DB", "work_queue.db")
+WORK_QUEUE_VISIBILITY = float(os.environ.get("WORK_QUEUE_VISIBILITY", "300"))
+WORK_QUEUE_MAX_ATTEMPTS = int(os.environ.get("WORK_QUEUE_MAX_ATTEMPTS", "5"))
+WORK_QUEUE_BACKOFF = float(os.environ.get("WORK_QUEUE_BACKOFF", "10"))
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id           TEXT PRIMARY KEY,
+    s3_key       TEXT NOT NULL,
+    priority     INTEGER NOT NULL DEFAULT 0,
+    status       TEXT NOT NULL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner  TEXT,
+    lease_until  REAL,
+    checkpoint   TEXT,
+    last_error   TEXT,
+    result_json  TEXT,
+    created_at   REAL NOT NULL,
+    updated_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_ready ON tasks(status, priority, available_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_lease ON tasks(status, lease_until);
+CREATE INDEX IF NOT EXISTS idx_tasks_s3_key ON tasks(s3_key);
+"""
+
+
+class WorkQueue:
+    def __init__(self, path: str = WORK_QUEUE_DB, visibility: float = WORK_QUEUE_VISIBILITY,
+                 max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS, backoff: float = WORK_QUEUE_BACKOFF):
+        self.path = path
+        self.visibility = visibility
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # autocommit mode; lease() opens its own IMMEDIATE transaction
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        d = dict(row)
+        d["checkpoint"] = json.loads(d["checkpoint"]) if d["checkpoint"] else {}
+        d["result"] = json.loads(d.pop("result_json")) if d.get("result_json") else None
+        return d
+
+    def enqueue(self, s3_key: str, priority: str = "interactive", max_attempts: Optional[int] = None) -> str:
+        task_id = uuid.uuid4().hex
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO tasks (id, s3_key, priority, status, max_attempts, available_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+            (task_id, s3_key, PRIORITIES.get(priority, 0), max_attempts or self.max_attempts, now, now, now),
+        )
+        return task_id
+
+    def lease(self, worker_id: str, visibility: Optional[float] = None) -> Optional[dict]:
+        """
+        Claim the next ready task (queued and due, or leased with an expired lease).
+        Returns the task dict or None. Tasks whose attempts are used up go to 'dead'.
+        """
+        visibility = visibility or self.visibility
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM tasks WHERE (status = 'queued' AND available_at <= ?) "
+                "OR (status = 'leased' AND lease_until < ?) ORDER BY priority, available_at LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            if row["attempts"] >= row["max_attempts"]:
+                conn.execute(
+                    "UPDATE tasks SET status = 'dead', lease_owner = NULL, updated_at = ?, "
+                    "last_error = COALESCE(last_error, 'lease expired') WHERE id = ?",
+                    (now, row["id"]),
+                )
+                conn.execute("COMMIT")
+                return self.lease(worker_id, visibility)
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_until = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE id = ?",
+                (worker_id, now + visibility, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row["id"])
+
+    def _owned_update(self, task_id: str, worker_id: str, sql: str, args: tuple) -> bool:
+        cur = self._conn().execute(
+            f"UPDATE tasks SET {sql}, updated_at = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            args + (time.time(), task_id, worker_id),
+        )
+        return cur.rowcount == 1
+
+    def heartbeat(self, task_id: str, worker_id: str, visibility: Optional[float] = None) -> bool:
+        """Extend the lease; False means the lease was lost to another worker."""
+        return self._owned_update(task_id, worker_id, "lease_until = ?",
+                                  (time.time() + (visibility or self.visibility),))
+
+    def checkpoint(self, task_id: str, worker_id: str, stage: str, data=None) -> bool:
+        """Record a completed stage (and its output) so a retry resumes after it."""
+        task = self.get(task_id)
+        if task is None:
+            return False
+        cp = task["checkpoint"]
+        cp[stage] = data if data is not None else True
+        return self._owned_update(task_id, worker_id, "checkpoint = ?", (json.dumps(cp),))
+
+    def complete(self, task_id: str, worker_id: str, result=None) -> bool:
+        return self._owned_update(task_id, worker_id, "status = 'done', lease_owner = NULL, result_json = ?",
+                                  (json.dumps(result) if result is not None else None,))
+
+    def fail(self, task_id: str, worker_id: str, error: str) -> bool:
+        """Retry with exponential backoff, or dead-letter once attempts are used up."""
+        task = self.get(task_id)
+        if task is None:
+            return False
+        if task["attempts"] >= task["max_attempts"]:
+            return self._owned_update(task_id, worker_id, "status = 'dead', lease_owner = NULL, last_error = ?",
+                                      (error,))
+        delay = self.backoff * (2 ** (task["attempts"] - 1))
+        return self._owned_update(
+            task_id, worker_id, "status = 'queued', lease_owner = NULL, available_at = ?, last_error = ?",
+            (time.time() + delay, error),
+        )
+
+    def requeue(self, task_id: str) -> bool:
+        """Move a dead-lettered task back to the queue with fresh attempts."""
+        cur = self._conn().execute(
+            "UPDATE tasks SET status = 'queued', attempts = 0, available_at = ?, updated_at = ? "
+            "WHERE id = ? AND status = 'dead'",
+            (time.time(), time.time(), task_id),
+        )
+        return cur.rowcount == 1
+
+    def get(self, task_id: str) -> Optional[dict]:
+        row = self._conn().execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def active_for(self, s3_key: str) -> Optional[dict]:
+        """Newest queued or leased task for an S3 key, or None."""
+        row = self._conn().execute(
+            "SELECT * FROM tasks WHERE s3_key = ? AND status IN ('queued', 'leased') "
+            "ORDER BY created_at DESC LIMIT 1", (s3_key,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> list:
+        if status:
+            rows = self._conn().execute(
+                "SELECT * FROM tasks WHERE status = ? ORDER BY updated_at DESC LIMIT ?", (status, limit))
+        else:
+            rows = self._conn().execute("SELECT * FROM tasks ORDER BY updated_at DESC LIMIT ?", (limit,))
+        return [self._to_dict(r) for r in rows]
+
+    def stats(self) -> dict:
+        rows = self._conn().execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        out = {"queued": 0, "leased": 0, "done": 0, "dead": 0}
+        out.update({status: n for status, n in rows})
+        return out
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue() -> WorkQueue:
+    """Process-wide queue (opened on first use)."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = WorkQueue()
+    return _queue
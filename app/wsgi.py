@@ -0,0 +1,17 @@
+# app/wsgi.py
+"""
+Production WSGI entry point.
+
+    gunicorn -c gunicorn.conf.py app.wsgi:application
+
+gunicorn.conf.py sets preload_app, so this module is imported once in the
+master: heavy imports (boto3, scikit-learn, numpy, pypdf) and AWS clients are
+warmed here and shared copy-on-write by every forked worker instead of being
+paid per worker (or per request).
+"""
+
+from app.main import app, warm_up
+
+warm_up()
+
+application = app
@@ -0,0 +1,22 @@
+# gunicorn.conf.py
+# gunicorn -c gunicorn.conf.py app.wsgi:application
+import os
+
+from app.admission import request_threads
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+# threads per worker; admission control and stage caps are per process. With fewer threads
+# than running + queued claims, bursts wait in the socket backlog and never get a 429.
+threads = int(os.environ.get("WEB_THREADS") or request_threads())
+# import app.wsgi (and warm up) once in the master, then fork
+preload_app = True
+# Textract jobs can run for minutes when processed in-process
+timeout = int(os.environ.get("WEB_TIMEOUT", "900"))
+graceful_timeout = 30
+accesslog = "-"
+
+
+def post_fork(server, worker):
+    # SQLite stores and the work queue open per-process connections lazily on first use
+    server.log.info("worker %s forked with warm imports and clients", worker.pid)
@@ -0,0 +1,104 @@
+# scripts/backfill_results.py
+"""
+Populate the results store from existing processed/ artifacts in S3.
+
+For every processed/<name>.extraction.json the extraction is loaded and the
+matching processed/<name>.txt is hashed for the content digest. Both artifact
+layouts (original and app.artifacts v2, plain or compressed) are read.
+
+    python -m scripts.backfill_results [--prefix processed/] [--workers 16] [--batch 500] [--near-dup]
+
+--near-dup also indexes each document's MinHash signature for duplicate detection.
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import boto3
+
+from app import artifacts
+from app.results_store import get_store, text_digest
+from app.near_dup import get_index, minhash
+
+BUCKET = os.environ.get("CLAIM_BUCKET", "claim-documents-poc-S")
+REGION = os.environ.get("AWS_REGION", "ap-south-1")
+
+s3 = boto3.client("s3", region_name=REGION)
+
+
+def iter_extraction_keys(prefix):
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=BUCKET, Prefix=prefix):
+        for obj in page.get("Contents", []) or []:
+            if obj["Key"].endswith(".extraction.json"):
+                yield obj["Key"]
+
+
+def load_row(extraction_key):
+    processed_key = extraction_key[: -len(".extraction.json")] + ".txt"
+    doc = json.loads(artifacts.get_artifact(s3, BUCKET, extraction_key))
+    text, digest, sig = None, None, None
+    try:
+        text = artifacts.get_artifact(s3, BUCKET, processed_key).decode("utf-8")
+        digest = text_digest(text)
+        sig = minhash(text)
+    except Exception as e:
+        print("no processed text for", extraction_key, "-", e)
+    # old layout: the field dict itself; v2: fields + spans into the text
+    extraction = artifacts.load_extraction(doc, text)
+    return {"processed_key": processed_key, "fields": extraction, "digest": digest, "extraction": extraction}, sig
+
+
+def _safe_load_row(extraction_key):
+    try:
+        return load_row(extraction_key)
+    except Exception as e:
+        print("failed:", extraction_key, "-", e)
+        return None
+
+
+def _arg(argv, name, default):
+    return argv[argv.index(name) + 1] if name in argv else default
+
+
+def main(argv):
+    prefix = _arg(argv, "--prefix", "processed/")
+    workers = int(_arg(argv, "--workers", "16"))
+    batch_size = int(_arg(argv, "--batch", "500"))
+    near_dup = "--near-dup" in argv
+    store = get_store()
+    index = get_index() if near_dup else None
+
+    start = time.time()
+    done, failed = 0, 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # bounded windows so millions of keys never sit in memory at once
+        keys = iter_extraction_keys(prefix)
+        while True:
+            window = list(islice(keys, batch_size))
+            if not window:
+                break
+            rows, sigs = [], []
+            for loaded in pool.map(_safe_load_row, window):
+                if loaded is None:
+                    failed += 1
+                    continue
+                row, sig = loaded
+                rows.append(row)
+                if sig is not None:
+                    sigs.append((row["processed_key"], sig))
+            store.upsert_many(rows)
+            if index is not None:
+                index.add_many(sigs)
+            done += len(rows)
+            print(f"{done} rows ({done / (time.time() - start):.0f}/s)")
+    print(f"=== backfilled {done} claims ({failed} failed) into {store.path} in {time.time() - start:.1f}s ===")
+    return 0 if not failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,114 @@
+# scripts/bench_blocks.py
+"""
+Memory and lookup benchmark: Textract Blocks as dicts vs app.block_store.BlockStore.
+
+    python -m scripts.bench_blocks [n_blocks]
+
+Builds a synthetic GetDocumentTextDetection result (LINE blocks with their
+WORD children, the shape Textract returns), measures the retained memory of
+the parsed dict list and of the BlockStore built from it with tracemalloc, and
+times "value right of label on page N" against a linear scan of the dicts.
+"""
+
+import json
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+from app.block_store import BlockStore
+
+LABELS = ["Policy Number", "Claimant Name", "Date of Loss", "Amount Claimed", "Claim Reference", "Location"]
+WORDS = "the insured vehicle was damaged during heavy rain near the market road and towed to a garage".split()
+LINES_PER_PAGE = 50
+
+
+def _block(block_type, text, page, left, top, width, height):
+    return {
+        "BlockType": block_type,
+        "Confidence": random.uniform(90, 99.9),
+        "Text": text,
+        "Geometry": {
+            "BoundingBox": {"Width": width, "Height": height, "Left": left, "Top": top},
+            "Polygon": [{"X": left, "Y": top}, {"X": left + width, "Y": top},
+                        {"X": left + width, "Y": top + height}, {"X": left, "Y": top + height}],
+        },
+        "Id": str(uuid.uuid4()),
+        "Page": page,
+    }
+
+
+def make_response(n_blocks: int) -> bytes:
+    """Serialized response, so the dict form is measured as boto3 would parse it."""
+    random.seed(7)
+    blocks, line_no = [], 0
+    while len(blocks) < n_blocks:
+        page, row = line_no // LINES_PER_PAGE + 1, line_no % LINES_PER_PAGE
+        top, height = 0.05 + row * 0.018, 0.012
+        if row < len(LABELS):
+            pairs = [(LABELS[row] + ":", 0.08, 0.2), (f"VAL-{page}-{row}", 0.45, 0.15)]
+        else:
+            pairs = [(" ".join(random.choices(WORDS, k=random.randint(5, 12))), 0.08, 0.8)]
+        for text, left, width in pairs:
+            line = _block("LINE", text, page, left, top, width, height)
+            words = [_block("WORD", w, page, left, top, width / 4, height) for w in text.split()]
+            line["Relationships"] = [{"Type": "CHILD", "Ids": [w["Id"] for w in words]}]
+            blocks.append(line)
+            blocks.extend(words)
+        line_no += 1
+    return json.dumps({"JobStatus": "SUCCEEDED", "Blocks": blocks[:n_blocks]}).encode("utf-8")
+
+
+def measure(fn):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = fn()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return obj, retained
+
+
+def scan_value_right_of(blocks, label, page):
+    """Baseline: rescan every dict for the label, then for a line to its right in the same band."""
+    lines = [b for b in blocks if b["BlockType"] == "LINE" and b["Page"] == page]
+    for b in lines:
+        if label.lower() in b["Text"].lower():
+            box = b["Geometry"]["BoundingBox"]
+            cy = box["Top"] + box["Height"] / 2
+            right = [o for o in lines if o is not b
+                     and abs(o["Geometry"]["BoundingBox"]["Top"] + o["Geometry"]["BoundingBox"]["Height"] / 2 - cy)
+                     <= box["Height"] / 2
+                     and o["Geometry"]["BoundingBox"]["Left"] >= box["Left"] + box["Width"] - box["Height"]]
+            if right:
+                return min(right, key=lambda o: o["Geometry"]["BoundingBox"]["Left"])["Text"]
+    return None
+
+
+def main(argv):
+    n = int(argv[0]) if argv else 10000
+    payload = make_response(n)
+    res, dict_bytes = measure(lambda: json.loads(payload))
+    BlockStore.from_response({"Blocks": res["Blocks"][:100]})   # numpy's one-time allocations
+    store, store_bytes = measure(lambda: BlockStore.from_response(res))
+    n_pages = len(store.page_numbers)
+    print(f"{n} blocks ({len(store)} lines, {n_pages} pages)")
+    print(f"dict form  {dict_bytes / 1e6:8.2f} MB  ({dict_bytes / n * 10000 / 1e6:.2f} MB per 10k blocks)")
+    print(f"BlockStore {store_bytes / 1e6:8.2f} MB  ({store_bytes / n * 10000 / 1e6:.2f} MB per 10k blocks, "
+          f"{dict_bytes / max(1, store_bytes):.0f}x smaller; arrays + text {store.nbytes / 1e6:.2f} MB)")
+
+    queries = [(LABELS[i % len(LABELS)].rstrip(":"), 1 + i % n_pages) for i in range(200)]
+    start = time.perf_counter()
+    old = [scan_value_right_of(res["Blocks"], label, page) for label, page in queries]
+    t_scan = time.perf_counter() - start
+    start = time.perf_counter()
+    new = [store.value_right_of(label, page=page) for label, page in queries]
+    t_store = time.perf_counter() - start
+    agree = sum(1 for a, b in zip(old, new) if a == b)
+    print(f"value_right_of: scan {t_scan / len(queries) * 1e3:.3f} ms  store {t_store / len(queries) * 1e3:.3f} ms  "
+          f"agree {agree}/{len(queries)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,101 @@
+# scripts/bench_dates.py
+"""
+Date-heavy benchmark: legacy strptime-loop parsers vs app.date_parser.DateNormalizer.
+
+    python -m scripts.bench_dates [n_values]
+
+The legacy functions below are the pre-DateNormalizer implementations of
+textract_worker._try_parse_date and local_extract.parse_date_str, kept here
+only as the baseline.
+"""
+
+import random
+import re
+import sys
+import time
+from datetime import datetime
+
+from dateutil.parser import parse
+
+from app.date_parser import DateNormalizer
+
+LEGACY_FORMATS = [
+    "%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%d %B %Y", "%d %b %Y",
+    "%B %d %Y", "%b %d %Y", "%d %b, %Y", "%d %B, %Y", "%d.%m.%Y",
+]
+
+
+def legacy_worker_parse(date_str):
+    date_str = re.sub(r'(\d)(st|nd|rd|th)', r'\1', date_str.strip(), flags=re.IGNORECASE)
+    for fmt in LEGACY_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).strftime("%Y-%m-%d")
+        except Exception:
+            continue
+    m = re.search(r"(20\d{2})", date_str)
+    return m.group(1) if m else None
+
+
+def legacy_local_parse(s):
+    if not s:
+        return None
+    s_try = re.sub(r'(\d)(st|nd|rd|th)', r'\1', s.strip(), flags=re.IGNORECASE)
+    m_iso = re.search(r"\b(20\d{2})[-/](0[1-9]|1[0-2])[-/](0[1-9]|[12]\d|3[01])\b", s_try)
+    if m_iso:
+        return f"{m_iso.group(1)}-{m_iso.group(2)}-{m_iso.group(3)}"
+    for fmt in LEGACY_FORMATS:
+        try:
+            return datetime.strptime(s_try, fmt).date().isoformat()
+        except Exception:
+            pass
+    try:
+        dt = parse(s_try, dayfirst=False, fuzzy=True).date()
+        if 1900 <= dt.year <= 2100:
+            return dt.isoformat()
+    except Exception:
+        pass
+    return None
+
+
+def make_values(n, seed=7):
+    rnd = random.Random(seed)
+    months = ["January", "February", "March", "April", "May", "June", "July",
+              "August", "September", "October", "November", "December"]
+    shapes = [
+        lambda y, m, d: f"{y}-{m:02d}-{d:02d}",
+        lambda y, m, d: f"{d:02d}/{m:02d}/{y}",
+        lambda y, m, d: f"{d}-{m}-{y}",
+        lambda y, m, d: f"{d}.{m}.{y}",
+        lambda y, m, d: f"{d}th {months[m - 1]} {y}",
+        lambda y, m, d: f"{d} {months[m - 1][:3]}, {y}",
+        lambda y, m, d: f"{months[m - 1]} {d} {y}",
+        lambda y, m, d: f"on {d} {months[m - 1]} {y} approx",
+    ]
+    # claim corpora repeat a limited set of dates
+    pool = []
+    for _ in range(2000):
+        y, m, d = rnd.randint(2019, 2025), rnd.randint(1, 12), rnd.randint(1, 28)
+        pool.append(rnd.choice(shapes)(y, m, d))
+    return [rnd.choice(pool) for _ in range(n)]
+
+
+def bench(fn, values):
+    start = time.perf_counter()
+    out = [fn(v) for v in values]
+    return time.perf_counter() - start, out
+
+
+def main(argv):
+    n = int(argv[0]) if argv else 200000
+    values = make_values(n)
+    for label, legacy, fallback in (("worker", legacy_worker_parse, "year"), ("local", legacy_local_parse, "fuzzy")):
+        norm = DateNormalizer(fallback=fallback)
+        t_old, old = bench(legacy, values)
+        t_new, new = bench(norm.normalize, values)
+        agree = sum(1 for a, b in zip(old, new) if a == b)
+        print(f"{label:6s} legacy {n / t_old:>10.0f}/s  new {n / t_new:>10.0f}/s  "
+              f"speedup {t_old / t_new:5.1f}x  agree {agree / n:.1%}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
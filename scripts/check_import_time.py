@@ -0,0 +1,68 @@
+# scripts/check_import_time.py
+"""
+Import-time budget check (cold start of the web app and the fallback subprocesses).
+
+    python -m scripts.check_import_time [--runs 5] [--top 10]
+
+Each module is imported in a fresh interpreter with `-X importtime`; the best
+of `--runs` is compared with its budget, and modules that must stay lazy
+(boto3, scikit-learn, numpy) must not appear in its import graph. Exits 1 on
+any regression so it can gate CI. Budgets were set at roughly 1.5-2x the
+times measured after the lazy-import change; raise them deliberately.
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+# module -> (budget ms, modules that must not be imported eagerly)
+BUDGETS = {
+    "app.main": (450, ("boto3", "sklearn", "numpy")),
+    "app.queue_worker": (100, ("boto3", "sklearn", "numpy")),
+    "scripts.local_extract": (150, ("boto3", "sklearn", "numpy")),
+    "scripts.local_summary": (50, ("boto3", "sklearn", "numpy")),
+}
+
+LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def measure(module: str) -> tuple:
+    """Returns (cumulative ms for `module`, {imported module: cumulative ms})."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, cwd=os.getcwd())
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    imported = {}
+    for line in proc.stderr.splitlines():
+        m = LINE_RE.match(line)
+        if m:
+            imported[m.group(4)] = int(m.group(2)) / 1000.0
+    return imported.get(module, 0.0), imported
+
+
+def main(argv):
+    runs = int(argv[argv.index("--runs") + 1]) if "--runs" in argv else 5
+    top = int(argv[argv.index("--top") + 1]) if "--top" in argv else 10
+    failed = False
+    for module, (budget, forbidden) in BUDGETS.items():
+        best, best_imported = None, {}
+        for _ in range(runs):
+            ms, imported = measure(module)
+            if best is None or ms < best:
+                best, best_imported = ms, imported
+        eager = sorted(name for name in forbidden if name in best_imported)
+        ok = best <= budget and not eager
+        failed = failed or not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {module:24s} {best:8.1f} ms  (budget {budget} ms)"
+              + (f"  eager: {', '.join(eager)}" if eager else ""))
+        if not ok:
+            slowest = sorted(((ms, name) for name, ms in best_imported.items() if "." not in name),
+                             reverse=True)[:top]
+            for ms, name in slowest:
+                print(f"       {ms:8.1f} ms  {name}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -2,59 +2,32 @@
 #
 
 import re
-from dateutil.parser import parse
 import os
 import json
+from app.chunker import chunk_text as _chunk_text
+from app.date_parser import DateNormalizer
 
 LOCAL_TXT = "local_copy.txt"
 TOP_K = 6                 # search top 6 chunks first
 CHUNK_SIZE = 1000         # must match chunking in query_local.py
 
+_DATES = DateNormalizer(fallback="fuzzy")
+
 # ---------- Utilities ----------
 def load_text():
     with open(LOCAL_TXT, "r", encoding="utf-8", errors="ignore") as f:
         return f.read()
 
 def chunk_text(text, chunk_size=CHUNK_SIZE):
-    return [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
+    return _chunk_text(text, chunk_size=chunk_size)
 
 # ---------- Date helpers (context-aware) ----------
-def parse_date_str(s):
+def parse_date_str(s, source=None):
     """
-    Try strict formats first, then validated fuzzy parse.
+    Shape-dispatched parse with LRU memo (app.date_parser), then validated fuzzy parse.
     Returns 'YYYY-MM-DD' or None.
     """
-    if not s:
-        return None
-    s_try = s.strip()
-    s_try = re.sub(r'(\d)(st|nd|rd|th)', r'\1', s_try, flags=re.IGNORECASE)
-
-    # direct ISO-like
-    m_iso = re.search(r"\b(20\d{2})[-/](0[1-9]|1[0-2])[-/](0[1-9]|[12]\d|3[01])\b", s_try)
-    if m_iso:
-        return f"{m_iso.group(1)}-{m_iso.group(2)}-{m_iso.group(3)}"
-
-    from datetime import datetime
-    fmts = [
-        "%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%d %B %Y",
-        "%d %b %Y", "%B %d %Y", "%b %d %Y", "%d.%m.%Y",
-        "%d %B, %Y", "%d %b, %Y"
-    ]
-    for fmt in fmts:
-        try:
-            dt = datetime.strptime(s_try, fmt).date()
-            return dt.isoformat()
-        except Exception:
-            pass
-
-    # fallback: fuzzy but validate year
-    try:
-        dt = parse(s_try, dayfirst=False, fuzzy=True).date()
-        if 1900 <= dt.year <= 2100:
-            return dt.isoformat()
-    except Exception:
-        pass
-    return None
+    return _DATES.normalize(s, source=source)
 
 
 def find_candidate_dates(text):
@@ -175,14 +148,22 @@ def search_patterns(text, patterns):
             return m.group(0).strip()
     return None
 
-# Optional local retriever (safe import)
-try:
-    from app.local_retriever import LocalRetriever
-except Exception:
-    LocalRetriever = None
+# Optional local retriever (scikit-learn); imported on first search, not at module import
+_retriever_cls = False
+
+def _local_retriever():
+    global _retriever_cls
+    if _retriever_cls is False:
+        try:
+            from app.local_retriever import LocalRetriever
+        except Exception:
+            LocalRetriever = None
+        _retriever_cls = LocalRetriever
+    return _retriever_cls
 
 def search_in_chunks(text, query, top_k=TOP_K):
     chunks = chunk_text(text)
+    LocalRetriever = _local_retriever()
     if LocalRetriever:
         retriever = LocalRetriever(chunks)
         hits = retriever.retrieve(query, top_k=top_k)
@@ -261,6 +242,9 @@ def extract_from_text(text):
     pool_candidates = find_candidate_dates(pool_text) if pool_text else []
     full_candidates = find_candidate_dates(text_norm)
     candidates = pool_candidates if pool_candidates else full_candidates
+    # learn this document's day/month order from all its date tokens
+    doc_source = hash(text_norm)
+    _DATES.learn([txt for txt, _, _ in full_candidates], source=doc_source)
 
     chosen_date = None
     if candidates:
@@ -274,11 +258,11 @@ def extract_from_text(text):
                     best = (txt, start, end)
                     best_dist = dist
             if best:
-                chosen_date = parse_date_str(best[0])
+                chosen_date = parse_date_str(best[0], source=doc_source)
         if not chosen_date:
             # fallback: try each candidate in order
             for txt, start, end in candidates:
-                pd = parse_date_str(txt)
+                pd = parse_date_str(txt, source=doc_source)
                 if pd:
                     chosen_date = pd
                     break
@@ -288,7 +272,7 @@ def extract_from_text(text):
         d = search_patterns(pool_text, DATE_PATTERNS)
         if not d:
             d = search_patterns(text_norm, DATE_PATTERNS)
-        chosen_date = parse_date_str(d) if d else None
+        chosen_date = parse_date_str(d, source=doc_source) if d else None
 
     results["date_of_loss"] = chosen_date
 
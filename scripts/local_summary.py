@@ -1,4 +1,5 @@
 import re
+import sys
 from heapq import nlargest
 
 LOCAL_TXT = "local_copy.txt"
@@ -16,13 +17,29 @@ def build_summary(text, top_n=3):
     top_sentences = [s for _, s in nlargest(top_n, scored)]
     return " ".join(top_sentences)
 
+def summarize_text(text, top_n=3):
+    """
+    build_summary for short texts; above SUMMARY_MAP_REDUCE_MIN_CHARS, summarize chunks in
+    parallel and reduce the partial summaries (app.summarizer), reusing cached chunk summaries.
+    """
+    from app import summarizer
+    if not summarizer.use_map_reduce(text):
+        return build_summary(text, top_n=top_n)
+    return summarizer.MapReduceSummarizer(
+        f"local:top{top_n}",
+        lambda chunk: build_summary(chunk, top_n=top_n),
+        lambda parts, final: build_summary(" ".join(parts), top_n=top_n),
+        cache=summarizer.get_cache(),
+    ).summarize(text)["summary"]
+
 if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else LOCAL_TXT
     try:
-        with open(LOCAL_TXT, "r", encoding="utf-8") as f:
+        with open(path, "r", encoding="utf-8") as f:
             txt = f.read()
     except FileNotFoundError:
-        print(f"{LOCAL_TXT} not found. Please download processed text from S3 first.")
+        print(f"{path} not found. Please download processed text from S3 first.")
         exit(1)
-    summary = build_summary(txt, top_n=3)
+    summary = summarize_text(txt, top_n=3)
     print("=== SUMMARY ===")
     print(summary)
@@ -1,12 +1,10 @@
 import os
 from app.local_retriever import LocalRetriever
+from app.chunker import chunk_text
 
 # Ensure you have downloaded processed text to this file (from S3)
 LOCAL_TXT = "local_copy.txt"
 
-def chunk_text(text, chunk_size=1000):
-    return [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
-
 if __name__ == "__main__":
     if not os.path.exists(LOCAL_TXT):
         print(f"{LOCAL_TXT} not found. Please download processed text from S3 first.")
@@ -0,0 +1,206 @@
+# scripts/reprocess.py
+"""
+Recompute only the invalidated pipeline stages across the processed corpus.
+
+    python -m scripts.reprocess [--prefix processed/] [--workers 8] [--batch 200]
+                                [--force extract,summarize] [--dry-run]
+
+For every processed/<name>.txt the stage manifest (app.pipeline_stages) is
+compared with the current stage versions and input digests:
+
+- ocr       re-run only if the raw upload changed (ETag) or OCR_VERSION was bumped
+- chunk     re-run if the text or the chunker changed
+- embed     re-run only if the chunks it was computed from changed, or the model did
+- extract   re-run if the text or the extraction code changed
+- summarize re-run if the text or the local summary code changed
+
+A recomputed stage whose output is unchanged does not invalidate what depends
+on it. Documents processed before manifests existed keep their text (OCR is
+adopted, never re-run unless forced) and keep their embeddings when the
+re-chunked text matches the stored chunks. Results-store rows get the new local
+extraction, validation and summary; the LLM parts of a result are left as they
+are (re-run /process for those). --dry-run prints what would run.
+"""
+
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import boto3
+
+from app import artifacts, pipeline_stages as ps
+from app.chunker import iter_page_chunks
+from app.results_store import get_store, record_claim, text_digest
+from app.validator import validate_extraction
+
+BUCKET = os.environ.get("CLAIM_BUCKET", "claim-documents-poc-S")
+REGION = os.environ.get("AWS_REGION", "ap-south-1")
+
+s3 = boto3.client("s3", region_name=REGION)
+
+
+def iter_processed_keys(prefix):
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=BUCKET, Prefix=prefix):
+        for obj in page.get("Contents", []) or []:
+            if obj["Key"].endswith(".txt"):
+                yield obj["Key"]
+
+
+def _source_etag(s3_key):
+    if not s3_key:
+        return None
+    try:
+        return s3.head_object(Bucket=BUCKET, Key=s3_key).get("ETag", "").strip('"') or None
+    except Exception:
+        return None   # raw upload gone: trust the recorded OCR input
+
+
+def _stored_embeddings(processed_key, text):
+    try:
+        doc = json.loads(artifacts.get_artifact(s3, BUCKET, artifacts.embeddings_key_for(processed_key)))
+    except Exception:
+        return []
+    return artifacts.load_embeddings(doc, text) or []
+
+
+def load_state(processed_key):
+    """(manifest, s3_key, current ETag of the raw upload)."""
+    manifest = ps.load_manifest(s3, BUCKET, processed_key) or ps.new_manifest(None, {})
+    s3_key = manifest.get("s3_key") or (get_store().get(processed_key, include_result=False) or {}).get("s3_key")
+    manifest["s3_key"] = s3_key
+    etag = _source_etag(s3_key)
+    if "ocr" not in manifest["stages"]:
+        # processed before manifests: the stored text is adopted as the OCR output
+        manifest["stages"]["ocr"] = {"version": ps.OCR_VERSION, "input": etag, "output": None, "adopted": True}
+    return manifest, s3_key, etag
+
+
+def reprocess_document(processed_key, force=(), dry_run=False) -> dict:
+    """Returns {"processed_key", "planned", "ran"}; "ran" lists the stages actually recomputed."""
+    from app import textract_worker
+    from scripts.local_extract import extract_from_text
+    from scripts.local_summary import summarize_text
+
+    manifest, s3_key, etag = load_state(processed_key)
+    planned = ps.plan(manifest, etag, force)
+    if dry_run or not planned:
+        return {"processed_key": processed_key, "planned": planned, "ran": []}
+
+    stages, ran = manifest["stages"], []
+    legacy = "embed" not in stages
+
+    # ocr
+    if "ocr" in planned:
+        if not s3_key:
+            raise RuntimeError("no raw s3_key recorded; cannot re-run OCR")
+        pages = textract_worker.extract_document_pages(s3_key, bucket=BUCKET)
+        if pages is None:
+            raise RuntimeError("Textract failed or did not finish")
+        text = "\n".join(page_text for _, page_text in pages)
+        s3.put_object(Bucket=BUCKET, **artifacts.text_put_kwargs(processed_key, text))
+        stages["ocr"] = ps.entry("ocr", etag, text_digest(text), pages=ps.page_spans(pages))
+        ran.append("ocr")
+    else:
+        text = artifacts.get_artifact(s3, BUCKET, processed_key).decode("utf-8")
+        spans = stages["ocr"].get("pages")
+        pages = ps.pages_from_spans(text, spans) if spans else \
+            ps.pages_from_chunks(text, _stored_embeddings(processed_key, text))
+        if stages["ocr"].get("output") is None:
+            stages["ocr"].update(output=text_digest(text), pages=ps.page_spans(pages))
+    digest = stages["ocr"]["output"]
+
+    # chunk -> embed
+    if "chunk" in force or not ps.is_current(manifest, "chunk", digest):
+        stages["chunk"] = ps.entry("chunk", digest, ps.chunks_digest(iter_page_chunks(pages)))
+        ran.append("chunk")
+    chunk_out = stages["chunk"]["output"]
+    if "embed" in force or not ps.is_current(manifest, "embed", chunk_out):
+        # pre-manifest embeddings of identical chunks are kept
+        adopt = ("embed" not in force and legacy
+                 and ps.chunks_digest(_stored_embeddings(processed_key, text)) == chunk_out)
+        if not adopt:
+            embeddings = textract_worker.embed_chunks(pages)
+            s3.put_object(Bucket=BUCKET, **artifacts.embeddings_put_kwargs(processed_key, embeddings, text, digest))
+            ran.append("embed")
+        stages["embed"] = ps.entry("embed", chunk_out, None)
+
+    # extract / summarize -> results store
+    row = get_store().get(processed_key) or {}
+    result = dict(row.get("result") or {"s3_processed_key": processed_key})
+    local = dict(result.get("local") or {})
+    fields = local_extraction = None
+    if "extract" in force or not ps.is_current(manifest, "extract", digest):
+        fields = textract_worker.extract_fields(text, source=processed_key)
+        s3.put_object(Bucket=BUCKET, **artifacts.extraction_put_kwargs(processed_key, fields, text, digest))
+        local_extraction = extract_from_text(text)
+        local["extraction"] = local_extraction
+        result["validation"] = validate_extraction(local_extraction) if isinstance(local_extraction, dict) else None
+        stages["extract"] = ps.entry("extract", digest, ps.result_digest(local_extraction))
+        ran.append("extract")
+    if "summarize" in force or not ps.is_current(manifest, "summarize", digest):
+        local["summary"] = summarize_text(text)
+        stages["summarize"] = ps.entry("summarize", digest, ps.result_digest(local["summary"]))
+        ran.append("summarize")
+    if ran:
+        result["local"] = local
+        record_claim(processed_key, fields=local_extraction if isinstance(local_extraction, dict) else None,
+                     s3_key=s3_key, digest=digest, extraction=fields,
+                     result=result if {"extract", "summarize"} & set(ran) else None)
+    s3.put_object(Bucket=BUCKET, **ps.manifest_put_kwargs(processed_key, manifest))
+    return {"processed_key": processed_key, "planned": planned, "ran": ran}
+
+
+def _safe_reprocess(processed_key, force, dry_run):
+    try:
+        return reprocess_document(processed_key, force, dry_run)
+    except Exception as e:
+        print("failed:", processed_key, "-", e)
+        return None
+
+
+def _arg(argv, name, default):
+    return argv[argv.index(name) + 1] if name in argv else default
+
+
+def main(argv):
+    prefix = _arg(argv, "--prefix", "processed/")
+    workers = int(_arg(argv, "--workers", "8"))
+    batch_size = int(_arg(argv, "--batch", "200"))
+    force = tuple(s for s in _arg(argv, "--force", "").split(",") if s)
+    dry_run = "--dry-run" in argv
+    unknown = set(force) - set(ps.STAGES)
+    if unknown:
+        print("unknown stages:", ", ".join(sorted(unknown)), "- expected", ", ".join(ps.STAGES))
+        return 2
+    print("stage versions:", ps.stage_versions())
+
+    start = time.time()
+    seen, failed = 0, 0
+    planned, ran = Counter(), Counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        keys = iter_processed_keys(prefix)
+        while True:
+            window = list(islice(keys, batch_size))
+            if not window:
+                break
+            for out in pool.map(lambda k: _safe_reprocess(k, force, dry_run), window):
+                if out is None:
+                    failed += 1
+                    continue
+                planned.update(out["planned"])
+                ran.update(out["ran"])
+            seen += len(window)
+            print(f"{seen} documents ({seen / (time.time() - start):.0f}/s)")
+    per_stage = ", ".join(f"{s}={planned[s]}/{ran[s]}" for s in ps.STAGES)
+    print(f"=== {'planned' if dry_run else 'reprocessed'} {seen} documents ({failed} failed) in "
+          f"{time.time() - start:.1f}s; stale/recomputed per stage: {per_stage} ===")
+    return 0 if not failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
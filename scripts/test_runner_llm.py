@@ -10,7 +10,7 @@ SAMPLE_KEYS = [
 OUT_CSV = os.environ.get("OUT_CSV", "llm_compare_results.csv")
 
 def call_process(s3_key):
-    resp = requests.post(FLASK_URL, json={"s3_key": s3_key}, timeout=900)
+    resp = requests.post(FLASK_URL, json={"s3_key": s3_key}, headers={"X-Priority": "batch"}, timeout=900)
     resp.raise_for_status()
     return resp.json()
 
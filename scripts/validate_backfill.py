@@ -0,0 +1,76 @@
+# scripts/validate_backfill.py
+"""
+Validate historical extractions in bulk.
+
+Input: a JSONL file with one extraction dict per line (e.g. processed/*.extraction.json
+contents, one per line). Writes one {"row", "valid", "score", "issues"} line per input
+row and prints throughput.
+
+    python -m scripts.validate_backfill extractions.jsonl [out.jsonl] [--batch-size 100000]
+"""
+
+import json
+import sys
+
+from app.validator import to_columns, validate_batch
+
+BATCH_SIZE = 100000
+
+
+def iter_batches(path, batch_size=BATCH_SIZE):
+    batch = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                batch.append(json.loads(line))
+            except Exception:
+                batch.append({})
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def main(argv):
+    batch_size = BATCH_SIZE
+    skip = set()
+    if "--batch-size" in argv:
+        i = argv.index("--batch-size")
+        batch_size = int(argv[i + 1])
+        skip = {i, i + 1}   # by position: a path may look like the batch size
+    args = [a for i, a in enumerate(argv) if i not in skip and not a.startswith("--")]
+    if not args:
+        print(__doc__)
+        return 1
+    in_path = args[0]
+    out = open(args[1], "w", encoding="utf-8") if len(args) > 1 else None
+
+    total_rows, total_valid, total_seconds = 0, 0, 0.0
+    for batch in iter_batches(in_path, batch_size):
+        res = validate_batch(to_columns(batch))
+        if out:
+            for i in range(res["rows"]):
+                out.write(json.dumps({
+                    "row": total_rows + i,
+                    "valid": bool(res["valid"][i]),
+                    "score": round(float(res["score"][i]), 2),
+                    "issues": res["issues"][i],
+                }) + "\n")
+        total_rows += res["rows"]
+        total_valid += int(res["valid"].sum())
+        total_seconds += res["seconds"]
+        print(f"batch: {res['rows']} rows, {res['rows_per_sec']:.0f} rows/sec")
+    if out:
+        out.close()
+
+    rate = total_rows / total_seconds if total_seconds > 0 else float("inf")
+    print(f"=== {total_rows} rows, {total_valid} valid, {rate:.0f} rows/sec ===")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,20 @@
+# tests/conftest.py
+"""
+Shared setup: every SQLite store and artifact directory the app opens points
+into a throwaway directory, and Bedrock stays disabled unless a test turns it
+on, so the suite never touches AWS or the working tree.
+"""
+
+import os
+import sys
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="claim-tests-")
+for _name, _file in (("RESULTS_DB", "results.db"), ("SUMMARY_CACHE_DB", "summary_cache.db"),
+                     ("WORK_QUEUE_DB", "work_queue.db"), ("NEAR_DUP_DB", "near_dup.db"),
+                     ("EMBED_CACHE_DB", "embedding_cache.db"), ("PROFILE_DIR", "profiles")):
+    os.environ[_name] = os.path.join(_TMP, _file)
+os.environ["ENABLE_BEDROCK"] = "0"
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
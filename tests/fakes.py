@@ -0,0 +1,91 @@
+# tests/fakes.py
+"""In-memory stand-ins for the S3 and Textract clients, Bedrock and the model invoker."""
+
+import io
+import json
+
+
+class FakeS3:
+    def __init__(self, objects=None):
+        self.objects = dict(objects or {})
+        self.deleted = []
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise KeyError(Key)
+        return {"ETag": f'"etag-{len(self.objects[Key])}"'}
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body if isinstance(Body, bytes) else Body.encode("utf-8")
+        return {}
+
+    def upload_fileobj(self, Fileobj, Bucket, Key):
+        self.put_object(Bucket, Key, Fileobj.read())
+
+    def delete_object(self, Bucket, Key):
+        self.deleted.append(Key)
+        self.objects.pop(Key, None)
+        return {}
+
+
+def line_blocks(lines, page=1):
+    return [{"BlockType": "LINE", "Text": text, "Page": page, "Confidence": 99.0} for text in lines]
+
+
+class FakeTextract:
+    """Reports IN_PROGRESS `pending` times, then SUCCEEDED with the given LINE blocks."""
+
+    def __init__(self, blocks, pending=1, status="SUCCEEDED"):
+        self.blocks = blocks
+        self.pending = pending
+        self.status = status
+        self.started = []
+        self.polls = 0
+
+    def start_document_text_detection(self, DocumentLocation):
+        self.started.append(DocumentLocation["S3Object"]["Name"])
+        return {"JobId": f"job-{len(self.started)}"}
+
+    def get_document_text_detection(self, JobId, NextToken=None):
+        self.polls += 1
+        if self.polls <= self.pending:
+            return {"JobStatus": "IN_PROGRESS"}
+        return {"JobStatus": self.status, "Blocks": self.blocks}
+
+
+class FakeInvoker:
+    """ModelInvoker stand-in: generate_json answers with `fields`, generate with `summary`."""
+
+    def __init__(self, fields=None, summary="fake summary", model_id="fake-model"):
+        self.fields = fields or {}
+        self.summary = summary
+        self.text_model_id = model_id
+        self.cascade = [model_id]
+        self.prompts = []
+
+    def generate(self, prompt, model_id=None, timeout=None):
+        self.prompts.append(prompt)
+        return {"success": True, "text": self.summary, "raw": None}
+
+    def generate_json(self, prompt, validate=None, tiers=None, timeout=None):
+        self.prompts.append(prompt)
+        return {"success": True, "text": json.dumps(self.fields), "parsed": dict(self.fields),
+                "model_id": self.text_model_id, "tier": 0, "escalations": []}
+
+
+class FakeBedrock:
+    """bedrock_client.invoke_model stand-in: per model id, a queue of replies (an Exception is raised)."""
+
+    def __init__(self, replies):
+        self.replies = {model_id: list(r) for model_id, r in replies.items()}
+        self.calls = []
+
+    def invoke_model(self, model_id, payload, timeout_seconds=None, **kwargs):
+        self.calls.append(model_id)
+        reply = self.replies[model_id].pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return {"outputText": reply}
@@ -0,0 +1,157 @@
+# tests/test_admission.py
+import threading
+import time
+
+import pytest
+
+from app.admission import AdmissionController, Saturated, StageLimiter, parse_stage_limits
+
+
+def hold(controller, lane, release, admitted, order=None, name=None):
+    def run():
+        with controller.admit(lane):
+            if order is not None:
+                order.append(name)
+            admitted.set()
+            release.wait(5)
+    t = threading.Thread(target=run)
+    t.start()
+    return t
+
+
+def test_admits_up_to_max_concurrency_then_queues():
+    controller = AdmissionController(max_concurrency=1, queue_limits={"interactive": 1, "batch": 1}, max_wait=5)
+    release, first_in = threading.Event(), threading.Event()
+    first = hold(controller, "interactive", release, first_in)
+    assert first_in.wait(2)
+
+    second_release, second_in = threading.Event(), threading.Event()
+    second = hold(controller, "interactive", second_release, second_in)
+    time.sleep(0.05)
+    assert not second_in.is_set()
+    assert len(controller._waiting["interactive"]) == 1
+    release.set()
+    assert second_in.wait(2)
+    second_release.set()
+    for t in (first, second):
+        t.join(2)
+    assert controller._active == 0
+
+
+def test_full_lane_is_rejected_with_retry_after():
+    controller = AdmissionController(max_concurrency=1, queue_limits={"interactive": 0, "batch": 0}, max_wait=5)
+    release, admitted = threading.Event(), threading.Event()
+    holder = hold(controller, "interactive", release, admitted)
+    assert admitted.wait(2)
+    with pytest.raises(Saturated) as info:
+        controller.acquire("interactive")
+    assert info.value.reason == "queue full" and info.value.retry_after >= 1
+    release.set()
+    holder.join()
+
+
+def test_wait_timeout():
+    controller = AdmissionController(max_concurrency=1, queue_limits={"interactive": 4, "batch": 4}, max_wait=0.05)
+    release, admitted = threading.Event(), threading.Event()
+    holder = hold(controller, "batch", release, admitted)
+    assert admitted.wait(2)
+    with pytest.raises(Saturated) as info:
+        controller.acquire("batch")
+    assert info.value.reason == "wait timeout"
+    assert not controller._waiting["batch"]
+    release.set()
+    holder.join()
+
+
+def test_interactive_lane_goes_before_batch():
+    controller = AdmissionController(max_concurrency=1, queue_limits={"interactive": 4, "batch": 4}, max_wait=5)
+    release, admitted = threading.Event(), threading.Event()
+    holder = hold(controller, "batch", release, admitted)
+    assert admitted.wait(2)
+
+    order, done = [], threading.Event()
+    waiters = [hold(controller, "batch", done, threading.Event(), order, "batch")]
+    time.sleep(0.05)
+    waiters.append(hold(controller, "interactive", done, threading.Event(), order, "interactive"))
+    time.sleep(0.05)
+    done.set()
+    release.set()
+    for t in [holder] + waiters:
+        t.join(2)
+    assert order == ["interactive", "batch"]
+    assert controller._active == 0
+
+
+def test_unknown_lane_is_interactive():
+    assert AdmissionController.lane_for("urgent") == "interactive"
+    assert AdmissionController.lane_for("batch") == "batch"
+
+
+def test_stage_limiter_caps_concurrency():
+    limiter = StageLimiter({"llm": 2})
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def run():
+        with limiter.stage("llm"):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] == 2
+    with limiter.stage("unconfigured"):
+        pass
+
+
+def test_parse_stage_limits():
+    assert parse_stage_limits("textract=8, local=4,llm=4") == {"textract": 8, "local": 4, "llm": 4}
+    assert parse_stage_limits("") == {}
+
+
+def test_process_route_answers_429_past_the_cap(monkeypatch):
+    from app import admission, main
+    from tests.fakes import FakeS3
+
+    controller = AdmissionController(max_concurrency=1, queue_limits={"interactive": 1, "batch": 1}, max_wait=5)
+    release, running = threading.Event(), threading.Event()
+
+    def slow_claim(s3_key):
+        running.set()
+        release.wait(5)
+        return {"s3_key": s3_key}, 200
+
+    monkeypatch.setattr(main, "admission", controller)
+    monkeypatch.setattr(main, "process_claim", slow_claim)
+    monkeypatch.setattr(main, "get_s3", lambda: FakeS3({f"raw/{i}.pdf": b"pdf" for i in range(3)}))
+    client = main.app.test_client()
+    statuses = {}
+
+    def post(i):
+        statuses[i] = client.post("/process", json={"s3_key": f"raw/{i}.pdf"}).status_code
+
+    first = threading.Thread(target=post, args=(0,))
+    first.start()
+    assert running.wait(2)
+    queued = threading.Thread(target=post, args=(1,))
+    queued.start()
+    deadline = time.monotonic() + 2
+    while not controller._waiting["interactive"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    resp = client.post("/process", json={"s3_key": "raw/2.pdf"})
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) >= 1
+    release.set()
+    for t in (first, queued):
+        t.join(5)
+    assert statuses == {0: 200, 1: 200}
+    # gunicorn's default thread count leaves room for every running and queued claim
+    assert admission.request_threads() >= (admission.ADMISSION_MAX_CONCURRENCY
+                                           + sum(admission.ADMISSION_QUEUE_LIMITS.values()))
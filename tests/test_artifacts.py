@@ -0,0 +1,104 @@
+# tests/test_artifacts.py
+import io
+import json
+
+import pytest
+
+from app import artifacts
+
+TEXT = ("Policy Number: PL-2024-00987\nClaimant Name: Asha Verma\n"
+        "Description: Rear bumper and tail lamp damaged when a delivery van reversed into the parked car.\n")
+DESCRIPTION = TEXT.split("Description: ")[1].rstrip("\n")
+
+
+@pytest.mark.parametrize("encoding", ["none", "gzip", "zstd"])
+def test_encode_decode_round_trip(encoding):
+    data = TEXT.encode("utf-8") * 20
+    body, content_encoding = artifacts.encode(data, encoding)
+    assert (content_encoding is None) == (encoding == "none")
+    assert artifacts.decode(body, content_encoding) == data
+    # objects written without ContentEncoding are recognised by their magic bytes
+    assert artifacts.decode(body) == data
+
+
+def test_zstd_falls_back_to_gzip_without_zstandard(monkeypatch):
+    monkeypatch.setattr(artifacts, "_HAS_ZSTD", False)
+    body, content_encoding = artifacts.encode(b"abc", "zstd")
+    assert content_encoding == "gzip" and body[:2] == b"\x1f\x8b"
+    assert artifacts.decode(body) == b"abc"
+
+
+def test_processed_text_is_stored_plain(monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_COMPRESSION", "gzip")
+    kwargs = artifacts.text_put_kwargs("processed/a.txt", TEXT)
+    assert kwargs["Body"] == TEXT.encode("utf-8")
+    assert "ContentEncoding" not in kwargs
+
+
+def test_read_object_uses_content_encoding():
+    body, content_encoding = artifacts.encode(b'{"a":1}', "gzip")
+    response = {"Body": io.BytesIO(body), "ContentEncoding": content_encoding}
+    assert artifacts.read_object(response) == b'{"a":1}'
+
+
+def put_doc(kwargs):
+    return json.loads(artifacts.decode(kwargs["Body"], kwargs.get("ContentEncoding")))
+
+
+def test_extraction_long_values_become_spans():
+    fields = {"policy_number": "PL-2024-00987", "raw_claim_description": DESCRIPTION, "amount_claimed": None}
+    kwargs = artifacts.extraction_put_kwargs("processed/a.txt", fields, TEXT, digest="d1")
+    assert kwargs["Key"] == "processed/a.extraction.json"
+    doc = put_doc(kwargs)
+    assert doc["v"] == 2 and doc["digest"] == "d1"
+    assert "raw_claim_description" not in doc["fields"]
+    assert doc["spans"]["raw_claim_description"] == [TEXT.index(DESCRIPTION), TEXT.index(DESCRIPTION) + len(DESCRIPTION)]
+    assert artifacts.load_extraction(doc, TEXT) == fields
+    assert artifacts.load_extraction(doc)["raw_claim_description"] is None
+
+
+def test_extraction_keeps_values_not_found_in_the_text():
+    fields = {"raw_claim_description": "x" * artifacts.SPAN_MIN_CHARS}
+    doc = put_doc(artifacts.extraction_put_kwargs("processed/a.txt", fields, TEXT))
+    assert doc["spans"] == {} and artifacts.load_extraction(doc, TEXT) == fields
+
+
+def test_legacy_extraction_is_returned_as_is():
+    legacy = {"policy_number": "PL-2024-00987", "raw_claim_description": DESCRIPTION}
+    assert artifacts.load_extraction(legacy, TEXT) == legacy
+
+
+def test_embeddings_keep_chunk_text_only_when_it_is_not_a_slice():
+    start = TEXT.index(DESCRIPTION)
+    embeddings = [
+        {"chunk": TEXT[:28], "vector": [0.5, 0.25], "page": 1, "start": 0, "end": 28},
+        {"chunk": "rewritten chunk", "vector": [1.0, 0.0], "page": 1, "start": start, "end": start + 10},
+    ]
+    kwargs = artifacts.embeddings_put_kwargs("processed/a.txt", embeddings, TEXT)
+    assert kwargs["Key"] == "processed/a.emb.json"
+    doc = put_doc(kwargs)
+    assert "chunk" not in doc["chunks"][0] and doc["chunks"][1]["chunk"] == "rewritten chunk"
+    assert artifacts.load_embeddings(doc, TEXT) == embeddings
+    assert artifacts.load_embeddings(doc)[0]["chunk"] is None
+
+
+def test_legacy_embeddings_are_returned_as_is():
+    legacy = [{"chunk": "Policy Number: PL-2024-00987", "vector": [0.5, 0.25]}]
+    assert artifacts.load_embeddings(legacy, TEXT) == legacy
+
+
+def test_load_artifacts_reads_both_layouts(monkeypatch):
+    from tests.fakes import FakeS3
+
+    monkeypatch.setattr(artifacts, "ARTIFACT_COMPRESSION", "gzip")
+    s3 = FakeS3()
+    fields = {"policy_number": "PL-2024-00987", "raw_claim_description": DESCRIPTION}
+    # FakeS3 drops ContentEncoding, so the gzipped extraction is read by sniffing
+    s3.put_object(Bucket="b", **artifacts.text_put_kwargs("processed/new.txt", TEXT))
+    s3.put_object(Bucket="b", **artifacts.extraction_put_kwargs("processed/new.txt", fields, TEXT))
+    assert s3.objects["processed/new.extraction.json"][:2] == b"\x1f\x8b"
+    s3.put_object(Bucket="b", Key="processed/old.txt", Body=TEXT)
+    s3.put_object(Bucket="b", Key="processed/old.extraction.json", Body=json.dumps(fields, indent=2))
+
+    for key in ("processed/new.txt", "processed/old.txt"):
+        assert artifacts.load_artifacts(s3, "b", key) == {"text": TEXT, "extraction": fields}
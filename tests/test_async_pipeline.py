@@ -0,0 +1,174 @@
+# tests/test_async_pipeline.py
+import asyncio
+import json
+
+import pytest
+
+from app import artifacts, asgi, bedrock_client
+from app.async_pipeline import AsyncClaimPipeline
+from app.singleflight import AsyncSingleFlight
+from tests.fakes import FakeInvoker, FakeS3, FakeTextract, line_blocks
+
+CLAIM_LINES = [
+    "Claim Form",
+    "Policy Number: PL-2024-00987",
+    "Claimant Name: Asha Verma",
+    "Date of Loss: 12/03/2024",
+    "Cause of Loss: burst pipe flooded the kitchen",
+    "Amount Claimed: INR 45,000",
+]
+
+
+def make_pipeline(lines=CLAIM_LINES, invoker=None, **textract_kwargs):
+    s3 = FakeS3({"raw/claim-1.png": b"image bytes"})
+    textract = FakeTextract(line_blocks(lines), **textract_kwargs)
+    pipeline = AsyncClaimPipeline(s3=s3, textract=textract, invoker=invoker or FakeInvoker(),
+                                  bucket="test-bucket", poll_interval=0, poll_timeout=5, offload_threads=4)
+    return pipeline, s3, textract
+
+
+def test_process_runs_every_stage_against_fakes():
+    pipeline, s3, textract = make_pipeline(pending=2)
+    try:
+        resp = asyncio.run(pipeline.process("raw/claim-1.png"))
+    finally:
+        pipeline.close()
+
+    assert resp["s3_processed_key"] == "processed/claim-1.txt"
+    assert textract.started == ["raw/claim-1.png"]
+    assert textract.polls == 3
+    text = artifacts.decode(s3.objects["processed/claim-1.txt"]).decode("utf-8")
+    assert text.splitlines()[1] == "Policy Number: PL-2024-00987"
+    assert "processed/claim-1.manifest.json" in s3.objects
+    assert resp["local"]["extraction"]["policy_number"] == "PL-2024-00987"
+    assert resp["llm"] == {"extraction": {"note": "bedrock disabled"}, "summary": "bedrock disabled", "gate": None}
+    assert pipeline.in_flight == 0
+
+
+def test_process_asks_the_llm_only_for_flagged_fields(monkeypatch):
+    monkeypatch.setattr(bedrock_client, "ENABLE_BEDROCK", True)
+    monkeypatch.setattr(bedrock_client, "create_embedding", lambda text, model=None: [0.0, 1.0])
+    invoker = FakeInvoker(fields={"claimant_name": "Asha Verma"})
+    lines = [line for line in CLAIM_LINES if not line.startswith("Claimant")]
+    pipeline, _, _ = make_pipeline(lines, invoker=invoker, pending=0)
+    try:
+        resp = asyncio.run(pipeline.process("raw/claim-1.png"))
+    finally:
+        pipeline.close()
+
+    gate = resp["llm"]["gate"]
+    assert gate["decision"] == "partial" and "claimant_name" in gate["fields"]
+    assert resp["llm"]["extraction"]["claimant_name"] == "Asha Verma"
+    assert resp["llm"]["summary"] == "fake summary"
+    extraction_prompt = next(p for p in invoker.prompts if "Schema:" in p)
+    assert '"claimant_name"' in extraction_prompt and '"policy_number"' not in extraction_prompt.split("DOCUMENT:")[0]
+
+
+def test_native_async_clients_are_awaited_not_offloaded():
+    import threading
+
+    class AsyncS3(FakeS3):
+        """aioboto3-style client: every method a coroutine function, run on the event loop thread."""
+
+        def __init__(self, objects):
+            super().__init__(objects)
+            self.threads = set()
+
+        def _on_loop(self, method, **kwargs):
+            self.threads.add(threading.current_thread().name)
+            return getattr(FakeS3, method)(self, **kwargs)
+
+        async def head_object(self, **kwargs):
+            return self._on_loop("head_object", **kwargs)
+
+        async def put_object(self, **kwargs):
+            return self._on_loop("put_object", **kwargs)
+
+        async def delete_object(self, **kwargs):
+            return self._on_loop("delete_object", **kwargs)
+
+    s3 = AsyncS3({"raw/claim-1.png": b"image bytes"})
+    pipeline = AsyncClaimPipeline(s3=s3, textract=FakeTextract(line_blocks(CLAIM_LINES), pending=0),
+                                  invoker=FakeInvoker(), bucket="test-bucket", poll_interval=0, poll_timeout=5)
+    try:
+        resp = asyncio.run(pipeline.process("raw/claim-1.png"))
+    finally:
+        pipeline.close()
+    assert resp["s3_processed_key"] == "processed/claim-1.txt"
+    assert "processed/claim-1.txt" in s3.objects
+    assert s3.threads == {threading.main_thread().name}
+
+
+def test_failed_textract_job_raises():
+    pipeline, _, _ = make_pipeline(pending=0, status="FAILED")
+    try:
+        with pytest.raises(RuntimeError):
+            asyncio.run(pipeline.process("raw/claim-1.png"))
+    finally:
+        pipeline.close()
+    assert pipeline.in_flight == 0
+
+
+def test_poll_times_out():
+    pipeline, _, _ = make_pipeline(pending=10 ** 6)
+    pipeline.poll_timeout = 0
+    try:
+        with pytest.raises(TimeoutError):
+            asyncio.run(pipeline.poll_job("job-1"))
+    finally:
+        pipeline.close()
+
+
+# ---------- ASGI routes ----------
+
+async def call_asgi(method, path, body=None):
+    messages = [{"type": "http.request", "body": json.dumps(body).encode("utf-8") if body is not None else b"",
+                 "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi.application({"type": "http", "method": method, "path": path}, receive, send)
+    payload = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return sent[0]["status"], json.loads(payload)
+
+
+@pytest.fixture
+def asgi_pipeline(monkeypatch):
+    pipeline, s3, textract = make_pipeline(pending=1)
+    monkeypatch.setattr(asgi, "_pipeline", pipeline)
+    monkeypatch.setattr(asgi, "_inflight", AsyncSingleFlight(retention=0))
+    yield pipeline, textract
+    pipeline.close()
+
+
+def test_asgi_healthz(asgi_pipeline):
+    status, payload = asyncio.run(call_asgi("GET", "/healthz"))
+    assert status == 200 and payload == {"ok": True, "in_flight": 0}
+
+
+def test_asgi_process(asgi_pipeline):
+    status, payload = asyncio.run(call_asgi("POST", "/process", {"s3_key": "raw/claim-1.png"}))
+    assert status == 200
+    assert payload["local"]["extraction"]["policy_number"] == "PL-2024-00987"
+
+
+def test_asgi_process_coalesces_concurrent_calls(asgi_pipeline):
+    _, textract = asgi_pipeline
+
+    async def both():
+        return await asyncio.gather(call_asgi("POST", "/process", {"s3_key": "raw/claim-1.png"}),
+                                    call_asgi("POST", "/process", {"s3_key": "raw/claim-1.png"}))
+
+    (s1, p1), (s2, p2) = asyncio.run(both())
+    assert s1 == s2 == 200 and p1 == p2
+    assert textract.started == ["raw/claim-1.png"]
+
+
+def test_asgi_process_requires_s3_key(asgi_pipeline):
+    assert asyncio.run(call_asgi("POST", "/process", {}))[0] == 400
+    assert asyncio.run(call_asgi("GET", "/nope"))[0] == 404
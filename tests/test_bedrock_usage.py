@@ -0,0 +1,94 @@
+# tests/test_bedrock_usage.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import bedrock_usage
+from app.bedrock_usage import claim, completion_text, current_summary, estimate_tokens, record, returned_tokens, stage
+
+
+def test_claims_in_concurrent_threads_keep_their_own_ledgers():
+    barrier = threading.Barrier(4)
+    summaries = {}
+
+    def run(n):
+        with claim():
+            barrier.wait(5)   # every thread's claim is open at once
+            for _ in range(n):
+                record("m", "text", input_tokens=10, output_tokens=1)
+            summaries[n] = current_summary()["total"]
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in (1, 2, 3, 4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert {n: s["calls"] for n, s in summaries.items()} == {1: 1, 2: 2, 3: 3, 4: 4}
+    assert summaries[3]["input_tokens"] == 30
+
+
+def test_concurrent_asyncio_tasks_keep_their_own_ledgers():
+    async def one(n):
+        with claim():
+            with stage(f"stage{n}"):
+                await asyncio.sleep(0)
+                record("m", "text")
+                await asyncio.sleep(0)
+            return current_summary()
+
+    async def main():
+        return await asyncio.gather(*(one(n) for n in range(5)))
+
+    for n, summary in enumerate(asyncio.run(main())):
+        assert list(summary["stages"]) == [f"stage{n}"] and summary["total"]["calls"] == 1
+
+
+def test_bind_carries_the_ledger_and_stage_into_a_pool():
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        with claim() as ledger, stage("summarize"):
+            list(pool.map(bedrock_usage.bind(lambda i: record("m", "text")), range(3)))
+            pool.submit(record, "m", "text").result()   # unbound: no ledger on the pool thread
+    assert len(ledger.entries) == 3
+    assert {e["stage"] for e in ledger.entries} == {"summarize"}
+
+
+def test_no_ledger_outside_a_claim():
+    assert current_summary() is None
+    assert record("m", "embed")["stage"] == "embed"
+
+
+def test_summary_splits_calls_retries_errors_and_cache_hits(monkeypatch):
+    monkeypatch.setattr(bedrock_usage, "BEDROCK_PRICES", {"m": (1.0, 2.0)})
+    with claim():
+        with stage("extract"):
+            record("m", "text", prompt_bytes=100, input_tokens=1000, output_tokens=500, ok=False)
+            with bedrock_usage.attempt(1):
+                record("m", "text", prompt_bytes=100, input_tokens=1000, output_tokens=500, tokens="returned")
+        bedrock_usage.record_cache_hit("m", "embed")
+        summary = current_summary()
+    assert summary["stages"]["extract"] == {
+        "calls": 1, "retries": 1, "errors": 1, "cache_hits": 0, "prompt_bytes": 200,
+        "input_tokens": 1000, "output_tokens": 500, "estimated_tokens": False, "seconds": 0.0, "cost_usd": 2.0}
+    assert summary["stages"]["embed"]["cache_hits"] == 1
+    assert summary["total"]["calls"] == 1
+
+
+def test_token_counts_prefer_returned_values():
+    response = {"ResponseMetadata": {"HTTPHeaders": {"x-amzn-bedrock-input-token-count": "12"}}}
+    assert returned_tokens(response, {"usage": {"output_tokens": 7}}) == (12, 7)
+    assert returned_tokens({}, {"inputTextTokenCount": 5, "results": [{"tokenCount": 3}]}) == (5, 3)
+    assert returned_tokens({}, "plain") == (None, None)
+
+
+@pytest.mark.parametrize("body, text", [
+    ({"outputText": "abc"}, "abc"),
+    ({"results": [{"outputText": "abcd", "tokenCount": 1}]}, "abcd"),
+    ({"content": [{"type": "text", "text": "hi"}]}, "hi"),
+    ("raw", "raw"),
+    ({"embedding": [0.1]}, ""),
+])
+def test_output_estimate_uses_only_the_generated_text(body, text):
+    assert completion_text(body) == text
+    assert estimate_tokens(completion_text(body)) == -(-len(text) // 4)
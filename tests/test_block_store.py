@@ -0,0 +1,69 @@
+# tests/test_block_store.py
+from app.block_store import BlockStore, BlockStoreBuilder
+
+
+def extract_text_from_blocks(res):
+    """The worker's text assembly before BlockStore, kept as the reference."""
+    lines = []
+    for b in res.get("Blocks", []) or []:
+        if b.get("BlockType") == "LINE" and "Text" in b:
+            lines.append(b["Text"])
+    return "\n".join(lines)
+
+
+def line(text, page=1, left=0.1, top=0.1, width=0.2, height=0.02, confidence=99.0):
+    return {"BlockType": "LINE", "Text": text, "Page": page, "Confidence": confidence,
+            "Geometry": {"BoundingBox": {"Left": left, "Top": top, "Width": width, "Height": height}}}
+
+
+RESPONSE = {"Blocks": [
+    {"BlockType": "PAGE", "Page": 1},
+    line("Claim Form", top=0.05),
+    line("Policy Number", top=0.10, width=0.15),
+    line("PL-2024-00987", left=0.40, top=0.101, width=0.15),
+    {"BlockType": "WORD", "Text": "Policy", "Page": 1},
+    line("Claimant Name: Asha Verma", top=0.15, width=0.4),
+    line("Policy No:", page=2, top=0.10, width=0.1),
+    line("PL-2024-11111", page=2, left=0.30, top=0.10, width=0.15),
+    line("Amount Claimed", page=2, top=0.20, width=0.15),
+    line("INR 45,000", page=2, left=0.10, top=0.23, width=0.12),
+]}
+
+
+def test_text_and_offsets_match_extract_text_from_blocks():
+    store = BlockStore.from_response(RESPONSE)
+    assert store.text == extract_text_from_blocks(RESPONSE)
+    assert len(store) == 8
+    lines = store.text.split("\n")
+    assert [store.line_text(i) for i in range(len(store))] == lines
+    assert store.pages() == [(1, "\n".join(lines[:4])), (2, "\n".join(lines[4:]))]
+    assert store.page_numbers == [1, 2] and store.page_range(2) == (4, 8)
+
+
+def test_builder_accumulates_response_pages_and_resets():
+    builder = BlockStoreBuilder()
+    blocks = RESPONSE["Blocks"]
+    store = builder.add(blocks[:4]).add(blocks[4:]).build()
+    assert store.text == BlockStore.from_response(RESPONSE).text
+    assert len(builder.build()) == 0
+    assert BlockStore.from_blocks([]).pages() == []
+
+
+def test_value_right_of_same_line_and_row_band():
+    store = BlockStore.from_response(RESPONSE)
+    assert store.value_right_of("Claimant Name") == "Asha Verma"
+    assert store.value_right_of(r"Policy\s*Number") == "PL-2024-00987"
+    assert store.value_right_of(r"Policy\s*No", page=2) == "PL-2024-11111"
+    assert store.value_right_of("Amount Claimed") is None   # value is below, not to the right
+    assert store.value_right_of("Deductible") is None
+
+
+def test_find_below_and_blocks():
+    store = BlockStore.from_response(RESPONSE)
+    assert store.find("policy") == [1, 4]
+    assert store.find("policy", page=2) == [4]
+    label = store.find("Amount Claimed")[0]
+    assert [store.line_text(j) for j in store.below(label)] == ["INR 45,000"]
+    block = store.block(label)
+    assert (block.page, block.text) == (2, "Amount Claimed")
+    assert abs(block.top - 0.20) < 1e-6 and block.confidence == 99.0
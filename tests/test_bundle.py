@@ -0,0 +1,96 @@
+# tests/test_bundle.py
+import pytest
+
+from app import bundle
+from app.bundle import (build_bundle_response, classify_document, document_fields, merge_documents,
+                        normalize_documents)
+
+
+def doc(s3_key, doc_type, **fields):
+    return {"s3_key": s3_key, "type": doc_type, "fields": dict(dict.fromkeys(bundle.MERGE_FIELDS), **fields)}
+
+
+def test_highest_precedence_source_wins_and_disagreements_are_conflicts():
+    merged = merge_documents([
+        doc("raw/photo.jpg", "photo", amount_claimed="INR 1"),
+        doc("raw/invoice.pdf", "invoice", amount_claimed="INR 52,000.00", policy_number="PL-2024-00987"),
+        doc("raw/form.pdf", "form", amount_claimed="INR 45000", policy_number="PL-2024-00987"),
+    ])
+    assert merged["fields"]["amount_claimed"] == "INR 45000"
+    assert merged["sources"]["amount_claimed"] == "raw/form.pdf"
+    conflict, = merged["conflicts"]
+    assert conflict["field"] == "amount_claimed"
+    assert conflict["chosen"] == {"s3_key": "raw/form.pdf", "type": "form", "value": "INR 45000"}
+    assert [a["s3_key"] for a in conflict["alternatives"]] == ["raw/invoice.pdf", "raw/photo.jpg"]
+
+
+def test_equivalent_values_are_not_conflicts():
+    merged = merge_documents([
+        doc("raw/form.pdf", "form", amount_claimed="INR 45000", claimant_name="Asha Verma"),
+        doc("raw/invoice.pdf", "invoice", amount_claimed="Rs. 45,000.00", claimant_name="ASHA  VERMA."),
+    ])
+    assert merged["conflicts"] == []
+
+
+def test_missing_and_empty_values_fall_through_to_the_next_source():
+    merged = merge_documents([
+        doc("raw/form.pdf", "form", policy_number="", date_of_loss=None),
+        doc("raw/estimate.pdf", "estimate", policy_number="PL-2024-00987", date_of_loss="2024-03-12"),
+    ])
+    assert merged["fields"]["policy_number"] == "PL-2024-00987"
+    assert merged["sources"]["date_of_loss"] == "raw/estimate.pdf"
+    assert merged["fields"]["claimant_name"] is None and "claimant_name" not in merged["sources"]
+    assert merged["conflicts"] == []
+
+
+def test_free_text_and_per_field_precedence(monkeypatch):
+    monkeypatch.setattr(bundle, "FIELD_PRECEDENCE", {"amount_claimed": ("invoice", "form")})
+    merged = merge_documents([
+        doc("raw/form.pdf", "form", amount_claimed="INR 45000", claim_description="Rear bumper damaged"),
+        doc("raw/invoice.pdf", "invoice", amount_claimed="INR 52000", claim_description="Bumper replacement"),
+    ])
+    assert merged["fields"]["amount_claimed"] == "INR 52000"
+    assert merged["fields"]["claim_description"] == "Rear bumper damaged"
+    assert [c["field"] for c in merged["conflicts"]] == ["amount_claimed"]
+
+
+def test_equal_types_keep_request_order():
+    merged = merge_documents([doc("raw/a.pdf", "other", claimant_name="Asha"),
+                              doc("raw/b.pdf", "other", claimant_name="Rahul")])
+    assert merged["sources"]["claimant_name"] == "raw/a.pdf"
+
+
+def test_document_fields_fill_gaps_and_flagged_fields_from_the_llm():
+    result = {
+        "local": {"extraction": {"policy_number": "PL-2024-00987", "amount_claimed": "45", "claimant_name": ""}},
+        "llm": {"extraction": {"amount_claimed": "INR 45000", "claimant_name": "Asha Verma", "policy_number": "X"},
+                "gate": {"fields": ["amount_claimed"]}},
+    }
+    fields = document_fields(result)
+    assert fields["policy_number"] == "PL-2024-00987"
+    assert fields["amount_claimed"] == "INR 45000"
+    assert fields["claimant_name"] == "Asha Verma"
+    assert document_fields({"local": {"extraction": {"policy_number": "P"}},
+                            "llm": {"extraction": {"error": "timeout"}}})["policy_number"] == "P"
+
+
+def test_normalize_documents_and_classification():
+    assert normalize_documents({"s3_keys": ["raw/a.pdf", "raw/a.pdf", "raw/b.pdf"]}) == [
+        {"s3_key": "raw/a.pdf", "type": None}, {"s3_key": "raw/b.pdf", "type": None}]
+    assert normalize_documents({"documents": [{"s3_key": "raw/a.pdf", "type": "receipt"}]})[0]["type"] is None
+    with pytest.raises(ValueError):
+        normalize_documents({})
+    assert classify_document("raw/uuid_repair_invoice.pdf") == "invoice"
+    assert classify_document("raw/scan.pdf", "Policy Number: PL-1") == "form"
+    assert classify_document("raw/scan.pdf", "  ") == "photo"
+
+
+def test_build_bundle_response_reports_failures():
+    documents = [{"s3_key": "raw/claim_form.pdf", "type": None}, {"s3_key": "raw/invoice.pdf", "type": None}]
+    outcomes = [("ok", {"local": {"extraction": {"policy_number": "PL-2024-00987"}, "summary": "Form."}}),
+                ("error", "Textract failed")]
+    resp = build_bundle_response(documents, outcomes, 0.25)
+    assert resp["bundle"] == {"documents": 2, "processed": 1, "failed": 1, "elapsed_ms": 250.0}
+    assert resp["fields"]["policy_number"] == "PL-2024-00987"
+    assert [d["status"] for d in resp["documents"]] == ["ok", "error"]
+    assert "1 failed" in resp["summary"]
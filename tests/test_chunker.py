@@ -0,0 +1,50 @@
+# tests/test_chunker.py
+import pytest
+
+from app.chunker import chunk_text, iter_chunks, iter_page_chunks
+
+PAGES = [
+    (1, "Policy Number: PL-2024-00987\nClaimant Name: Asha Verma\n" + "The kitchen flooded. " * 40),
+    (2, "Amount Claimed: INR 45,000\n" + "Photos and repair estimates are attached. " * 30),
+]
+
+
+def test_offsets_point_into_the_joined_text():
+    text = "\n".join(t for _, t in PAGES)
+    chunks = list(iter_page_chunks(PAGES, chunk_size=200, overlap=50))
+    assert chunks
+    for i, c in enumerate(chunks):
+        assert c["index"] == i
+        assert text[c["start"]:c["end"]] == c["text"]
+
+
+def test_chunks_respect_size_and_never_cross_pages():
+    for c in iter_page_chunks(PAGES, chunk_size=200, overlap=50):
+        assert len(c["text"]) <= 200
+        page_text = dict(PAGES)[c["page"]]
+        assert c["text"] in page_text
+
+
+def test_chunks_cut_at_line_or_sentence_ends():
+    text = "\n".join(t for _, t in PAGES)
+    for c in iter_page_chunks(PAGES, chunk_size=200, overlap=0):
+        end = c["end"]
+        assert end == len(text) or text[end] == "\n" or text[end - 1] in ".!?"
+
+
+def test_consecutive_chunks_overlap():
+    chunks = list(iter_chunks(PAGES[0][1], chunk_size=200, overlap=60))
+    assert any(b["start"] < a["end"] for a, b in zip(chunks, chunks[1:]))
+    no_overlap = list(iter_chunks(PAGES[0][1], chunk_size=200, overlap=0))
+    assert all(b["start"] >= a["end"] for a, b in zip(no_overlap, no_overlap[1:]))
+
+
+def test_word_longer_than_a_chunk_is_hard_split():
+    chunks = chunk_text("x" * 250, chunk_size=100, overlap=0)
+    assert chunks == ["x" * 100, "x" * 100, "x" * 50]
+
+
+def test_blank_text_has_no_chunks_and_size_must_be_positive():
+    assert chunk_text("  \n\n ") == []
+    with pytest.raises(ValueError):
+        list(iter_chunks("text", chunk_size=0))
@@ -0,0 +1,82 @@
+# tests/test_date_parser.py
+import threading
+
+import pytest
+
+from app.date_parser import DateNormalizer
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("2024-03-12", "2024-03-12"),
+    ("12/03/2024", "2024-03-12"),          # day-first by default
+    ("12-03-2024", "2024-03-12"),
+    ("25/12/2024", "2024-12-25"),          # only valid day-first
+    ("12/25/2024", "2024-12-25"),          # only valid month-first
+    ("12 March 2024", "2024-03-12"),
+    ("March 12th, 2024", "2024-03-12"),
+    ("Sept 1 2024", "2024-09-01"),
+    ("loss on 2024/03/12 at noon", "2024-03-12"),
+    ("31/02/2024", None),
+    ("", None),
+    (None, None),
+])
+def test_shapes(raw, expected):
+    assert DateNormalizer(fallback=None).normalize(raw) == expected
+
+
+def test_year_fallback():
+    assert DateNormalizer(fallback="year").normalize("sometime in 2023, reported late") == "2023"
+
+
+def test_fuzzy_fallback_validates_the_year():
+    dates = DateNormalizer(fallback="fuzzy")
+    assert dates.normalize("the 12th of March, 2024 (evening)") == "2024-03-12"
+    assert dates.normalize("no date here") is None
+
+
+def test_learns_month_first_per_source():
+    dates = DateNormalizer(fallback=None)
+    dates.learn(["12/25/2024", "01/31/2024", "not a date"], source="us-form")
+    assert not dates.dayfirst("us-form")
+    assert dates.normalize("03/04/2024", source="us-form") == "2024-03-04"
+    # other documents and calls without a source keep the day-first default
+    assert dates.normalize("03/04/2024", source="other") == "2024-04-03"
+    assert dates.normalize("03/04/2024") == "2024-04-03"
+
+
+def test_ambiguous_values_are_not_evidence():
+    dates = DateNormalizer(fallback=None)
+    dates.learn(["03/04/2024", "05/06/2024"], source="doc")
+    assert dates.dayfirst("doc")
+
+
+def test_sources_are_bounded_lru():
+    dates = DateNormalizer(fallback=None, max_sources=2)
+    for source in ("a", "b", "c"):
+        dates.learn(["12/25/2024"], source=source)
+    assert dates.dayfirst("a")            # evicted: back to the default
+    assert not dates.dayfirst("c")
+
+
+def test_concurrent_learning():
+    dates = DateNormalizer(fallback=None, max_sources=8)
+
+    def worker(n):
+        for i in range(500):
+            dates.learn(["12/25/2024"], source=f"doc-{(n + i) % 16}")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(dates._votes) <= 8
+
+
+def test_worker_extraction_learns_the_document_order():
+    from app import textract_worker
+
+    textract_worker.extract_fields("Invoice issued 12/25/2024\nRepaired 03/04/2024\n", source="us-claim")
+    textract_worker.extract_fields("Repaired 03/04/2024\n", source="in-claim")
+    assert textract_worker._DATES.normalize("03/04/2024", source="us-claim") == "2024-03-04"
+    assert textract_worker._DATES.normalize("03/04/2024", source="in-claim") == "2024-04-03"
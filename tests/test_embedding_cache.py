@@ -0,0 +1,53 @@
+# tests/test_embedding_cache.py
+import pytest
+
+from app import embedding_cache
+from app.embedding_cache import EmbeddingCache, cache_key, cached_embedding
+
+VECTOR = [0.1, 1 / 3, -2.718281828459045, 12345.6789]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = EmbeddingCache(path=str(tmp_path / "embedding_cache.db"), max_bytes=1024 * 1024)
+    monkeypatch.setattr(embedding_cache, "get_cache", lambda: cache)
+    return cache
+
+
+def test_hit_returns_the_same_vector_as_the_miss(cache):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return list(VECTOR)
+
+    miss = cached_embedding("titan", "Please attach photos", compute)
+    hit = cached_embedding("titan", "Please attach photos", compute)
+    assert len(calls) == 1
+    assert hit == miss
+    assert miss == pytest.approx(VECTOR, rel=1e-6)
+
+
+def test_key_normalizes_whitespace_and_is_per_model():
+    assert cache_key("titan", "Please  attach\nphotos ") == cache_key("titan", "Please attach photos")
+    assert cache_key("titan", "Please attach photos") != cache_key("cohere", "Please attach photos")
+
+
+def test_non_vectors_are_returned_but_not_cached(cache):
+    assert cached_embedding("titan", "nested", lambda: [[0.1, 0.2]]) == [[0.1, 0.2]]
+    assert cached_embedding("titan", "none", lambda: None) is None
+    assert cache.size() == (0, 0)
+
+
+def test_evicts_least_recently_used_down_to_the_bound(cache, monkeypatch):
+    clock = iter(range(1, 1000))
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: float(next(clock)))
+    cache.max_bytes = 4 * 4 * 10   # ten 4-dimension vectors
+    for i in range(12):
+        cache.put("titan", f"chunk {i}", VECTOR)
+    cache.get("titan", "chunk 0")   # refresh the oldest entry
+    assert cache.evict() > 0
+    entries, nbytes = cache.size()
+    assert nbytes <= cache.max_bytes * embedding_cache.EVICT_TO_FRACTION
+    assert cache.get("titan", "chunk 0") is not None
+    assert cache.get("titan", "chunk 1") is None
@@ -0,0 +1,81 @@
+# tests/test_llm_gate.py
+from app import llm_gate
+from app.llm_gate import acceptor, decide, select, skip_summary
+from app.validator import validate_extraction
+
+CLEAN = {"policy_number": "PL-2024-00987", "claimant_name": "Asha Verma", "date_of_loss": "2024-03-12",
+         "amount_claimed": "INR 45000.00", "claim_description": "Rear bumper damaged"}
+
+
+def gate_for(extraction, threshold=None):
+    return decide(extraction, validate_extraction(extraction), threshold=threshold)
+
+
+def test_clean_extraction_skips_the_llm():
+    gate = gate_for(CLEAN)
+    assert gate == {"decision": "skip", "fields": [], "score": 1.0, "threshold": llm_gate.LLM_GATE_THRESHOLD}
+    assert skip_summary(gate)
+
+
+def test_flagged_and_missing_fields_are_requested():
+    gate = gate_for(dict(CLEAN, amount_claimed="INR -5", claimant_name=""))
+    assert gate["decision"] == "partial"
+    assert gate["fields"] == ["claimant_name", "amount_claimed"]
+    assert not skip_summary(gate)
+
+
+def test_threshold_decides_for_a_flagged_but_complete_extraction():
+    flagged = dict(CLEAN, amount_claimed="INR -5")   # score 0.7, nothing missing
+    assert gate_for(flagged, threshold=0.7)["decision"] == "skip"
+    assert gate_for(flagged, threshold=0.71)["fields"] == ["amount_claimed"]
+
+
+def test_a_missing_field_is_never_skipped_whatever_the_threshold():
+    gate = gate_for(dict(CLEAN, claim_description=None), threshold=0.0)
+    assert gate["decision"] == "partial" and gate["fields"] == ["claim_description"]
+
+
+def test_no_usable_local_extraction_asks_for_everything(monkeypatch):
+    assert decide({"error": "x"}, None)["decision"] == "full"
+    assert decide("not a dict", {"score": 1.0, "issues": []})["fields"] == list(llm_gate.LLM_FIELDS)
+    assert gate_for({})["decision"] == "full"
+    monkeypatch.setattr(llm_gate, "LLM_GATE_ENABLED", False)
+    assert gate_for(CLEAN)["decision"] == "full"
+
+
+def test_select_keeps_only_the_requested_fields():
+    gate = gate_for(dict(CLEAN, amount_claimed=None))
+    assert select(dict(CLEAN, policy_number="LLM-1"), gate) == {"amount_claimed": "INR 45000.00"}
+    full = {"decision": "full", "fields": list(llm_gate.LLM_FIELDS)}
+    assert select(CLEAN, full) is CLEAN
+
+
+def test_acceptor_checks_only_the_requested_fields():
+    local = dict(CLEAN, amount_claimed="INR -5", date_of_loss="sometime")
+    gate = {"decision": "partial", "fields": ["amount_claimed"]}
+    accept = acceptor(local, gate)
+    assert accept({"amount_claimed": "INR 45000"})     # the unrequested bad date does not matter
+    assert not accept({"amount_claimed": "INR 0"})
+    assert not accept({})
+
+
+def test_pipeline_sends_no_prompt_for_a_clean_extraction(monkeypatch):
+    import asyncio
+
+    from app import bedrock_client
+    from tests.fakes import FakeInvoker
+    from tests.test_async_pipeline import make_pipeline
+
+    monkeypatch.setattr(bedrock_client, "ENABLE_BEDROCK", True)
+    monkeypatch.setattr(bedrock_client, "create_embedding", lambda text, model=None: [0.0, 1.0])
+    invoker = FakeInvoker()
+    pipeline, _, _ = make_pipeline(invoker=invoker, pending=0)
+    try:
+        resp = asyncio.run(pipeline.process("raw/claim-1.png"))
+    finally:
+        pipeline.close()
+
+    assert resp["validation"]["score"] >= llm_gate.LLM_GATE_THRESHOLD
+    assert resp["llm"]["gate"]["decision"] == "skip"
+    assert resp["llm"]["extraction"] == {"note": llm_gate.SKIPPED_NOTE}
+    assert invoker.prompts == []
@@ -0,0 +1,84 @@
+# tests/test_model_invoker.py
+import pytest
+
+from app import bedrock_client, model_invoker
+from app.metrics import metrics
+from app.model_invoker import ModelInvoker, try_parse_json_from_text
+from tests.fakes import FakeBedrock
+
+GOOD = '{"amount_claimed": "INR 45000"}'
+
+
+@pytest.fixture
+def bedrock(monkeypatch):
+    def install(**replies):
+        fake = FakeBedrock(replies)
+        monkeypatch.setattr(bedrock_client, "ENABLE_BEDROCK", True)
+        monkeypatch.setattr(bedrock_client, "invoke_model", fake.invoke_model)
+        monkeypatch.setattr(model_invoker.time, "sleep", lambda seconds: None)
+        return fake
+    return install
+
+
+def test_parse_json_from_text():
+    assert try_parse_json_from_text('Sure! {"a": 1} Hope that helps.') == {"a": 1}
+    assert try_parse_json_from_text("no json here") is None
+    assert try_parse_json_from_text("{not json}") is None
+
+
+def test_fast_tier_answer_is_accepted(bedrock):
+    fake = bedrock(fast=[GOOD], large=[GOOD])
+    res = ModelInvoker(text_model_id="large").generate_json("p", tiers=["fast", "large"])
+    assert fake.calls == ["fast"]
+    assert res["parsed"] == {"amount_claimed": "INR 45000"}
+    assert res["model_id"] == "fast" and res["tier"] == 0 and res["escalations"] == []
+
+
+def test_unparseable_and_invalid_replies_escalate(bedrock):
+    fake = bedrock(fast=["I think it is 45000"], mid=['{"amount_claimed": "INR 0"}'], large=[GOOD])
+    res = ModelInvoker().generate_json(
+        "p", tiers=["fast", "mid", "large"], validate=lambda parsed: parsed.get("amount_claimed") != "INR 0")
+    assert fake.calls == ["fast", "mid", "large"]
+    assert res["model_id"] == "large" and res["tier"] == 2
+    assert res["escalations"] == [{"model_id": "fast", "reason": "parse"},
+                                  {"model_id": "mid", "reason": "validation"}]
+
+
+def test_a_failing_tier_escalates_after_its_retries(bedrock):
+    fake = bedrock(fast=[RuntimeError("throttled")] * model_invoker.DEFAULT_RETRIES, large=[GOOD])
+    res = ModelInvoker().generate_json("p", tiers=["fast", "large"])
+    assert fake.calls == ["fast"] * model_invoker.DEFAULT_RETRIES + ["large"]
+    assert res["escalations"] == [{"model_id": "fast", "reason": "error"}]
+    assert res["parsed"] == {"amount_claimed": "INR 45000"}
+
+
+def test_retry_recovers_within_a_tier(bedrock):
+    fake = bedrock(fast=[RuntimeError("throttled"), GOOD])
+    res = ModelInvoker().generate_json("p", tiers=["fast"])
+    assert fake.calls == ["fast", "fast"] and res["escalations"] == []
+
+
+def test_last_tier_answer_is_returned_as_is(bedrock):
+    bedrock(fast=["nope"], large=["still nope"])
+    res = ModelInvoker().generate_json("p", tiers=["fast", "large"])
+    assert res["success"] and res["parsed"] is None
+    assert res["model_id"] == "large" and res["text"] == "still nope"
+
+
+def test_disabled_bedrock_does_not_escalate(monkeypatch):
+    monkeypatch.setattr(bedrock_client, "ENABLE_BEDROCK", False)
+    res = ModelInvoker().generate_json("p", tiers=["fast", "large"])
+    assert res["note"] == "bedrock disabled" and res["model_id"] == "fast" and res["escalations"] == []
+
+
+def test_cascade_report_counts_escalations(bedrock):
+    bedrock(**{"report-fast": ["nope", GOOD], "report-large": [GOOD]})
+    invoker = ModelInvoker()
+    tiers = ["report-fast", "report-large"]
+    invoker.generate_json("p", tiers=tiers)
+    invoker.generate_json("p", tiers=tiers)
+    fast, large = invoker.cascade_report(tiers)
+    assert (fast["calls"], fast["accepted"], fast["escalated"]) == (2, 1, {"parse": 1})
+    assert fast["escalation_rate"] == 0.5
+    assert (large["calls"], large["accepted"]) == (1, 1)
+    assert metrics.counter("model.tier.report-fast.escalated.parse") == 1
@@ -0,0 +1,109 @@
+# tests/test_native_text.py
+import pytest
+
+from app import native_text, textract_worker
+from tests.fakes import FakeS3
+
+pytest.importorskip("pypdf")
+
+NATIVE_LINES = ["Claim Form", "Policy Number: PL-2024-00987", "Claimant Name: Asha Verma",
+                "Amount Claimed: INR 45,000"]
+GARBAGE_LINES = ["(cid:12)(cid:7) (cid:99)(cid:3)(cid:41) (cid:8)(cid:8)(cid:15)(cid:2) (cid:71)(cid:19)"] * 3
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages) -> bytes:
+    """A minimal PDF with one page per list of text lines (an empty list is an image-only page)."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        ops = "".join("(" + _pdf_escape(ln) + ") Tj 0 -14 Td " for ln in lines)
+        stream = f"BT /F1 11 Tf 72 720 Td {ops}ET" if lines else ""
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for n, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{n} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
+
+
+def test_page_quality():
+    assert native_text.page_quality("\n".join(NATIVE_LINES)) >= native_text.NATIVE_MIN_QUALITY
+    assert native_text.page_quality("Claim Form") == 0.0   # too short to trust
+    assert native_text.page_quality("\n".join(GARBAGE_LINES)) < native_text.NATIVE_MIN_QUALITY
+    assert native_text.page_quality("") == 0.0
+
+
+def test_plan_sends_only_image_and_garbage_pages_to_ocr():
+    pdf = make_pdf([NATIVE_LINES, [], GARBAGE_LINES, NATIVE_LINES[::-1]])
+    native, ocr = native_text.plan_ocr(pdf)
+    assert [page for page, _ in native] == [1, 4]
+    assert native[0][1] == "\n".join(NATIVE_LINES)
+    assert ocr == [2, 3]
+    subset = native_text.build_subset_pdf(pdf, ocr)
+    assert len(native_text.extract_native_pages(subset)) == 2
+
+
+def test_not_a_pdf_or_disabled_goes_to_ocr(monkeypatch):
+    assert native_text.plan_ocr(b"\x89PNG...") == (None, None)
+    assert native_text.plan_ocr(b"%PDF-1.4 truncated") == (None, None)
+    monkeypatch.setattr(native_text, "NATIVE_TEXT_ENABLED", False)
+    assert native_text.plan_ocr(make_pdf([NATIVE_LINES])) == (None, None)
+
+
+def test_merge_pages_maps_subset_pages_back():
+    merged = native_text.merge_pages([(1, "one"), (4, "four")], [(1, "two"), (2, "three"), (3, "extra")], [2, 3])
+    assert merged == [(1, "one"), (2, "two"), (3, "three"), (4, "four")]
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    s3 = FakeS3()
+    ocr_calls = []
+
+    def fake_ocr_pages(bucket, key, job_id=None, on_job=None):
+        ocr_calls.append((key, s3.objects.get(key)))
+        pages = native_text.extract_native_pages(s3.objects[key]) if key.endswith(".pdf") else [(1, "")]
+        return [(p, f"OCR text of subset page {p}") for p, _ in pages]
+
+    monkeypatch.setattr(textract_worker, "s3", s3)
+    monkeypatch.setattr(textract_worker, "ocr_pages", fake_ocr_pages)
+    return s3, ocr_calls
+
+
+def test_born_digital_pdf_skips_textract(worker):
+    s3, ocr_calls = worker
+    s3.put_object(Bucket="b", Key="raw/form.pdf", Body=make_pdf([NATIVE_LINES, NATIVE_LINES]))
+    pages = textract_worker.extract_document_pages("raw/form.pdf", bucket="b")
+    assert [p for p, _ in pages] == [1, 2] and ocr_calls == []
+
+
+def test_mixed_pdf_ocrs_only_the_bad_pages(worker):
+    s3, ocr_calls = worker
+    s3.put_object(Bucket="b", Key="raw/mixed.pdf", Body=make_pdf([NATIVE_LINES, [], NATIVE_LINES]))
+    pages = textract_worker.extract_document_pages("raw/mixed.pdf", bucket="b")
+    assert pages == [(1, "\n".join(NATIVE_LINES)), (2, "OCR text of subset page 1"), (3, "\n".join(NATIVE_LINES))]
+    (subset_key, subset_pdf), = ocr_calls
+    assert len(native_text.extract_native_pages(subset_pdf)) == 1
+    assert subset_key not in s3.objects and subset_key in s3.deleted
+
+
+def test_scans_and_images_go_straight_to_textract(worker):
+    s3, ocr_calls = worker
+    s3.put_object(Bucket="b", Key="raw/scan.pdf", Body=make_pdf([[], []]))
+    textract_worker.extract_document_pages("raw/scan.pdf", bucket="b")
+    textract_worker.extract_document_pages("raw/photo.jpg", bucket="b")
+    assert [key for key, _ in ocr_calls] == ["raw/scan.pdf", "raw/photo.jpg"]
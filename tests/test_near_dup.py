@@ -0,0 +1,85 @@
+# tests/test_near_dup.py
+import hashlib
+
+import numpy as np
+import pytest
+
+from app import near_dup
+from app.near_dup import NearDupIndex, band_buckets, estimate_jaccard, minhash, shingles
+
+BASE = " ".join(f"claim{i} note{i % 7} amount{i * 3}" for i in range(200))
+
+
+@pytest.fixture
+def index(tmp_path):
+    return NearDupIndex(path=str(tmp_path / "near_dup.db"), threshold=0.5)
+
+
+def reference_minhash(text):
+    """The straightforward all-at-once MinHash, to pin the blocked version against."""
+    x = np.array([int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+                  & near_dup._PRIME for s in shingles(text)], dtype=np.uint64)
+    return ((np.outer(near_dup._A, x) + near_dup._B[:, None]) % near_dup._PRIME).min(axis=1)
+
+
+def test_blocked_minhash_matches_the_full_matrix(monkeypatch):
+    monkeypatch.setattr(near_dup, "MINHASH_BLOCK", 64)
+    sig = minhash(BASE)
+    assert sig.dtype == np.uint64 and sig.shape == (near_dup.NUM_PERM,)
+    assert np.array_equal(sig, reference_minhash(BASE))
+
+
+def test_short_and_empty_text():
+    assert shingles("Rear bumper") == {"rear bumper"}
+    assert minhash("") is None and minhash("  ,. ") is None
+
+
+def test_signatures_are_stable_and_case_insensitive():
+    assert np.array_equal(minhash(BASE), minhash(BASE.upper()))
+    assert len(band_buckets(minhash(BASE))) == near_dup.BANDS
+
+
+def test_jaccard_estimate_tracks_overlap():
+    words = BASE.split()
+    near = " ".join(words[:-20] + ["edited"] * 20)
+    far = " ".join(f"other{i}" for i in range(600))
+    assert estimate_jaccard(minhash(BASE), minhash(BASE)) == 1.0
+    assert estimate_jaccard(minhash(BASE), minhash(near)) > 0.8
+    assert estimate_jaccard(minhash(BASE), minhash(far)) < 0.1
+
+
+def test_identical_bands_share_buckets():
+    a, b = minhash(BASE), minhash(BASE)
+    b[:near_dup.ROWS] += 1   # only the first band differs
+    buckets_a, buckets_b = band_buckets(a), band_buckets(b)
+    assert buckets_a[0] != buckets_b[0]
+    assert buckets_a[1:] == buckets_b[1:]
+
+
+def test_index_finds_near_duplicates_above_the_threshold(index):
+    words = BASE.split()
+    assert index.check_and_add("raw/original.pdf", BASE) == []
+    assert index.check_and_add("raw/unrelated.pdf", " ".join(f"other{i}" for i in range(600))) == []
+
+    dups = index.check_and_add("raw/resubmitted.pdf", " ".join(words[:-20] + ["edited"] * 20))
+    assert [d["doc_key"] for d in dups] == ["raw/original.pdf"]
+    assert 0.8 < dups[0]["jaccard"] < 1.0
+    assert index.count() == 3
+
+
+def test_threshold_filters_bucket_collisions(index):
+    sig = minhash(BASE)
+    other = sig.copy()
+    other[near_dup.ROWS:] += 1   # shares one band (a bucket collision) but ~3% of positions
+    index.add("raw/collision.pdf", other)
+    assert index.query(sig) == []
+    index.threshold = 0.01
+    assert [d["doc_key"] for d in index.query(sig)] == ["raw/collision.pdf"]
+
+
+def test_re_adding_a_document_replaces_its_buckets(index):
+    index.add("raw/a.pdf", minhash(BASE))
+    index.add("raw/a.pdf", minhash(BASE))
+    rows = index._conn().execute("SELECT COUNT(*) FROM lsh_buckets WHERE doc_key = ?", ("raw/a.pdf",)).fetchone()
+    assert rows[0] == near_dup.BANDS
+    assert index.query(minhash(BASE), exclude="raw/a.pdf") == []
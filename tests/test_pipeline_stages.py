@@ -0,0 +1,105 @@
+# tests/test_pipeline_stages.py
+import json
+
+import pytest
+
+from app import artifacts, pipeline_stages as ps
+from app.chunker import iter_page_chunks
+from tests.fakes import FakeS3
+
+PAGES = [(1, "Policy Number: PL-2024-00987\nClaimant Name: Asha Verma"),
+         (2, "Amount Claimed: INR 45,000\nCause of Loss: Rear-end collision")]
+TEXT = "\n".join(page_text for _, page_text in PAGES)
+PROCESSED_KEY = "processed/claim.txt"
+
+
+def current_manifest(etag="etag-1"):
+    from scripts.local_extract import extract_from_text
+    from scripts.local_summary import summarize_text
+
+    stages = ps.ingest_entries(etag, TEXT, PAGES, list(iter_page_chunks(PAGES)))
+    stages.update(ps.analysis_entries(TEXT, extract_from_text(TEXT), summarize_text(TEXT)))
+    return ps.new_manifest("raw/claim.pdf", stages)
+
+
+def bump(monkeypatch, **versions):
+    monkeypatch.setattr(ps, "_versions", dict(ps.stage_versions(), **versions))
+
+
+def test_nothing_to_do_for_a_current_manifest():
+    assert ps.plan(current_manifest(), etag="etag-1") == []
+    assert ps.plan(current_manifest(), etag=None) == []   # unknown ETag: the recorded OCR input is trusted
+
+
+@pytest.mark.parametrize("stage, expected", [
+    ("extract", ["extract"]),
+    ("summarize", ["summarize"]),
+    ("embed", ["embed"]),
+    ("chunk", ["chunk", "embed"]),
+])
+def test_a_bumped_stage_and_its_downstream_are_planned(monkeypatch, stage, expected):
+    manifest = current_manifest()
+    bump(monkeypatch, **{stage: "bumped"})
+    assert ps.plan(manifest, etag="etag-1") == expected
+
+
+def test_a_changed_upload_invalidates_every_stage(monkeypatch):
+    assert ps.plan(current_manifest(), etag="etag-2") == list(ps.STAGES)
+    monkeypatch.setattr(ps, "OCR_VERSION", "2")
+    assert ps.plan(current_manifest(), etag="etag-1") == list(ps.STAGES)
+
+
+def test_force_and_missing_entries():
+    manifest = current_manifest()
+    assert ps.plan(manifest, etag="etag-1", force=("summarize",)) == ["summarize"]
+    del manifest["stages"]["chunk"]
+    assert ps.plan(manifest, etag="etag-1") == ["chunk", "embed"]
+
+
+def test_page_spans_round_trip():
+    spans = ps.page_spans(PAGES)
+    assert ps.pages_from_spans(TEXT, spans) == PAGES
+
+
+@pytest.fixture
+def corpus(monkeypatch):
+    from scripts import reprocess
+
+    s3 = FakeS3({"raw/claim.pdf": b"pdf"})
+    s3.put_object(Bucket="b", **artifacts.text_put_kwargs(PROCESSED_KEY, TEXT))
+    s3.put_object(Bucket="b", **ps.manifest_put_kwargs(PROCESSED_KEY, current_manifest(etag="etag-3")))
+    monkeypatch.setattr(reprocess, "s3", s3)
+    # FakeS3 ETags are etag-<size>
+    assert s3.head_object(Bucket="b", Key="raw/claim.pdf")["ETag"] == '"etag-3"'
+    return reprocess, s3
+
+
+def stored_manifest(s3):
+    return json.loads(artifacts.decode(s3.objects[ps.manifest_key_for(PROCESSED_KEY)]))
+
+
+def test_reprocess_runs_nothing_for_an_unchanged_document(corpus):
+    reprocess, s3 = corpus
+    before = dict(s3.objects)
+    assert reprocess.reprocess_document(PROCESSED_KEY) == {"processed_key": PROCESSED_KEY, "planned": [], "ran": []}
+    assert s3.objects == before
+
+
+def test_reprocess_reruns_only_the_bumped_stage(corpus, monkeypatch):
+    reprocess, s3 = corpus
+    bump(monkeypatch, extract="bumped")
+    out = reprocess.reprocess_document(PROCESSED_KEY)
+    assert out["planned"] == ["extract"] and out["ran"] == ["extract"]
+    manifest = stored_manifest(s3)
+    assert manifest["stages"]["extract"]["version"] == "bumped"
+    assert artifacts.extraction_key_for(PROCESSED_KEY) in s3.objects
+    assert reprocess.reprocess_document(PROCESSED_KEY)["planned"] == []
+
+
+def test_unchanged_chunk_output_does_not_reembed(corpus, monkeypatch):
+    reprocess, s3 = corpus
+    bump(monkeypatch, chunk="bumped")
+    out = reprocess.reprocess_document(PROCESSED_KEY)
+    assert out["planned"] == ["chunk", "embed"]
+    assert out["ran"] == ["chunk"]   # same chunks, so the embeddings stay current
+    assert artifacts.embeddings_key_for(PROCESSED_KEY) not in s3.objects
@@ -0,0 +1,83 @@
+# tests/test_prompt_manager.py
+import pytest
+
+from app import prompt_manager
+from app.prompt_manager import (EXTRACTION_INSTRUCTION, EXTRACTION_TEMPLATE_JSON, SUMMARY_INSTRUCTION,
+                                SUMMARY_TEMPLATE, PromptTemplateManager, extraction_instruction_for,
+                                extraction_schema_for, limit_chars)
+
+DOCUMENT = "Policy Number: PL-2024-00987\nClaimant Name: Asha Verma\nAmount Claimed: INR 45,000\n"
+
+
+def jinja_render(source, **values):
+    jinja2 = pytest.importorskip("jinja2")
+    return jinja2.Template(source).render(**values)
+
+
+def test_output_matches_jinja():
+    ptm = PromptTemplateManager()
+    schema = extraction_schema_for(["claimant_name"])
+    assert ptm.render("extraction", EXTRACTION_INSTRUCTION, schema, DOCUMENT) == jinja_render(
+        EXTRACTION_TEMPLATE_JSON, instruction=EXTRACTION_INSTRUCTION, context=schema, document=DOCUMENT)
+    assert ptm.render("summary", SUMMARY_INSTRUCTION, "", DOCUMENT) == jinja_render(
+        SUMMARY_TEMPLATE, instruction=SUMMARY_INSTRUCTION, context="", document=DOCUMENT)
+
+
+def test_partial_extraction_schema_lists_only_the_requested_fields():
+    fields = ["date_of_loss", "amount_claimed"]
+    prompt = PromptTemplateManager().render("extraction", extraction_instruction_for(fields),
+                                            extraction_schema_for(fields), DOCUMENT)
+    header = prompt.split("DOCUMENT:")[0]
+    assert '"date_of_loss"' in header and '"amount_claimed"' in header
+    assert '"policy_number"' not in header and '"claimant_name"' not in header
+
+
+def test_extraction_without_context_uses_the_full_schema():
+    prompt = PromptTemplateManager().render("extraction", EXTRACTION_INSTRUCTION, None, DOCUMENT)
+    assert prompt_manager.EXTRACTION_SCHEMA in prompt
+
+
+def test_unknown_kind_and_unsupported_template():
+    with pytest.raises(ValueError):
+        PromptTemplateManager().render("translation", "x", "", DOCUMENT)
+    with pytest.raises(ValueError):
+        prompt_manager._compile("{% if x %}{{ document }}{% endif %}", "i", "")
+
+
+def test_per_model_limits(monkeypatch):
+    monkeypatch.setattr(prompt_manager, "PROMPT_MAX_TOKENS", 1000)
+    monkeypatch.setattr(prompt_manager, "PROMPT_MODEL_TOKEN_LIMITS", {"small": 100})
+    assert limit_chars() == 1000 * prompt_manager.CHARS_PER_TOKEN
+    assert limit_chars("small") == 100 * prompt_manager.CHARS_PER_TOKEN
+    assert limit_chars(["big", "small"]) == 100 * prompt_manager.CHARS_PER_TOKEN
+    assert prompt_manager._parse_limits("a=10, b=x,c=20") == {"a": 10, "c": 20}
+
+
+def long_document():
+    filler = "\n".join(f"Line {i}: the weather was unremarkable and nothing else happened." for i in range(400))
+    return ("Policy Number: PL-2024-00987\nClaimant Name: Asha Verma\n" + filler[:12000]
+            + "\nDate of loss 2024-03-12, amount claimed INR 45,000\n" + filler[12000:])
+
+
+def test_extraction_keeps_the_first_and_best_matching_chunks(monkeypatch):
+    monkeypatch.setattr(prompt_manager, "PROMPT_MODEL_TOKEN_LIMITS", {"small": 1000})
+    prompt = PromptTemplateManager().render("extraction", EXTRACTION_INSTRUCTION, "", long_document(),
+                                            model_id="small")
+    assert len(prompt) <= limit_chars("small")
+    assert "PL-2024-00987" in prompt and "amount claimed INR 45,000" in prompt
+
+
+def test_summary_keeps_head_and_tail(monkeypatch):
+    monkeypatch.setattr(prompt_manager, "PROMPT_MODEL_TOKEN_LIMITS", {"small": 1000})
+    document = long_document()
+    prompt = PromptTemplateManager().render("summary", SUMMARY_INSTRUCTION, "", document, model_id="small")
+    assert len(prompt) <= limit_chars("small")
+    assert "characters omitted" in prompt
+    assert "PL-2024-00987" in prompt and prompt.endswith(document[-50:].rstrip("\n"))
+
+
+def test_render_many_matches_render():
+    ptm = PromptTemplateManager()
+    documents = [f"Policy Number: PL-{i:05d}" for i in range(50)] + ["", None]
+    prompts = ptm.render_many("summary", SUMMARY_INSTRUCTION, iter(documents))
+    assert prompts == [ptm.render("summary", SUMMARY_INSTRUCTION, "", d) for d in documents]
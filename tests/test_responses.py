@@ -0,0 +1,91 @@
+# tests/test_responses.py
+import gzip
+import uuid
+
+import pytest
+
+from app import responses
+from app.responses import parse_fields, project, projection_tag
+
+DOC = {"claim": {"policy_number": "PL-2024-00987", "amount_claimed": "INR 45000.00"},
+       "validation": {"score": 0.7, "issues": ["date_of_loss_missing"]},
+       "local": {"summary": "Rear bumper damaged."}}
+
+
+def test_project_keeps_only_the_requested_paths():
+    assert project(DOC, parse_fields("claim.policy_number, validation.score")) == {
+        "claim": {"policy_number": "PL-2024-00987"}, "validation": {"score": 0.7}}
+    assert project(DOC, ["local"]) == {"local": {"summary": "Rear bumper damaged."}}
+    assert project(DOC, ["claim.missing", "nope.deeper", "local.summary.x"]) == {}
+    assert project(DOC, []) is DOC
+    assert parse_fields(None) == [] and parse_fields(" a , ,b ") == ["a", "b"]
+
+
+def test_projection_tag_depends_on_version_and_projection_not_order():
+    assert projection_tag(3, ["a", "b"]) == projection_tag(3, ["b", "a"])
+    assert projection_tag(3, ["a"]) != projection_tag(4, ["a"])
+    assert projection_tag(3, ["a"]) != projection_tag(3, ["b"])
+    assert projection_tag(3, []) == "v3-all"
+
+
+@pytest.fixture
+def stored():
+    from app import main
+
+    key = f"processed/{uuid.uuid4().hex}.txt"
+    main.get_store().upsert(key, fields={"policy_number": "PL-2024-00987"}, digest="d1",
+                            result={"validation": {"score": 0.7}, "local": {"summary": "x" * 2000}})
+    return main, main.app.test_client(), key
+
+
+def test_result_endpoint_projects_fields(stored):
+    main, client, key = stored
+    resp = client.get(f"/results/{key}?fields=claim.policy_number,validation.score")
+    assert resp.status_code == 200
+    assert resp.get_json() == {"claim": {"policy_number": "PL-2024-00987"}, "validation": {"score": 0.7}}
+    assert client.get("/results/processed/missing.txt").status_code == 404
+
+
+def test_matching_if_none_match_answers_304(stored):
+    main, client, key = stored
+    first = client.get(f"/results/{key}?fields=claim")
+    etag = first.headers["ETag"]
+    again = client.get(f"/results/{key}?fields=claim", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.data == b""
+    assert again.headers["ETag"] == etag
+    # another projection of the same version is a different representation
+    assert client.get(f"/results/{key}?fields=validation", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_etag_changes_with_the_row_version(stored):
+    main, client, key = stored
+    etag = client.get(f"/results/{key}").headers["ETag"]
+    main.get_store().upsert(key, fields={"claimant_name": "Asha Verma"})
+    resp = client.get(f"/results/{key}", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+    assert resp.get_json()["claim"]["claimant_name"] == "Asha Verma"
+
+
+def test_large_responses_are_compressed_when_accepted(stored, monkeypatch):
+    main, client, key = stored
+    monkeypatch.setattr(responses, "_HAS_BROTLI", False)
+    resp = client.get(f"/results/{key}", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert b"PL-2024-00987" in gzip.decompress(resp.data)
+    plain = client.get(f"/results/{key}")
+    assert "Content-Encoding" not in plain.headers and plain.get_json()["claim"]["policy_number"]
+
+
+def test_unchanged_upsert_keeps_the_version_and_etag(stored):
+    main, client, key = stored
+    store = main.get_store()
+    etag = client.get(f"/results/{key}").headers["ETag"]
+    version = store.version(key)
+    # what a repeated backfill does: the same fields and digest again
+    store.upsert_many([{"processed_key": key, "fields": {"policy_number": "PL-2024-00987"}, "digest": "d1"}])
+    store.upsert(key, fields={"policy_number": "PL-2024-00987"})
+    assert store.version(key) == version
+    assert client.get(f"/results/{key}", headers={"If-None-Match": etag}).status_code == 304
+    store.upsert(key, digest="d2")
+    assert store.version(key) == version + 1
@@ -0,0 +1,112 @@
+# tests/test_singleflight.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_callers_share_one_run():
+    sf = SingleFlight(retention=0)
+    calls = []
+    started = threading.Event()
+
+    def work():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(sf.do("k", work)))
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lambda: results.append(sf.do("k", work))) for _ in range(4)]
+    for t in followers:
+        t.start()
+    for t in [leader] + followers:
+        t.join()
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert {r for r, _ in results} == {"result"}
+    assert sf.in_flight() == 0
+
+
+def test_retention_and_retain_predicate():
+    sf = SingleFlight(retention=60, retain=lambda r: r != "bad")
+    assert sf.do("k", lambda: "good") == ("good", False)
+    assert sf.do("k", lambda: "other") == ("good", True)
+    assert sf.do("b", lambda: "bad") == ("bad", False)
+    assert sf.do("b", lambda: "fresh") == ("fresh", False)
+    sf.forget("k")
+    assert sf.do("k", lambda: "new") == ("new", False)
+
+
+def test_errors_reach_every_caller_and_are_not_retained():
+    sf = SingleFlight(retention=60)
+
+    def boom():
+        raise ValueError("textract failed")
+
+    with pytest.raises(ValueError):
+        sf.do("k", boom)
+    assert sf.do("k", lambda: "ok") == ("ok", False)
+
+
+def test_async_callers_share_one_run():
+    async def main():
+        sf = AsyncSingleFlight(retention=0)
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 42
+
+        results = await asyncio.gather(*(sf.do("k", work) for _ in range(5)))
+        return calls, results
+
+    calls, results = asyncio.run(main())
+    assert len(calls) == 1
+    assert sorted(results) == [(42, False)] + [(42, True)] * 4
+
+
+def test_async_cancelled_leader_does_not_cancel_followers():
+    async def main():
+        sf = AsyncSingleFlight(retention=0)
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return 42
+
+        leader = asyncio.create_task(sf.do("k", work))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(sf.do("k", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    leader_result, follower_result = asyncio.run(main())
+    assert isinstance(leader_result, asyncio.CancelledError)
+    assert follower_result == (42, True)
+
+
+def test_async_errors_reach_every_caller_and_are_not_retained():
+    async def main():
+        sf = AsyncSingleFlight(retention=60)
+
+        async def boom():
+            await asyncio.sleep(0.01)
+            raise ValueError("textract failed")
+
+        async def ok():
+            return "ok"
+
+        errors = await asyncio.gather(sf.do("k", boom), sf.do("k", boom), return_exceptions=True)
+        return errors, await sf.do("k", ok), await sf.do("k", ok)
+
+    errors, first, second = asyncio.run(main())
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert first == ("ok", False) and second == ("ok", True)
@@ -0,0 +1,142 @@
+# tests/test_summarizer.py
+import sqlite3
+import threading
+
+import pytest
+
+from app import summarizer
+from app.prompt_manager import PromptTemplateManager
+from app.summarizer import MapReduceSummarizer, SummaryCache, summarize_llm
+from tests.fakes import FakeInvoker
+
+PARAGRAPH = "The insured vehicle was parked outside the office when a delivery van reversed into it. "
+
+
+def document(n_chunks, chunk_size=200):
+    return "\n\n".join(f"Section {i}. " + PARAGRAPH * (chunk_size // len(PARAGRAPH)) for i in range(n_chunks))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SummaryCache(path=str(tmp_path / "summary_cache.db"), max_bytes=1024 * 1024)
+
+
+def recording_summarizer(cache, name="test", fanout=2, chunk_size=200):
+    calls = {"map": [], "reduce": []}
+
+    def summarize_chunk(text):
+        calls["map"].append(text)
+        return text.split(".")[0]
+
+    def combine(parts, final):
+        calls["reduce"].append((tuple(parts), final))
+        return ("FINAL " if final else "") + " | ".join(parts)
+
+    return MapReduceSummarizer(name, summarize_chunk, combine, chunk_size=chunk_size, fanout=fanout,
+                               cache=cache), calls
+
+
+def test_map_then_reduce_level_by_level(cache):
+    s, calls = recording_summarizer(cache)
+    out = s.summarize(document(5))
+    assert out["chunks"] == len(calls["map"]) >= 5
+    assert out["levels"] >= 2
+    assert [final for _, final in calls["reduce"]].count(True) == 1
+    assert out["summary"].startswith("FINAL ")
+    for i in range(5):
+        assert f"Section {i}" in out["summary"]
+
+
+def test_single_chunk_goes_straight_to_the_final_combine(cache):
+    s, calls = recording_summarizer(cache, chunk_size=10000)
+    out = s.summarize("A short claim note.")
+    assert calls["map"] == [] and calls["reduce"] == [(("A short claim note.",), True)]
+    assert out["levels"] == 1 and out["summary"] == "FINAL A short claim note."
+
+
+def test_amended_document_recomputes_only_changed_chunks(cache):
+    text = document(6)
+    first, _ = recording_summarizer(cache)
+    computed = first.summarize(text)["computed"]
+
+    amended = text.replace("Section 5.", "Section 5 (amended).")
+    second, calls = recording_summarizer(cache)
+    out = second.summarize(amended)
+    assert len(calls["map"]) == 1 and "amended" in calls["map"][0]
+    assert out["cache_hits"] > 0 and out["computed"] < computed
+
+
+def test_cache_is_keyed_by_summarizer_name(cache):
+    recording_summarizer(cache, name="llm:a")[0].summarize(document(3))
+    s, calls = recording_summarizer(cache, name="llm:b")
+    assert s.summarize(document(3))["cache_hits"] == 0 and calls["map"]
+
+
+def test_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    clock = iter(range(1, 1000))
+    monkeypatch.setattr(summarizer.time, "time", lambda: float(next(clock)))
+    cache = SummaryCache(path=str(tmp_path / "small.db"), max_bytes=100)
+    cache.put_many({f"k{i}": "x" * 10 for i in range(15)})
+    cache.get_many(["k0"])
+    assert cache.evict() > 0
+    assert cache.size()[1] <= 100 * summarizer.EVICT_TO_FRACTION
+    assert cache.get_many(["k0", "k1"]) == {"k0": "x" * 10}
+
+
+def test_first_release_cache_files_are_migrated(tmp_path):
+    path = str(tmp_path / "old.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE summaries (key TEXT PRIMARY KEY, summary TEXT NOT NULL, created_at REAL NOT NULL)")
+        conn.execute("INSERT INTO summaries VALUES ('k', 'café', 5.0)")
+    cache = SummaryCache(path=path)
+    assert cache.size() == (1, 5)
+    assert cache.get_many(["k"]) == {"k": "café"}
+
+
+def test_concurrent_documents_share_the_pool_bound(cache, monkeypatch):
+    monkeypatch.setattr(summarizer, "_pool", None)
+    monkeypatch.setattr(summarizer, "SUMMARY_WORKERS", 2)
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def summarize_chunk(text):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        threading.Event().wait(0.01)
+        with lock:
+            active[0] -= 1
+        return text[:20]
+
+    def run(i):
+        MapReduceSummarizer(f"doc{i}", summarize_chunk, lambda parts, final: " ".join(parts),
+                            chunk_size=200, cache=None).summarize(document(4))
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    summarizer.get_pool().shutdown()
+    assert peak[0] <= 2
+
+
+def test_summarize_llm_uses_one_call_for_short_text_and_map_reduce_above(monkeypatch, cache):
+    monkeypatch.setattr(summarizer, "get_cache", lambda: cache)
+    invoker, ptm = FakeInvoker(summary="fake summary"), PromptTemplateManager()
+    short = summarize_llm(invoker, ptm, "Summarize.", "A short claim note.")
+    assert short["text"] == "fake summary" and "map_reduce" not in short and len(invoker.prompts) == 1
+
+    monkeypatch.setattr(summarizer, "SUMMARY_MAP_REDUCE_MIN_CHARS", 1000)
+    long = summarize_llm(invoker, ptm, "Summarize.", document(4, chunk_size=summarizer.SUMMARY_CHUNK_SIZE))
+    assert long["success"] and long["text"] == "fake summary"
+    assert long["map_reduce"]["chunks"] > 1 and len(invoker.prompts) > 2
+
+
+def test_summarize_llm_reports_a_failed_call(monkeypatch, cache):
+    monkeypatch.setattr(summarizer, "get_cache", lambda: cache)
+    monkeypatch.setattr(summarizer, "SUMMARY_MAP_REDUCE_MIN_CHARS", 1000)
+    invoker = FakeInvoker()
+    invoker.generate = lambda prompt, model_id=None, timeout=None: {"success": False, "error": "throttled"}
+    out = summarize_llm(invoker, PromptTemplateManager(), "Summarize.", document(6))
+    assert out == {"success": False, "error": "throttled"}
+    assert cache.size() == (0, 0)   # failures are never cached
@@ -0,0 +1,41 @@
+# tests/test_textract_worker.py
+from app.textract_worker import extract_fields
+
+FORM = """Claim Reference: CLM-2025-5567
+Policy Number: PL-2024-00987
+Claimant Name: Asha Verma
+Insured Name: Rahul Verma
+Contact: +91 98765 43210
+Date of Loss: 12/03/2024
+Location of Loss: MG Road, Bengaluru
+Cause of Loss: Rear-end collision
+Items Damaged: Rear bumper, tail lamp
+Amount Claimed: INR 45,000
+"""
+
+
+def test_same_line_labels_capture_the_value_not_the_label():
+    fields = extract_fields(FORM, source="form")
+    assert {k: fields[k] for k in fields if k != "raw_claim_description"} == {
+        "policy_number": "PL-2024-00987",
+        "claimant_name": "Asha Verma",
+        "insured_name": "Rahul Verma",
+        "contact": "+91 98765 43210",
+        "date_of_loss": "2024-03-12",
+        "location_of_loss": "MG Road, Bengaluru",
+        "cause_of_loss": "Rear-end collision",
+        "items_damaged": "Rear bumper, tail lamp",
+        "amount_claimed": "INR 45000.00",
+        "claim_reference": "CLM-2025-5567",
+    }
+
+
+def test_labelled_date_follows_the_document_order():
+    us = "Invoice issued 12/25/2024\nDate of Loss: 03/04/2024\n"
+    assert extract_fields(us, source="us-claim")["date_of_loss"] == "2024-03-04"
+    assert extract_fields("Date of Loss: 03/04/2024\n", source="in-claim")["date_of_loss"] == "2024-04-03"
+
+
+def test_label_on_its_own_line_takes_the_next_line():
+    fields = extract_fields("Claimant Name\nAsha Verma\n", source="next-line")
+    assert fields["claimant_name"] == "Asha Verma"
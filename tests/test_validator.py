@@ -0,0 +1,63 @@
+# tests/test_validator.py
+import pytest
+
+from app.validator import parse_amounts, to_columns, validate_batch, validate_extraction
+
+RECORDS = [
+    {"policy_number": "PL-2024-00987", "date_of_loss": "2024-03-12", "amount_claimed": "INR 45,000"},
+    {"policy_number": "PL-2024-00987", "date_of_loss": "12/03/2024", "amount_claimed": "₹1,20,000.50"},
+    {"policy_number": "bad", "date_of_loss": "sometime last week", "amount_claimed": "a lot"},
+    {"policy_number": None, "date_of_loss": None, "amount_claimed": None},
+    {"policy_number": "CLM12345", "date_of_loss": "2024-02-30", "amount_claimed": "-500"},
+    {"policy_number": "PL-77777", "date_of_loss": 20240312, "amount_claimed": 1234.5},
+    {},
+]
+
+
+def test_batch_matches_row_by_row_validation():
+    res = validate_batch(to_columns(RECORDS))
+    assert res["rows"] == len(RECORDS)
+    for i, record in enumerate(RECORDS):
+        single = validate_extraction(record)
+        assert bool(res["valid"][i]) == single["valid"], record
+        assert float(res["score"][i]) == pytest.approx(single["score"]), record
+        assert sorted(res["issues"][i]) == sorted(single["issues"]), record
+
+
+def test_ragged_columns_are_padded_with_missing_values():
+    res = validate_batch({"policy_number": ["PL-2024-00987", "PL-2024-00988"], "date_of_loss": ["2024-03-12"]})
+    assert res["rows"] == 2
+    assert "date_of_loss_missing" in res["issues"][1]
+    assert res["flags"]["amount_missing"].all()
+
+
+def test_empty_batch():
+    res = validate_batch(to_columns([]))
+    assert res["rows"] == 0 and len(res["valid"]) == 0
+
+
+def test_parse_amounts_flags_missing_separately_from_unparseable():
+    amounts, missing = parse_amounts(["INR 45,000", None, "", "n/a", "Rs. 12.50"])
+    assert amounts[0] == 45000 and amounts[4] == 12.5
+    assert missing.tolist() == [False, True, False, False, False]
+    assert all(a != a for a in amounts[1:4])   # NaN
+
+
+@pytest.mark.parametrize("amount, issues", [
+    # the worker's normalized form; unparseable before currency markers were stripped
+    ("INR 45000.00", []),
+    ("Rs. 45,000", []),
+    ("rs 45000", []),
+    ("₹45,000", []),
+    ("$120", []),
+    ("45,000", []),
+    ("INR 0", ["amount_non_positive"]),
+    ("INR forty five thousand", ["amount_unparseable"]),
+    ("", ["amount_unparseable"]),
+    (None, ["amount_missing"]),
+])
+def test_single_row_amounts(amount, issues):
+    row = {"policy_number": "PL-2024-00987", "date_of_loss": "2024-03-12", "amount_claimed": amount}
+    result = validate_extraction(row)
+    assert result["issues"] == issues
+    assert result["score"] == (1.0 if not issues else 0.7)
@@ -0,0 +1,140 @@
+# tests/test_work_queue.py
+import contextlib
+import time
+
+import pytest
+
+from app import queue_worker
+from app.work_queue import WorkQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return WorkQueue(str(tmp_path / "queue.db"), visibility=60, max_attempts=2, backoff=0)
+
+
+def test_lease_orders_by_priority_then_age(queue):
+    batch = queue.enqueue("raw/batch.pdf", priority="batch")
+    first = queue.enqueue("raw/a.pdf")
+    second = queue.enqueue("raw/b.pdf")
+    leased = [queue.lease("w")["id"] for _ in range(3)]
+    assert leased == [first, second, batch]
+    assert queue.lease("w") is None
+
+
+def test_leased_task_is_invisible_until_the_lease_expires(queue):
+    task_id = queue.enqueue("raw/a.pdf")
+    task = queue.lease("w1", visibility=0.05)
+    assert task["status"] == "leased" and task["attempts"] == 1
+    assert queue.lease("w2") is None
+    time.sleep(0.1)
+    again = queue.lease("w2")
+    assert again["id"] == task_id and again["attempts"] == 2
+    # the first worker lost its lease
+    assert not queue.heartbeat(task_id, "w1")
+    assert not queue.complete(task_id, "w1", {"x": 1})
+    assert queue.complete(task_id, "w2", {"x": 2})
+    assert queue.get(task_id)["result"] == {"x": 2}
+
+
+def test_failures_retry_then_dead_letter_and_requeue(queue):
+    task_id = queue.enqueue("raw/a.pdf")
+    queue.fail(queue.lease("w")["id"], "w", "boom 1")
+    assert queue.get(task_id)["status"] == "queued"
+    queue.fail(queue.lease("w")["id"], "w", "boom 2")
+    dead = queue.get(task_id)
+    assert dead["status"] == "dead" and dead["last_error"] == "boom 2"
+    assert queue.stats()["dead"] == 1
+    assert queue.requeue(task_id)
+    assert queue.lease("w")["id"] == task_id
+
+
+def test_checkpoints_survive_a_retry(queue):
+    task_id = queue.enqueue("raw/a.pdf")
+    queue.lease("w")
+    assert queue.checkpoint(task_id, "w", "textract_job", "job-1")
+    queue.fail(task_id, "w", "crash")
+    assert queue.lease("w")["checkpoint"] == {"textract_job": "job-1"}
+
+
+def test_active_for(queue):
+    task_id = queue.enqueue("raw/a.pdf")
+    assert queue.active_for("raw/a.pdf")["id"] == task_id
+    queue.complete(queue.lease("w")["id"], "w")
+    assert queue.active_for("raw/a.pdf") is None
+    assert queue.active_for("raw/other.pdf") is None
+
+
+class FakeMain:
+    """The parts of app.main a queue task uses; OCR crashes until `crashes` runs out."""
+
+    def __init__(self, crashes=1):
+        self.crashes = crashes
+        self.textract_calls = []
+        self.stages = type("Stages", (), {"stage": staticmethod(lambda name: contextlib.nullcontext())})
+
+    def run_textract_worker(self, s3_key, job_id=None, on_job=None):
+        self.textract_calls.append(job_id)
+        if job_id is None:
+            on_job("job-1")
+        if self.crashes:
+            self.crashes -= 1
+            raise RuntimeError("worker died mid-poll")
+
+    def download_processed_text(self, s3_key):
+        return None, "processed/a.txt"
+
+    def analyze_processed_text(self, s3_key, local_txt_path, processed_key):
+        return {"s3_processed_key": processed_key}
+
+
+def test_retried_task_resumes_the_textract_job(queue, monkeypatch):
+    monkeypatch.setattr(queue_worker.os, "remove", lambda path: None)
+    fake = FakeMain(crashes=1)
+    task_id = queue.enqueue("raw/a.pdf")
+
+    task = queue.lease("w")
+    with pytest.raises(RuntimeError):
+        queue_worker._run_task(fake, queue, task, "w")
+    queue.fail(task_id, "w", "crash")
+
+    task = queue.lease("w")
+    assert queue_worker._run_task(fake, queue, task, "w") == {"s3_processed_key": "processed/a.txt"}
+    assert fake.textract_calls == [None, "job-1"]   # the retry polled the same job
+    assert queue.get(task_id)["checkpoint"] == {"textract_job": "job-1", "ocr": True}
+
+
+def test_process_attaches_to_a_queued_upload_instead_of_running_again(monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main, "AUTO_PROCESS_ON_UPLOAD", True)
+    client = main.app.test_client()
+    task_id = main.get_queue().enqueue("raw/queued-upload.pdf")
+    resp = client.post("/process", json={"s3_key": "raw/queued-upload.pdf"})
+    assert resp.status_code == 202
+    assert resp.get_json()["task_id"] == task_id
+    assert resp.headers["Location"] == f"/tasks/{task_id}"
+
+
+def test_task_list_rejects_a_bad_limit():
+    from app import main
+
+    client = main.app.test_client()
+    assert client.get("/tasks?limit=ten").status_code == 400
+    assert client.get("/tasks?limit=5").status_code == 200
+
+
+def test_upload_is_not_queued_by_default(monkeypatch):
+    import io
+
+    from app import main
+    from tests.fakes import FakeS3
+
+    s3 = FakeS3()
+    monkeypatch.setattr(main, "get_s3", lambda: s3)
+    before = main.get_queue().stats()
+    resp = main.app.test_client().post("/upload", data={"file": (io.BytesIO(b"%PDF-1.4"), "claim.pdf")})
+    assert resp.status_code == 200
+    assert "task_id" not in resp.get_json()
+    assert resp.get_json()["s3_key"] in s3.objects
+    assert main.get_queue().stats() == before